@@ -1,7 +1,27 @@
-from .agency import Agency
-from .agents import Agent
-from .tools import BaseTool
-from .util import set_openai_key
-from .util import set_openai_client
-from .util import get_openai_client
-from .util import setup_logging
+# Names are imported on first access (see util.lazy), so `import agency_swarm` does not load openai, instructor or
+# rich, and CLI commands and worker processes start quickly.
+from typing import TYPE_CHECKING
+
+from .util.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .agency import Agency
+    from .agents import Agent
+    from .tools import BaseTool
+    from .util import set_openai_key, set_openai_client, get_openai_client, setup_logging, set_rate_limits, \
+        set_usage_budget
+
+__all__ = ["Agency", "Agent", "BaseTool", "set_openai_key", "set_openai_client", "get_openai_client",
+           "setup_logging", "set_rate_limits", "set_usage_budget"]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "Agency": ".agency",
+    "Agent": ".agents",
+    "BaseTool": ".tools",
+    "set_openai_key": ".util",
+    "set_openai_client": ".util",
+    "get_openai_client": ".util",
+    "setup_logging": ".util",
+    "set_rate_limits": ".util",
+    "set_usage_budget": ".util",
+})
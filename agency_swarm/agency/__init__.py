@@ -1 +1,15 @@
-from .agency import Agency
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from agency_swarm.util.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .agency import Agency
+    from .gateway import AgencyGateway
+    from .batch import BatchRunner, run_batch
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "Agency": ".agency",
+    "AgencyGateway": ".gateway",
+    "BatchRunner": ".batch",
+    "run_batch": ".batch",
+})
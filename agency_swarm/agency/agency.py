@@ -5,27 +5,30 @@ from enum import Enum
 from typing import List
 
 from pydantic import Field, field_validator
-from rich.console import Console
 
 from agency_swarm.agents import Agent
-from agency_swarm.sessions import Session
+from agency_swarm.messages.message_output import get_console
+from agency_swarm.sessions import Session, SessionPool
+from agency_swarm.threads import ThreadWatchdog
 from agency_swarm.tools import BaseTool
 from agency_swarm.user import User
-from agency_swarm.util.log_config import setup_logging 
-logger = setup_logging()
-
-console = Console()
+from agency_swarm.util.log_config import get_logger
+logger = get_logger()
 
 
 class Agency:
 
-    def __init__(self, agency_chart, shared_instructions="", shared_files=None):
+    def __init__(self, agency_chart, shared_instructions="", shared_files=None, max_user_sessions=1000,
+                 user_session_idle_timeout=3600, watchdog_interval=60):
         """
         Initializes the Agency object, setting up agents, sessions, and core functionalities.
 
         Parameters:
         agency_chart: The structure defining the hierarchy and interaction of agents within the agency.
         shared_instructions (str, optional): A path to a file containing shared instructions for all agents. Defaults to an empty string.
+        max_user_sessions (int, optional): The maximum number of user sessions kept in memory when get_completion is called with a user_id. Defaults to 1000.
+        user_session_idle_timeout (float, optional): Seconds after which an idle user session and its threads are evicted. Defaults to 3600.
+        watchdog_interval (float, optional): Seconds between scans of the thread watchdog that reclaims threads with expired leases. Set to None to disable the watchdog. Defaults to 60.
 
         This constructor initializes various components of the Agency, including CEO, agents, sessions, and user interactions. It parses the agency chart to set up the organizational structure and initializes the messaging tools, agents, and sessions necessary for the operation of the agency. Additionally, it prepares a user entrance session for user interactions.
         """
@@ -48,9 +51,15 @@ class Agency:
 
         self.user = User()
         self.entrance_session = Session(self.user, self.ceo)
+        self.user_sessions = SessionPool(self.ceo, self.agents,
+                                         max_sessions=max_user_sessions,
+                                         idle_timeout=user_session_idle_timeout)
+        self.thread_watchdog = ThreadWatchdog(self.agents, interval=watchdog_interval)
+        if watchdog_interval:
+            self.thread_watchdog.start()
 
     def get_completion(self, message: str, message_files=None, 
-    yield_messages=True):
+    yield_messages=True, user_id: str = None):
         """
         Retrieves the completion for a given message from the user entrance session.
 
@@ -58,14 +67,20 @@ class Agency:
         message (str): The message for which completion is to be retrieved.
         message_files (list, optional): A list of file ids to be sent as attachments with the message. Defaults to None.
         yield_messages (bool, optional): Flag to determine if intermediate messages should be yielded. Defaults to True.
+        user_id (str, optional): Identifies the user of a multi-user deployment. Each user gets an isolated entrance session and threads, and different users can be served concurrently. Defaults to None, which uses the agency's single default session.
 
         Returns:
         Generator or final response: Depending on the 'yield_messages' flag, this method returns either a generator yielding intermediate messages or the final response from the entrance session.
         """
-        gen = self.entrance_session.get_completion(message=message, 
-                                                   message_files=message_files, 
-                                                   is_persist=True, 
-                                                   yield_messages=yield_messages)
+        if user_id is None:
+            gen = self.entrance_session.get_completion(message=message, 
+                                                       message_files=message_files, 
+                                                       is_persist=True, 
+                                                       yield_messages=yield_messages)
+        else:
+            gen = self.user_sessions.get_completion(user_id, message,
+                                                    message_files=message_files,
+                                                    yield_messages=yield_messages)
         if not yield_messages:
             while True:
                 try:
@@ -130,6 +145,27 @@ class Agency:
         demo.launch()
         return demo
 
+    def serve(self, host: str = "127.0.0.1", port: int = 8000, **gateway_kwargs):
+        """
+        Serves the agency over HTTP (server-sent events) and WebSockets, see agency_swarm.agency.gateway.
+
+        Parameters:
+        host (str, optional): The interface to bind. Defaults to "127.0.0.1".
+        port (int, optional): The port to bind. Defaults to 8000.
+        gateway_kwargs: Passed to AgencyGateway (max_concurrent_turns, buffer_size, ...).
+        """
+        try:
+            import uvicorn
+        except ImportError:
+            raise Exception("Please install uvicorn: pip install uvicorn")
+
+        from .gateway import AgencyGateway
+        gateway = AgencyGateway(self, **gateway_kwargs)
+        try:
+            uvicorn.run(gateway, host=host, port=port, ws="auto")
+        finally:
+            gateway.close()
+
     def run_demo(self):
         """
         Runs a demonstration of the agency's capabilities in an interactive command line interface.
@@ -140,7 +176,7 @@ class Agency:
         Outputs the responses from the agency's entrance session to the command line.
         """
         while True:
-            console.rule()
+            get_console().rule()
             text = input("USER: ")
 
             try:
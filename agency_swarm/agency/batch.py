@@ -0,0 +1,178 @@
+"""
+Batch mode: runs the prompts of a JSONL file through an Agency concurrently and appends one result line per job to an
+output JSONL as the jobs finish.
+
+Input lines:   {"id": "job-1", "message": "...", "message_files": ["file-..."], "user_id": "..."}
+               (only "message" is required; the id defaults to the line number)
+Output lines:  {"id": "job-1", "status": "completed" | "failed" | "timeout", "response": "...", "error": null,
+                "started_at": "...", "duration": 12.3, "messages": 7, "usage": {"prompt_tokens": ..., ...}}
+
+Jobs already completed in the output file are skipped, so an interrupted batch is resumed by running it again.
+"""
+import concurrent.futures
+import contextlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from agency_swarm.sessions.session import TurnDeadlineExceeded, turn_deadline
+from agency_swarm.util.usage import get_usage_tracker
+from agency_swarm.util.log_config import get_logger
+logger = get_logger()
+
+
+class BatchJob:
+    def __init__(self, job_id: str, message: str, message_files=None, user_id: str = None):
+        self.job_id = job_id
+        self.message = message
+        self.message_files = message_files
+        # jobs without a user run in their own conversation, so they do not share threads
+        self.user_id = user_id
+        self.isolated = user_id is None
+        if self.isolated:
+            self.user_id = f"batch-{job_id}"
+
+
+def read_jobs(path: str):
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, str):
+                entry = {"message": entry}
+            if not entry.get("message"):
+                raise ValueError(f"Line {line_number} of {path} has no 'message'.")
+            jobs.append(BatchJob(str(entry.get("id", line_number)), entry["message"],
+                                 entry.get("message_files"), entry.get("user_id")))
+    return jobs
+
+
+def read_finished_jobs(path: str, retry_failed: bool = True) -> set:
+    """Ids of the jobs recorded in an output file. Failed and timed out jobs are left out if retry_failed is True."""
+    finished = set()
+    if not os.path.isfile(path):
+        return finished
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by the interruption
+            if result.get("status") == "completed" or not retry_failed:
+                finished.add(str(result["id"]))
+    return finished
+
+
+class BatchRunner:
+    """
+    Runs many prompts through an agency concurrently.
+
+    Parameters:
+    agency (Agency): The agency that processes the jobs. Every job runs as a user of agency.get_completion(user_id=...).
+    workers (int, optional): Jobs processed at the same time. Defaults to 8.
+    timeout (float, optional): Seconds after which a job is abandoned and its active run is cancelled. The deadline is
+        checked whenever the agency yields a message, and by the sessions while they poll a run (see turn_deadline).
+        None disables it. Defaults to 600.
+    """
+
+    def __init__(self, agency, workers: int = 8, timeout: float = 600):
+        self.agency = agency
+        self.workers = workers
+        self.timeout = timeout
+        self._write_lock = threading.Lock()
+
+    def run(self, input_path: str, output_path: str, resume: bool = True, retry_failed: bool = True) -> dict:
+        """
+        Runs the jobs of `input_path` and appends their results to `output_path`.
+
+        Parameters:
+        input_path (str): The JSONL file of jobs.
+        output_path (str): The JSONL file results are appended to.
+        resume (bool, optional): Skip the jobs already recorded in output_path. Defaults to True.
+        retry_failed (bool, optional): When resuming, run failed and timed out jobs again. Defaults to True.
+
+        Returns:
+        dict: The number of jobs per status, including "skipped".
+        """
+        jobs = read_jobs(input_path)
+        finished = read_finished_jobs(output_path, retry_failed) if resume else set()
+        pending = [job for job in jobs if job.job_id not in finished]
+        summary = {"completed": 0, "failed": 0, "timeout": 0, "skipped": len(jobs) - len(pending)}
+        logger.info(f"Batch {input_path}: {len(pending)} jobs to run, {summary['skipped']} already done.")
+
+        with open(output_path, "a", encoding="utf-8") as output, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.workers,
+                                                      thread_name_prefix="agency-batch") as executor:
+            futures = [executor.submit(self.run_job, job) for job in pending]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    result = future.result()
+                    summary[result["status"]] += 1
+                    with self._write_lock:
+                        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                        output.flush()
+            except BaseException:
+                # stop taking new jobs, the ones already written are kept for the next run
+                for future in futures:
+                    future.cancel()
+                raise
+        return summary
+
+    def run_job(self, job: BatchJob) -> dict:
+        tracker = get_usage_tracker()
+        usage_before = _usage_dict(tracker.get_usage("user", job.user_id))
+        started_at = datetime.utcnow()
+        started = time.monotonic()
+        deadline = started + self.timeout if self.timeout else None
+        status, response, error, messages = "completed", None, None, 0
+
+        gen = self.agency.get_completion(job.message, message_files=job.message_files,
+                                         yield_messages=True, user_id=job.user_id)
+        try:
+            with turn_deadline(deadline) if deadline is not None else contextlib.nullcontext():
+                while True:
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise TurnDeadlineExceeded()
+                    try:
+                        next(gen)
+                        messages += 1
+                    except StopIteration as e:
+                        response = e.value
+                        break
+        except TurnDeadlineExceeded:
+            status, error = "timeout", f"Job exceeded {self.timeout} seconds."
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {str(e)}"
+        finally:
+            gen.close()  # cancels the active run of an abandoned job
+            if job.isolated:
+                self.agency.user_sessions.remove(job.user_id)
+
+        usage_after = _usage_dict(tracker.get_usage("user", job.user_id))
+        if status != "completed":
+            logger.info(f"Batch job {job.job_id} {status}: {error}", extra={"user_id": job.user_id})
+        return {
+            "id": job.job_id,
+            "status": status,
+            "response": response,
+            "error": error,
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "duration": round(time.monotonic() - started, 3),
+            "messages": messages,
+            "usage": {key: round(usage_after[key] - usage_before[key], 6) for key in usage_after},
+        }
+
+
+def _usage_dict(usage) -> dict:
+    return {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens, "cost": usage.cost, "calls": usage.calls}
+
+
+def run_batch(agency, input_path: str, output_path: str, workers: int = 8, timeout: float = 600,
+              resume: bool = True) -> dict:
+    """Runs the jobs of a JSONL file through the agency, see BatchRunner.run."""
+    return BatchRunner(agency, workers=workers, timeout=timeout).run(input_path, output_path, resume=resume)
@@ -0,0 +1,302 @@
+"""
+ASGI gateway that serves Agency.get_completion to many concurrent conversations. Every message produced during a turn
+is sent once, as soon as it is yielded:
+
+    POST /v1/conversations/{user_id}/messages   {"message": "...", "message_files": [...]}
+        -> text/event-stream: "event: message" per MessageOutput, then "event: done" with the final response
+    WS   /v1/conversations/{user_id}/ws         send {"message": "..."}
+        -> {"type": "message", ...} per MessageOutput, then {"type": "done", "response": "..."}
+    GET  /health
+
+Run it with any ASGI server, e.g. `uvicorn.run(AgencyGateway(agency))`, or with Agency.serve().
+"""
+import asyncio
+import concurrent.futures
+import json
+import re
+import threading
+
+from agency_swarm.util.log_config import get_logger
+logger = get_logger()
+
+_CONVERSATION_PATH = re.compile(r"^/v1/conversations/(?P<user_id>[^/]+)/(?P<action>messages|ws)$")
+
+
+class _Turn:
+    """
+    One turn of a conversation. The blocking agency generator runs in a worker thread and hands its messages to the
+    event loop through a bounded queue: when the client reads slower than the agency produces, the worker waits and
+    stops pulling from the generator. When the client goes away, the generator is closed, which cancels the active
+    run (see Session.get_completion).
+    """
+
+    def __init__(self, agency, user_id, message, message_files, loop, buffer_size):
+        self.agency = agency
+        self.user_id = user_id
+        self.message = message
+        self.message_files = message_files
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.cancelled = threading.Event()
+
+    def run(self):
+        gen = None
+        try:
+            gen = self.agency.get_completion(self.message, message_files=self.message_files,
+                                             yield_messages=True, user_id=self.user_id)
+            while not self.cancelled.is_set():
+                try:
+                    message = next(gen)
+                except StopIteration as e:
+                    self._put(("done", e.value))
+                    return
+                if not self._put(("message", message)):
+                    return
+        except Exception as e:
+            logger.info(f"Turn of [{self.user_id}] failed: {str(e)}", extra={"user_id": self.user_id})
+            self._put(("error", str(e)))
+        finally:
+            if gen is not None:
+                gen.close()
+
+    def _put(self, item) -> bool:
+        future = asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop)
+        while True:
+            try:
+                future.result(timeout=0.5)
+                return True
+            except concurrent.futures.TimeoutError:
+                if self.cancelled.is_set():
+                    future.cancel()
+                    return False
+
+
+def _message_event(message) -> dict:
+    return {"type": "message", "msg_type": message.msg_type, "sender": message.sender_name,
+            "receiver": message.receiver_name, "content": message.content}
+
+
+class AgencyGateway:
+    """
+    ASGI application that exposes an Agency over HTTP (server-sent events) and WebSockets.
+
+    Parameters:
+    agency (Agency): The agency to serve. Conversations are keyed by user_id, see Agency.get_completion.
+    max_concurrent_turns (int, optional): Turns executed at the same time; further turns wait for a worker. Defaults to 32.
+    max_pending_turns (int, optional): Turns running or waiting beyond which new turns are rejected with 503. Defaults to 256.
+    buffer_size (int, optional): Messages buffered per turn before the turn waits for its client. Defaults to 16.
+    keepalive (float, optional): Seconds of silence after which an SSE comment is sent to keep the connection open. Defaults to 15.
+    max_body_size (int, optional): Largest accepted request body in bytes. Defaults to 1 MiB.
+    """
+
+    def __init__(self, agency, max_concurrent_turns: int = 32, max_pending_turns: int = 256, buffer_size: int = 16,
+                 keepalive: float = 15, max_body_size: int = 1048576):
+        self.agency = agency
+        self.max_pending_turns = max_pending_turns
+        self.buffer_size = buffer_size
+        self.keepalive = keepalive
+        self.max_body_size = max_body_size
+        self.pending_turns = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent_turns,
+                                                               thread_name_prefix="agency-turn")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        path = scope["path"].rstrip("/")
+        match = _CONVERSATION_PATH.match(path)
+        if scope["type"] == "websocket":
+            if match and match["action"] == "ws":
+                await self._websocket(match["user_id"], receive, send)
+            else:
+                await send({"type": "websocket.close", "code": 4404})
+            return
+
+        if path == "/health" and scope["method"] == "GET":
+            await self._json_response(send, 200, {"status": "ok", "pending_turns": self.pending_turns})
+        elif match and match["action"] == "messages":
+            if scope["method"] != "POST":
+                await self._json_response(send, 405, {"error": "Method not allowed."})
+            else:
+                await self._post_message(match["user_id"], receive, send)
+        else:
+            await self._json_response(send, 404, {"error": "Not found."})
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Turns ---
+
+    def _start_turn(self, user_id, message, message_files):
+        if self.pending_turns >= self.max_pending_turns:
+            return None
+        turn = _Turn(self.agency, user_id, message, message_files, asyncio.get_running_loop(), self.buffer_size)
+        self.pending_turns += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, turn.run)
+        future.add_done_callback(lambda _: self._finish_turn())
+        return turn
+
+    def _finish_turn(self):
+        self.pending_turns -= 1
+
+    @staticmethod
+    def _parse_request(body):
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return None, "Invalid JSON."
+        if not isinstance(request, dict) or not isinstance(request.get("message"), str) or not request["message"]:
+            return None, "A non-empty 'message' string is required."
+        files = request.get("message_files")
+        if files is not None and not (isinstance(files, list) and all(isinstance(f, str) for f in files)):
+            return None, "'message_files' must be a list of file ids."
+        return request, None
+
+    # --- HTTP ---
+
+    async def _post_message(self, user_id, receive, send):
+        body = b""
+        while True:
+            event = await receive()
+            if event["type"] == "http.disconnect":
+                return
+            body += event.get("body", b"")
+            if len(body) > self.max_body_size:
+                await self._json_response(send, 413, {"error": "Request body too large."})
+                return
+            if not event.get("more_body"):
+                break
+
+        request, error = self._parse_request(body)
+        if error:
+            await self._json_response(send, 400, {"error": error})
+            return
+        turn = self._start_turn(user_id, request["message"], request.get("message_files"))
+        if turn is None:
+            await self._json_response(send, 503, {"error": "Too many turns in progress."},
+                                      headers=[(b"retry-after", b"1")])
+            return
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            turn.cancelled.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"),
+                                    (b"x-accel-buffering", b"no")]})
+            while not turn.cancelled.is_set():
+                try:
+                    kind, value = await asyncio.wait_for(turn.queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    await send({"type": "http.response.body", "body": b": keepalive\n\n", "more_body": True})
+                    continue
+                if kind == "message":
+                    await self._send_event(send, "message", _message_event(value))
+                    continue
+                payload = {"type": "done", "response": value} if kind == "done" else {"type": "error", "error": value}
+                await self._send_event(send, kind, payload)
+                break
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except OSError:
+            pass  # the client went away while we were writing
+        finally:
+            turn.cancelled.set()
+            watcher.cancel()
+
+    @staticmethod
+    async def _send_event(send, event, payload):
+        data = json.dumps(payload, ensure_ascii=False, default=str)  # tools may return any object
+        await send({"type": "http.response.body", "body": f"event: {event}\ndata: {data}\n\n".encode(),
+                    "more_body": True})
+
+    @staticmethod
+    async def _json_response(send, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode())] + (headers or [])})
+        await send({"type": "http.response.body", "body": body})
+
+    # --- WebSocket ---
+
+    async def _websocket(self, user_id, receive, send):
+        if (await receive())["type"] != "websocket.connect":
+            return
+        await send({"type": "websocket.accept"})
+        inbox = asyncio.Queue()
+        closed = asyncio.Event()
+
+        async def read():
+            while True:
+                event = await receive()
+                if event["type"] == "websocket.disconnect":
+                    closed.set()
+                    return
+                await inbox.put(event.get("text") or (event.get("bytes") or b"").decode())
+
+        reader = asyncio.ensure_future(read())
+        try:
+            while not closed.is_set():
+                text = await self._next_or_closed(inbox.get(), closed)
+                if text is None:
+                    break
+                request, error = self._parse_request(text)
+                if error:
+                    await send({"type": "websocket.send", "text": json.dumps({"type": "error", "error": error})})
+                    continue
+                turn = self._start_turn(user_id, request["message"], request.get("message_files"))
+                if turn is None:
+                    await send({"type": "websocket.send",
+                                "text": json.dumps({"type": "error", "error": "Too many turns in progress."})})
+                    continue
+                try:
+                    while True:
+                        item = await self._next_or_closed(turn.queue.get(), closed)
+                        if item is None:
+                            break
+                        kind, value = item
+                        if kind == "message":
+                            payload = _message_event(value)
+                        elif kind == "done":
+                            payload = {"type": "done", "response": value}
+                        else:
+                            payload = {"type": "error", "error": value}
+                        await send({"type": "websocket.send",
+                                    "text": json.dumps(payload, ensure_ascii=False, default=str)})
+                        if kind != "message":
+                            break
+                finally:
+                    turn.cancelled.set()
+            if not closed.is_set():
+                await send({"type": "websocket.close", "code": 1000})
+        except OSError:
+            pass
+        finally:
+            reader.cancel()
+
+    @staticmethod
+    async def _next_or_closed(awaitable, closed):
+        getter = asyncio.ensure_future(awaitable)
+        closer = asyncio.ensure_future(closed.wait())
+        done, _ = await asyncio.wait({getter, closer}, return_when=asyncio.FIRST_COMPLETED)
+        closer.cancel()
+        if getter in done:
+            return getter.result()
+        getter.cancel()
+        return None
+
+    # --- Lifespan ---
+
+    async def _lifespan(self, receive, send):
+        while True:
+            event = await receive()
+            if event["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif event["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
@@ -1,17 +1,19 @@
 import inspect
 import json
 import os
+import threading
+from collections import OrderedDict
 from typing import Dict, Union, Any, Type
 from typing import List
 
-from deepdiff import DeepDiff
-
-from agency_swarm.tools import BaseTool, ToolFactory
+from agency_swarm.tools import BaseTool, ToolFactory, ResponsePolicy, ToolRetriever
 from agency_swarm.tools import Retrieval, CodeInterpreter
 from agency_swarm.util.oai import get_openai_client
 from agency_swarm.util.openapi import validate_openapi_spec
 
 from agency_swarm.threads import Thread
+from agency_swarm.threads.retention import ThreadRetentionPolicy, ArchivedThread
+from agency_swarm.threads.routing_cache import RoutingCache
 
 class Agent():
     @property
@@ -30,23 +32,114 @@ class Agent():
 
     @property
     def threads(self):
-        return self._threads  # 返回数组的内容
+        with self._threads_lock:
+            return list(self._threads)  # 返回数组的快照，避免并发修改
+
+    def get_threads(self, owner: str = None):
+        """Returns the threads of the given owner (user_id), or all threads if owner is None."""
+        with self._threads_lock:
+            if owner is None:
+                return list(self._threads)
+            return [thread for thread in self._threads if thread.owner == owner]
+
+    def get_threads_version(self, owner: str = None):
+        """
+        Returns a value that changes whenever the owner's routable threads change: a thread is added, archived or
+        removed, or a thread's task description is updated.
+        """
+        with self._threads_lock:
+            revisions = sum(thread.description_revision for thread in self._threads
+                            if owner is None or thread.owner == owner)
+            return self._threads_version, revisions
 
     def add_thread(self, thread:Thread):
-        ## Mutex
-        if thread not in self._threads:
-            self._threads.append(thread)  # 提供一个方法来追加项目到数组
-        ## Mutex
+        with self._threads_lock:
+            if thread not in self._threads:
+                self._threads.append(thread)  # 提供一个方法来追加项目到数组
+                self._threads_version += 1
+            self._archived_threads.pop(thread.thread_id, None)
+        self.enforce_thread_retention(thread.owner)
+
     def remove_thread(self, thread:Thread):
-        ## Mutex
-        self._threads.remove(thread)  # 提供一个方法来追加项目到数组
-        ## Mutex
+        with self._threads_lock:
+            if thread in self._threads:
+                self._threads.remove(thread)
+                self._threads_version += 1
+
+    def remove_threads(self, owner: str):
+        """Removes all threads of the given owner (user_id), including archived ones, and returns the active ones."""
+        with self._threads_lock:
+            removed = [thread for thread in self._threads if thread.owner == owner]
+            self._threads = [thread for thread in self._threads if thread.owner != owner]
+            self._threads_version += 1
+            for thread_id in [k for k, v in self._archived_threads.items() if v.owner == owner]:
+                del self._archived_threads[thread_id]
+        return removed
+
+    def enforce_thread_retention(self, owner: str = None):
+        """
+        Archives threads according to the agent's thread retention policy, for one owner or all owners.
+
+        Returns:
+        List[Thread]: The archived threads.
+        """
+        archived = []
+        with self._threads_lock:
+            owners = [owner] if owner is not None else {thread.owner for thread in self._threads}
+            for thread_owner in owners:
+                threads = [thread for thread in self._threads if thread.owner == thread_owner]
+                for thread in self.thread_retention.select_for_archival(threads):
+                    self._archive_thread(thread)
+                    archived.append(thread)
+        return archived
+
+    def archive_thread(self, thread: Thread):
+        with self._threads_lock:
+            if thread in self._threads:
+                self._archive_thread(thread)
+
+    def _archive_thread(self, thread: Thread):
+        self._threads.remove(thread)
+        self._threads_version += 1
+        self._archived_threads[thread.thread_id] = ArchivedThread(thread)
+        while len(self._archived_threads) > self.thread_retention.max_archived:
+            self._archived_threads.popitem(last=False)
+
+    def get_archived_threads(self, owner: str = None):
+        with self._threads_lock:
+            return [record for record in self._archived_threads.values() if owner is None or record.owner == owner]
+
+    def recover_thread(self, thread_id: str) -> Thread:
+        """
+        Restores an archived thread by its id and makes it available for routing again.
+
+        Raises:
+        Exception: If the thread is neither active nor archived.
+        """
+        with self._threads_lock:
+            for thread in self._threads:
+                if thread.thread_id == thread_id:
+                    return thread
+            record = self._archived_threads.pop(thread_id, None)
+        if record is None:
+            raise Exception(f"Thread {thread_id} not found.")
+
+        thread = Thread(thread_id=record.thread_id)
+        thread.owner = record.owner
+        thread.task_description = record.task_description
+        thread.restore_history(record.pending_history)
+        with self._threads_lock:
+            self._threads.append(thread)
+            self._threads_version += 1
+        return thread
 
     def __init__(self, id: str = None, name: str = None, description: str = None, instructions: str = "",
                  tools: List[Union[Type[BaseTool], Type[Retrieval], Type[CodeInterpreter]]] = None,
                  files_folder: Union[List[str], str] = None, schemas_folder: Union[List[str], str] = None,
                  api_headers: Dict[str, Dict[str, str]] = None, api_params: Dict[str, Dict[str, str]] = None,
-                 file_ids: List[str] = None, metadata: Dict[str, str] = None, model: str = "gpt-4-1106-preview"):
+                 file_ids: List[str] = None, metadata: Dict[str, str] = None, model: str = "gpt-4-1106-preview",
+                 thread_retention: ThreadRetentionPolicy = None, routing_cache: RoutingCache = None,
+                 tool_retriever: ToolRetriever = None, api_response_policies: Dict[str, ResponsePolicy] = None):
         """
         Initializes an Agent with specified attributes, tools, and OpenAI client.
 
@@ -63,6 +156,10 @@ class Agent():
         file_ids (List[str], optional): List of file IDs for files associated with the agent. Defaults to an empty list.
         metadata (Dict[str, str], optional): Metadata associated with the agent. Defaults to an empty dictionary.
         model (str, optional): The model identifier for the OpenAI API. Defaults to "gpt-4-1106-preview".
+        thread_retention (ThreadRetentionPolicy, optional): Policy that bounds the threads kept for routing and archives the rest. Defaults to ThreadRetentionPolicy().
+        routing_cache (RoutingCache, optional): Cache of routing decisions for messages sent to this agent. Defaults to RoutingCache().
+        tool_retriever (ToolRetriever, optional): Gives each run only the tools relevant to its message, for agents with many tools. Defaults to None (every run gets all tools).
+        api_response_policies (Dict[str, ResponsePolicy], optional): Download caps and field selection for the openapi responses. Each key must be a full filename from schemas_folder. Defaults to an empty dictionary.
 
         This constructor sets up the agent with its unique properties, initializes the OpenAI client, reads instructions if provided, and uploads any associated files.
         """
@@ -80,11 +177,18 @@ class Agent():
         self.file_ids = file_ids if file_ids else []
         self.metadata = metadata if metadata else {}
         self.model = model
+        self.thread_retention = thread_retention if thread_retention else ThreadRetentionPolicy()
+        self.routing_cache = routing_cache if routing_cache else RoutingCache()
+        self.tool_retriever = tool_retriever
+        self.api_response_policies = api_response_policies if api_response_policies else {}
 
         # private attributes
         self._assistant: Any = None
         self._shared_instructions = None
         self._threads = []
+        self._archived_threads = OrderedDict()  # thread_id -> ArchivedThread, oldest first
+        self._threads_version = 0
+        self._threads_lock = threading.RLock()
 
         # init methods
         self.client = get_openai_client()
@@ -267,25 +371,35 @@ class Agent():
         else:
             raise Exception("Invalid tool type.")
 
-    def get_oai_tools(self):
-        tools = []
-        for tool in self.tools:
+    def get_oai_tools(self, tools: list = None):
+        oai_tools = []
+        for tool in self.tools if tools is None else tools:
             if not isinstance(tool, type):
                 print(tool)
                 raise Exception("Tool must not be initialized.")
 
             if issubclass(tool, Retrieval):
-                tools.append(tool().model_dump())
+                oai_tools.append(tool().model_dump())
             elif issubclass(tool, CodeInterpreter):
-                tools.append(tool().model_dump())
+                oai_tools.append(tool().model_dump())
             elif issubclass(tool, BaseTool):
-                tools.append({
+                oai_tools.append({
                     "type": "function",
                     "function": tool.openai_schema
                 })
             else:
                 raise Exception("Invalid tool type.")
-        return tools
+        return oai_tools
+
+    def get_run_tools(self, message: str):
+        """
+        Returns the tools (in the format of get_oai_tools) of a run for `message`, as selected by the tool retriever,
+        or None if the run gets all tools of the assistant.
+        """
+        if self.tool_retriever is None or not message:
+            return None
+        tools = self.tool_retriever.select(self.tools, message)
+        return self.get_oai_tools(tools) if tools is not None else None
 
     def _parse_schemas(self):
         schemas_folders = self.schemas_folder if isinstance(self.schemas_folder, list) else [self.schemas_folder]
@@ -307,8 +421,8 @@ class Agent():
                     for f_path in f_paths:
                         with open(f_path, 'r') as f:
                             openapi_spec = f.read()
-                            f.close()
                         try:
+                            openapi_spec = json.loads(openapi_spec)
                             validate_openapi_spec(openapi_spec)
                         except Exception as e:
                             print("Invalid OpenAPI schema: " + os.path.basename(f_path))
@@ -320,7 +434,9 @@ class Agent():
                                 headers = self.api_headers[os.path.basename(f_path)]
                             if os.path.basename(f_path) in self.api_params:
                                 params = self.api_params[os.path.basename(f_path)]
-                            tools = ToolFactory.from_openapi_schema(openapi_spec, headers=headers, params=params)
+                            response_policy = self.api_response_policies.get(os.path.basename(f_path))
+                            tools = ToolFactory.from_openapi_schema(openapi_spec, headers=headers, params=params,
+                                                                    response_policy=response_policy)
                         except Exception as e:
                             print("Error parsing OpenAPI schema: " + os.path.basename(f_path))
                             raise e
@@ -352,6 +468,8 @@ class Agent():
             return False
         if self.instructions != assistant_settings['instructions']:
             return False
+        from deepdiff import DeepDiff  # slow to import, only needed when an assistant is loaded
+
         tools_diff = DeepDiff(self.get_oai_tools(), assistant_settings['tools'], ignore_order=True)
         if tools_diff != {}:
             return False
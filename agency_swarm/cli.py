@@ -1,8 +1,23 @@
 import argparse
+import importlib
+import os
+import sys
 
 from agency_swarm.util import create_agent_template
 
 
+def load_agency(target: str):
+    """
+    Loads an agency from "module:attribute". The attribute is an Agency, or a function that returns one.
+    """
+    module_name, _, attribute = target.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Expected --agency as 'module:attribute', got '{target}'.")
+    sys.path.insert(0, os.getcwd())
+    agency = getattr(importlib.import_module(module_name), attribute)
+    return agency() if callable(agency) else agency
+
+
 def main():
     parser = argparse.ArgumentParser(description='Create agent template.')
 
@@ -16,11 +31,27 @@ def main():
     create_parser.add_argument('--name', type=str, help='Name of agent.')
     create_parser.add_argument('--description', type=str, help='Description of agent.')
 
+    batch_parser = subparsers.add_parser('run-batch', help='Run the prompts of a JSONL file through an agency.')
+    batch_parser.add_argument('--agency', type=str, required=True,
+                              help='The agency as module:attribute, e.g. my_agency:agency or my_agency:create_agency.')
+    batch_parser.add_argument('--input', type=str, required=True, help='JSONL file of jobs.')
+    batch_parser.add_argument('--output', type=str, required=True, help='JSONL file the results are appended to.')
+    batch_parser.add_argument('--workers', type=int, default=8, help='Jobs processed at the same time.')
+    batch_parser.add_argument('--timeout', type=float, default=600, help='Seconds after which a job is abandoned.')
+    batch_parser.add_argument('--no-resume', action='store_true', default=False,
+                              help='Run every job again, even the ones already in the output file.')
+
     args = parser.parse_args()
 
     if args.create_template == "create-agent-template":
         create_agent_template(args.name, args.description, args.path, args.use_txt)
+    elif args.create_template == "run-batch":
+        from agency_swarm.agency.batch import run_batch
+        summary = run_batch(load_agency(args.agency), args.input, args.output, workers=args.workers,
+                            timeout=args.timeout, resume=not args.no_resume)
+        print(", ".join(f"{status}: {count}" for status, count in summary.items()))
+        return 1 if summary["failed"] or summary["timeout"] else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,10 +1,19 @@
 from typing import Literal
 import hashlib
-from rich.console import Console
 
 from agency_swarm.util.oai import get_openai_client
 
-console = Console()
+_console = None
+
+
+def get_console():
+    """The rich console messages are printed to, created on first use."""
+    global _console
+    if _console is None:
+        from rich.console import Console  # slow to import, only needed for printing
+        _console = Console()
+    return _console
+
 
 class MessageOutput:
     def __init__(self, msg_type: Literal["function", "function_output", "text", "response_text", "system"], sender_name: str, receiver_name: str, content):
@@ -33,7 +42,7 @@ class MessageOutput:
         return colors[color_index]
 
     def cprint(self):
-        console.rule()
+        get_console().rule()
 
         emoji = self.get_sender_emoji()
 
@@ -41,9 +50,9 @@ class MessageOutput:
 
         color = self.hash_names_to_color()
 
-        console.print(header, style=color)
+        get_console().print(header, style=color)
 
-        console.print(str(self.content), style=color)
+        get_console().print(str(self.content), style=color)
 
     def get_formatted_header(self):
         if self.msg_type == "function":
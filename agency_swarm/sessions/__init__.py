@@ -1 +1,3 @@
-from .session import Session
\ No newline at end of file
+from .session import Session, TurnDeadlineExceeded, turn_deadline
+from .session_pool import SessionPool
+from .ledger import SessionLedger
@@ -0,0 +1,167 @@
+from typing import List, Optional
+
+from instructor import OpenAISchema
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+
+from agency_swarm.threads import Thread
+from agency_swarm.threads import TaskDescription
+from agency_swarm.util.rate_limiter import request_priority, RequestPriority
+from agency_swarm.util.log_config import get_logger
+logger = get_logger()
+
+_DESCRIPTION_INSTRUCTION = """You are an expert on understanding and analyzing complex task sessions and you are responsible for maintaining the description of each task session based on its history.
+You will receive the current descriptions of one or more sessions together with their recent history, labeled with ####. For every session with recent history:
+1. if its description is empty, generate a description that strictly adheres to the requirements of each field.
+2. otherwise, update the "existing_results" and "unknown_results" fields according to the recent history:
+    - Add the latest (intermediate) results of the recent messages that are not included in "existing_results" yet, and remove the corresponding elements (if any) from "unknown_results".
+    - Add the pending results of the recent messages that are not included in "unknown_results" yet.
+Your descriptions are required to be clear and unambiguous."""
+
+_ROUTING_INSTRUCTION = """You are the expert responsible for understanding session scenarios. A session consists of several characters discussing a task, the process of performing it, and the intermediate results. You will receive a list of generalized descriptions of multiple sessions, each of which includes information such as: task context, content, goals, current status, existing results, unknown results. Finally, You will receive a new statement from one of the characters. Your task is to choose the session from the list of session descriptions that is most appropriate for that new statement to join, and give reasons why. If the new statement cannot join any existing session, choose -1."""
+
+
+class RoutingDecision(OpenAISchema):
+    """Chooses the session a new statement should join."""
+
+    session_id: int = Field(
+        ..., description="Id of the session the new statement should join, or -1 if it cannot join any existing session."
+    )
+    reason: str = Field(
+        ..., description="Why the new statement should join this session and not another one."
+    )
+
+    @field_validator("session_id")
+    @classmethod
+    def _known_session(cls, value, info: ValidationInfo):
+        sessions = (info.context or {}).get("sessions")
+        if sessions is not None and value != -1 and not 0 < value <= sessions:
+            raise ValueError(f"session_id must be -1 or between 1 and {sessions}.")
+        return value
+
+
+class SessionDescription(BaseModel):
+    session_id: int = Field(..., description="Id of the session the description belongs to.")
+    description: TaskDescription
+
+
+class DescriptionUpdate(OpenAISchema):
+    """Updates the descriptions of the sessions with recent history."""
+
+    descriptions: List[SessionDescription] = Field(
+        ..., description="The new description of every session with recent history."
+    )
+
+
+class LedgerUpdate(OpenAISchema):
+    """Updates the descriptions of the sessions with recent history and chooses the session a new statement should join."""
+
+    descriptions: List[SessionDescription] = Field(
+        default_factory=list, description="The new description of every session with recent history."
+    )
+    routing: RoutingDecision
+
+
+class SessionLedger:
+    """
+    Keeps the task descriptions of the recipient threads up to date and routes new statements to them.
+
+    The exchange of a turn is recorded on its thread (Thread.add_history) instead of being summarized right away.
+    The next routing call then updates the descriptions of all threads with recorded history and chooses the thread
+    of the new statement in a single structured call. A thread that piles up `max_pending` exchanges is summarized
+    on its own. Responses are function calls validated with pydantic; an invalid response is retried `max_retries`
+    times with the validation error, then routing falls back to a new thread and the history stays pending.
+    """
+
+    def __init__(self, client, routing_model: str = "gpt-3.5-turbo-16k",
+                 description_model: str = "gpt-4-1106-preview", max_pending: int = 3, max_retries: int = 1):
+        self.client = client
+        self.routing_model = routing_model
+        self.description_model = description_model
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+
+    def record(self, thread: Thread, history: str):
+        thread.add_history(history)
+        if len(thread.pending_history) >= self.max_pending:
+            self.describe([thread])
+
+    def describe(self, threads: List[Thread]):
+        """Summarizes the pending history of the given threads into their descriptions."""
+        pending = self._take_pending(threads)
+        if not pending:
+            return
+        messages = [
+            {"role": "system", "content": _DESCRIPTION_INSTRUCTION},
+            {"role": "user", "content": self._render_sessions(threads, pending)},
+        ]
+        with request_priority(RequestPriority.Background):
+            update = self._call(DescriptionUpdate, self.description_model, messages, {"sessions": len(threads)})
+        self._apply(threads, pending, update.descriptions if update else None)
+
+    def route(self, threads: List[Thread], statement: str) -> Optional[Thread]:
+        """
+        Returns the thread the statement should join, or None if it should start a new thread. Pending history of
+        the threads is summarized in the same call.
+        """
+        pending = self._take_pending(threads)
+        instruction = _ROUTING_INSTRUCTION
+        if pending:
+            instruction = _DESCRIPTION_INSTRUCTION + "\n\n" + instruction + \
+                          " Choose the session based on the updated descriptions."
+        messages = [
+            {"role": "system", "content": instruction},
+            {"role": "user", "content": self._render_sessions(threads, pending)},
+            {"role": "user", "content": f"### new statement\n{statement}"},
+        ]
+        model = self.description_model if pending else self.routing_model
+        with request_priority(RequestPriority.Interactive):
+            update = self._call(LedgerUpdate, model, messages, {"sessions": len(threads)})
+
+        self._apply(threads, pending, update.descriptions if update else None)
+        if update is None:
+            return None
+        logger.info(f"Routed to session {update.routing.session_id}: {update.routing.reason}", extra={"verbose": True})
+        session_id = update.routing.session_id
+        return threads[session_id - 1] if session_id != -1 else None
+
+    def _call(self, schema, model: str, messages: list, context: dict):
+        messages = list(messages)
+        for attempt in range(self.max_retries + 1):
+            completion = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                functions=[schema.openai_schema],
+                function_call={"name": schema.openai_schema["name"]},
+            )
+            try:
+                return schema.from_response(completion, validation_context=context)
+            except Exception as e:
+                logger.info(f"Invalid {schema.__name__} (attempt {attempt + 1}): {str(e)}")
+                call = completion.choices[0].message.function_call
+                messages += [
+                    {"role": "assistant", "content": None,
+                     "function_call": {"name": schema.openai_schema["name"],
+                                       "arguments": call.arguments if call else ""}},
+                    {"role": "user", "content": f"Recall the function correctly, fix the errors:\n{str(e)}"},
+                ]
+        return None
+
+    def _take_pending(self, threads: List[Thread]):
+        return {index: history for index, thread in enumerate(threads, start=1)
+                if (history := thread.take_history())}
+
+    def _render_sessions(self, threads: List[Thread], pending: dict) -> str:
+        text = ""
+        for index, thread in enumerate(threads, start=1):
+            text += f"#### Description of Session {index}:\n{thread.task_description}\n\n"
+            if index in pending:
+                text += f"#### Recent History of Session {index}:\n" + "\n".join(pending[index]) + "\n\n"
+        return text
+
+    def _apply(self, threads: List[Thread], pending: dict, descriptions: Optional[List[SessionDescription]]):
+        updated = {item.session_id: item.description for item in descriptions or []}
+        for index, history in pending.items():
+            if index in updated:
+                threads[index - 1].task_description = updated[index]
+            else:
+                threads[index - 1].restore_history(history)
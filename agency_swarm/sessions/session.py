@@ -1,23 +1,55 @@
+import asyncio
 import inspect
+import json
+import threading
 import time
+import uuid
+from contextlib import contextmanager
 from typing import Literal
-import json
 
 from agency_swarm.threads import Thread
-from agency_swarm.threads import ThreadStatus
 from agency_swarm.threads import ThreadProperty
 
 from agency_swarm.agents import Agent
 from agency_swarm.messages import MessageOutput
 from agency_swarm.user import User
+from .ledger import SessionLedger
 from agency_swarm.util.oai import get_openai_client
-from agency_swarm.util.log_config import setup_logging 
-logger = setup_logging()
+from agency_swarm.util.rate_limiter import request_priority, request_model, RequestPriority
+from agency_swarm.util.usage import usage_context
+from agency_swarm.util.http_pool import run_coroutine
+from agency_swarm.tools.ResponsePolicy import compact_json
+from agency_swarm.util.log_config import get_logger
+logger = get_logger()
+
+_local = threading.local()
+
+
+class TurnDeadlineExceeded(TimeoutError):
+    """Raised by a turn that runs past the deadline set with turn_deadline()."""
+
+
+@contextmanager
+def turn_deadline(deadline: float):
+    """
+    Sets a deadline (a time.monotonic() value) for the turns run by this thread inside the block, including the turns
+    of the agents they message. A turn that passes it, also while it polls a run that stays queued or in progress,
+    cancels its active run and raises TurnDeadlineExceeded.
+    """
+    previous = getattr(_local, "deadline", None)
+    _local.deadline = deadline if previous is None else min(previous, deadline)
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
 
 class Session:
     """
     对于一个<sender, recipient> agent pair来说，1个sender.thread只能属于一个Session。可以有多个sender.thread属于不同的session
     """
+    # seconds between two polls of a run, lowered by load tests against agency_swarm.util.fake_openai
+    poll_interval = 5
     
     def __init__(self, caller_agent: Literal[Agent, User], recipient_agent: Agent, caller_thread:Thread=None):
         self.caller_agent = caller_agent
@@ -26,9 +58,12 @@ class Session:
         self.caller_thread = caller_thread
         if isinstance(self.caller_agent, Agent) and self.caller_thread is None:
             raise Exception("Error: initialize Session with Agent as caller must specifiy the parameter caller_thread.")
+        # user_id that scopes the recipient threads visible to this session
+        self.owner = self.caller_agent.user_id if isinstance(self.caller_agent, User) else self.caller_thread.owner
         self.cached_recipient_threads = []
         self.description = {}
         self.allowed_fails = 5
+        self.ledger = SessionLedger(self.client)
             
     def get_completion(self, 
                        message:str, 
@@ -36,12 +71,17 @@ class Session:
                        is_persist: bool=True,
                        yield_messages=True):
 
+        lease_id = uuid.uuid4().hex
         recipient_thread = self._retrieve_thread_of_topic(message) # try to lock the recipient_thread
-        if not recipient_thread or recipient_thread.status is not ThreadStatus.Ready:
-            recipient_thread = Thread(copy_from=recipient_thread)
-            logger.info(f'New THREAD:')
+        if not recipient_thread or not recipient_thread.acquire(lease_id):
+            # a busy thread is forked with its transcript (Copy on Write), so the branch does not start cold.
+            # The OpenAI thread is deferred and created together with the first run (see _run_message).
+            recipient_thread = Thread(copy_from=recipient_thread, deferred=True)
+            recipient_thread.owner = self.owner
+            recipient_thread.acquire(lease_id)
+            logger.info('New THREAD' if recipient_thread.forked_from is None else
+                        f'Forked THREAD [{recipient_thread.forked_from.thread_id}]')
 
-        recipient_thread.status = ThreadStatus.Running
         recipient_thread.session_as_recipient = self
         recipient_thread.properties = ThreadProperty.OneOff if not is_persist else recipient_thread.properties
         if isinstance(self.caller_agent, User):
@@ -49,80 +89,150 @@ class Session:
         else:
             recipient_thread.in_message_chain = self.caller_thread.in_message_chain
 
-        # 向recipient thread发送消息并获取回复
-        gen = self._get_completion_from_thread(recipient_thread, message, message_files, yield_messages)
         try:
-            while True:
-                msg = next(gen)
-                #msg.cprint()
-                yield msg
-        except StopIteration as e:
-            response = e.value
-        except Exception as e: # 当会话超时，不能释放Thread对象
-            logger.info(f"Exception{inspect.currentframe().f_code.co_name}：{str(e)}")
-            raise e
-            # # TODO:check是否recipient thread有更新消息
-        
-        # 成功得到recipient回复后，根据recipient thread属性决定如何做后处理
-        if recipient_thread.properties is ThreadProperty.OneOff:
-            recipient_thread = None # 直接释放recipient thread
-            return response
-        else: 
-            # 保存recipient thread
-            # if recipient_thread not in self.cached_recipient_threads:
-            #     self.cached_recipient_threads.append(recipient_thread)
+            # 向recipient thread发送消息并获取回复。pending merges are posted with the message (see _run_message)
+            gen = self._get_completion_from_thread(recipient_thread, message, message_files, yield_messages, lease_id)
+            try:
+                while True:
+                    msg = next(gen)
+                    #msg.cprint()
+                    yield msg
+            except StopIteration as e:
+                response = e.value
+            except BaseException as e: # 会话超时或调用方放弃生成器时，取消远端RUN，避免Thread被长期占用
+                logger.info(f"Exception{inspect.currentframe().f_code.co_name}：{str(e)}")
+                self._cancel_active_run(recipient_thread)
+                raise e
+
+            # 成功得到recipient回复后，根据recipient thread属性决定如何做后处理
+            if recipient_thread.properties is ThreadProperty.OneOff:
+                return response
             new_history = f"# Message 1:\n {message}\n\n # Message 2:\n{response}\n"
-            self._update_task_description(recipient_thread, new_history)
-            self.recipient_agent.add_thread(recipient_thread) 
-        
-        if recipient_thread.properties is ThreadProperty.CoW:
-            # TODO: merge to original thread.
-            pass
+            if recipient_thread.properties is ThreadProperty.CoW:
+                # merge the branch back to the original thread instead of keeping it
+                self._merge_into_origin(recipient_thread, message, response, new_history)
+            else:
+                # 保存recipient thread
+                self._update_task_description(recipient_thread, new_history)
+                self.recipient_agent.add_thread(recipient_thread)
 
-        recipient_thread.in_message_chain = None
-        recipient_thread.status = ThreadStatus.Ready
-        recipient_thread.session_as_recipient = None
-        # Unlock the recipient_thread
-        return response
+            return response
+        finally:
+            # Unlock the recipient_thread, even if the turn failed
+            recipient_thread.in_message_chain = None
+            recipient_thread.session_as_recipient = None
+            if not recipient_thread.active_run_id:
+                self._flush_pending_merges(recipient_thread)
+            recipient_thread.release(lease_id)
 
-    def _get_completion_from_thread(self, recipient_thread: Thread, message: str, message_files=None, yield_messages=True):
+    def _merge_into_origin(self, fork: Thread, message: str, response: str, new_history: str):
+        """
+        Merges a Copy on Write branch back to the thread it was forked from: the exchange is queued on the original
+        thread and posted as soon as it is not running, its description is updated, and the remote fork is deleted.
+        The description is only written under the lease of the original thread; while a turn holds it, the exchange
+        is recorded as history instead and summarized by the next routing call.
+        """
+        origin = fork.forked_from
+        origin.add_pending_merge(f"[The following request was handled in a parallel branch of this session]\n"
+                                 f"# Request:\n{message}\n\n# Result:\n{response}")
 
-        # Determine the sender's name based on the agent type
-        sender_name = "user" if isinstance(self.caller_agent, User) else self.caller_agent.name
-        playground_url = f'https://platform.openai.com/playground?assistant={self.recipient_agent._assistant.id}&mode=assistant&thread={recipient_thread.thread_id}'
-        logger.info(f'THREAD:[ {sender_name} -> {self.recipient_agent.name} ]: URL {playground_url}')
+        lease_id = uuid.uuid4().hex
+        if origin.acquire(lease_id):
+            try:
+                self._update_task_description(origin, new_history)
+                self._flush_pending_merges(origin)
+            finally:
+                origin.release(lease_id)
+        else:
+            origin.add_history(new_history)
+
+        if not fork.is_created:
+            return
+        try:
+            with request_priority(RequestPriority.Background):
+                self.client.beta.threads.delete(fork.thread_id)
+        except Exception as e:
+            logger.info(f"Failed to delete forked thread [{fork.thread_id}]: {str(e)}")
+
+    def _flush_pending_merges(self, thread: Thread):
+        if not thread.is_created:
+            return
+        merges = thread.take_pending_merges()
+        if not merges:
+            return
+        try:
+            with request_priority(self._run_priority()):
+                self.client.beta.threads.messages.create(
+                    thread_id=thread.thread_id,
+                    role="user",
+                    content="\n\n".join(merges),
+                )
+        except Exception as e:
+            logger.info(f"Failed to merge branches into thread [{thread.thread_id}]: {str(e)}")
+            self._restore_pending_merges(thread, merges)
+
+    def _cancel_active_run(self, thread: Thread):
+        if not thread.active_run_id:
+            return
+        try:
+            self.client.beta.threads.runs.cancel(thread_id=thread.thread_id, run_id=thread.active_run_id)
+        except Exception as e:
+            logger.info(f"Failed to cancel run [{thread.active_run_id}] of thread [{thread.thread_id}]: {str(e)}")
+        thread.active_run_id = None
+
+    def _get_completion_from_thread(self, recipient_thread: Thread, message: str, message_files=None, yield_messages=True,
+                                    lease_id: str = None):
 
         if yield_messages:
             yield MessageOutput("text", self.caller_agent.name, self.recipient_agent.name, message)
             
+        # agents with many tools only give the runs of this turn the tools relevant to the message
+        recipient_thread.run_tools = self.recipient_agent.get_run_tools(message)
         run = self._run_message(recipient_thread, message, self.recipient_agent, message_files)
+
+        # Determine the sender's name based on the agent type
+        sender_name = "user" if isinstance(self.caller_agent, User) else self.caller_agent.name
+        playground_url = f'https://platform.openai.com/playground?assistant={self.recipient_agent._assistant.id}&mode=assistant&thread={recipient_thread.thread_id}'
+        logger.info(f'THREAD:[ {sender_name} -> {self.recipient_agent.name} ]: URL {playground_url}',
+                    extra=self._log_fields(recipient_thread, run, verbose=True))
         
         while True: # Check state of Assistant AI running in the State-Machine
             # wait until run completes
+            recipient_thread.active_run_id = run.id
             while run.status in ['queued', 'in_progress']:
-                time.sleep(5)
-                run = self.client.beta.threads.runs.retrieve(
-                    thread_id=recipient_thread.thread_id,
-                    run_id=run.id
-                )
-                logger.info(f"Run [{run.id}] Status: {run.status}")
+                time.sleep(self._poll_delay())
+                self._check_deadline(recipient_thread)
+                self._renew_lease(recipient_thread, lease_id)
+                with request_priority(RequestPriority.Polling), self._usage_scope(recipient_thread):
+                    run = self.client.beta.threads.runs.retrieve(
+                        thread_id=recipient_thread.thread_id,
+                        run_id=run.id
+                    )
+                logger.debug(f"Run [{run.id}] Status: {run.status}",
+                             extra=self._log_fields(recipient_thread, run, verbose=True))
 
             # function execution
             if run.status == "requires_action":
                 tool_calls = run.required_action.submit_tool_outputs.tool_calls
                 tool_outputs = []
                 tool_outputs_for_resubmit = []
+                # async tools (e.g. async OpenAPI tools) of this step run concurrently, before the others
+                async_outputs = self._execute_async_tools(tool_calls, caller_thread=recipient_thread)
                 for tool_call in tool_calls:
                     if yield_messages:
                         yield MessageOutput("function", self.recipient_agent.name, self.caller_agent.name,
                                             str(tool_call.function))
                     
                     # TODO:这里如果是SendMessage函数，后续会采用创建新Python线程来执行，需要修改处理逻辑。
-                    output = self._execute_tool(tool_call, caller_thread=recipient_thread)
+                    if tool_call.id in async_outputs:
+                        output = async_outputs[tool_call.id]
+                    else:
+                        output = self._execute_tool(tool_call, caller_thread=recipient_thread)
                     if inspect.isgenerator(output):
                         try:
                             while True:
                                 item = next(output) # 可能会抛出超时异常(Error Code: 400)
+                                self._renew_lease(recipient_thread, lease_id)
                                 if isinstance(item, MessageOutput) and yield_messages:
                                     yield item
                         except StopIteration as e:
@@ -136,15 +246,17 @@ class Session:
                             yield MessageOutput("function_output", tool_call.function.name, self.recipient_agent.name,
                                                 output)
 
-                    tool_outputs.append({"tool_call_id": tool_call.id, "output": str(output)})
-                    tool_outputs_for_resubmit.append({"tools_calls": tool_call.model_dump_json(), "output":str(output)})
+                    output = self._output_text(output)
+                    tool_outputs.append({"tool_call_id": tool_call.id, "output": output})
+                    tool_outputs_for_resubmit.append({"tools_calls": tool_call.model_dump_json(), "output": output})
                 # submit tool outputs
                 try:
-                    run = self.client.beta.threads.runs.submit_tool_outputs(
-                        thread_id=recipient_thread.thread_id,
-                        run_id=run.id,
-                        tool_outputs=tool_outputs
-                    )
+                    with self._usage_scope(recipient_thread):
+                        run = self.client.beta.threads.runs.submit_tool_outputs(
+                            thread_id=recipient_thread.thread_id,
+                            run_id=run.id,
+                            tool_outputs=tool_outputs
+                        )
                 except Exception as e:
                     # ☑️[DONE]: 需要考虑提交tool结果是否会失败。例如因为tool执行时间过长，run被自动关闭。这时候需要重新执行run并提交上次结果。
                     # 由于调用自定义Funtion超时，导致RUN进入expired状态后无法提交Funtion执行结果。但由于目前AssistantAPI不支持编辑RUN’step，这就无法做到断点续传。因此一个妥协的办法是将函数的执行结果包装成提示词消息追加到Thread中，然后再re-RUN。
@@ -171,7 +283,7 @@ class Session:
             elif run.status == "failed":
                 logger.info("Run Failed. Error: ", run.last_error)
                 if self.allowed_fails > 0:
-                    time.sleep(5)
+                    time.sleep(self.poll_interval)
                     logger.info(f"Retry run the thread:[{recipient_thread.thread_id}] on assistant:[{self.recipient_agent.id}] ... ")
                     run = self._run(recipient_thread, self.recipient_agent) # try again.
                     self.allowed_fails -= 1
@@ -180,7 +292,7 @@ class Session:
             elif run.status == "expired":
                 logger.info("Run expired. Error: ", run.last_error)
                 if self.allowed_fails > 0:
-                    time.sleep(5)
+                    time.sleep(self.poll_interval)
                     logger.info(f"Retry run the thread:[{recipient_thread.thread_id}] on assistant:[{self.recipient_agent.id}] ... ")
                     run = self._run(recipient_thread, self.recipient_agent) # try again.
                     self.allowed_fails -= 1
@@ -192,131 +304,145 @@ class Session:
                     thread_id=recipient_thread.thread_id
                 )
                 message = messages.data[0].content[0].text.value
+                recipient_thread.active_run_id = None
 
                 if yield_messages:
                     yield MessageOutput("response_text", self.recipient_agent.name, self.caller_agent.name, message)
 
                 return message
 
+    def _poll_delay(self) -> float:
+        deadline = getattr(_local, "deadline", None)
+        if deadline is None:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, deadline - time.monotonic()))
+
+    @staticmethod
+    def _check_deadline(thread: Thread):
+        # the run is cancelled by get_completion when the exception passes through it
+        deadline = getattr(_local, "deadline", None)
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TurnDeadlineExceeded(f"Deadline passed while run [{thread.active_run_id}] was still running.")
+
+    def _renew_lease(self, thread: Thread, lease_id: str):
+        if lease_id and not thread.heartbeat(lease_id):
+            logger.info(f"Lease of thread [{thread.thread_id}] was reclaimed while the turn was still running.")
+
     def _run_message(self, thread:Thread, message:str, agent:Agent, message_files=None):
-        # create message
-        self.client.beta.threads.messages.create(
-            thread_id=thread.thread_id,
-            role="user",
-            content=message,
-            file_ids=message_files if message_files else [],
-        )
-        # create run
-        run = self.client.beta.threads.runs.create(
-            thread_id=thread.thread_id,
-            assistant_id=agent.id,
-        )
+        # results of merged branches are posted with the message instead of in a request of their own
+        merges = thread.take_pending_merges()
+        content = "\n\n".join(merges + [message])
+        with request_priority(self._run_priority()), self._usage_scope(thread):
+            if not thread.is_created:
+                # a new thread is created, given the message and run in a single request
+                try:
+                    return thread.create_and_run(agent.id, content, message_files, tools=thread.run_tools)
+                except Exception:
+                    self._restore_pending_merges(thread, merges)
+                    raise
+            # create message
+            try:
+                self.client.beta.threads.messages.create(
+                    thread_id=thread.thread_id,
+                    role="user",
+                    content=content,
+                    file_ids=message_files if message_files else [],
+                )
+            except Exception:
+                self._restore_pending_merges(thread, merges)
+                raise
+            # create run
+            run = self.client.beta.threads.runs.create(
+                thread_id=thread.thread_id,
+                assistant_id=agent.id,
+                **self._run_options(thread),
+            )
         return run
+
+    def _restore_pending_merges(self, thread: Thread, merges):
+        for merge in merges:
+            thread.add_pending_merge(merge)
     
     def _run(self, thread:Thread, agent:Agent):
-        run = self.client.beta.threads.runs.create(
-            thread_id=thread.thread_id,
-            assistant_id=agent.id,
-        )
+        with request_priority(self._run_priority()), self._usage_scope(thread):
+            run = self.client.beta.threads.runs.create(
+                thread_id=thread.thread_id,
+                assistant_id=agent.id,
+                **self._run_options(thread),
+            )
         return run
+
+    @staticmethod
+    def _run_options(thread: Thread) -> dict:
+        return {"tools": thread.run_tools} if thread.run_tools is not None else {}
+
+    @contextmanager
+    def _usage_scope(self, thread: Thread = None):
+        # token usage of the calls made in this scope is charged to the recipient agent, the thread and the user,
+        # and calls without a model argument (runs, polling, tool outputs) count against the assistant's rate limits
+        chain = thread.in_message_chain if thread is not None else None
+        if chain is None:
+            chain = self.caller_agent.uuid if isinstance(self.caller_agent, User) else self.caller_thread.in_message_chain
+        with usage_context(agent=self.recipient_agent.name,
+                           thread=thread.thread_id if thread is not None else None,
+                           user=self.owner,
+                           chain=str(chain) if chain is not None else None), \
+                request_model(self.recipient_agent.model):
+            yield
+
+    def _log_fields(self, thread: Thread = None, run=None, verbose: bool = False) -> dict:
+        # structured fields of the JSON-lines log, see util.log_config
+        return {"agent": self.recipient_agent.name, "user_id": self.owner,
+                "thread_id": thread.thread_id if thread is not None else None,
+                "run_id": run.id if run is not None else None, "verbose": verbose}
+
+    def _run_priority(self):
+        # runs started directly by the user are served before inter-agent runs
+        return RequestPriority.UserFacing if isinstance(self.caller_agent, User) else RequestPriority.Interactive
     
     def _retrieve_thread_of_topic(self, message:str) -> Thread:
-        classifier_instruction = """
-        You are the expert responsible for understanding session scenarios. A session consists of several characters discussing a task, the process of performing it, and the intermediate results. You will receive a list of generalized descriptions of multiple sessions, each of which includes information such as: task context, content, goals, current status, existing results, unknown results. Finally, You will receive a new statement from one of the characters. Your task is to choose the session from the list of session descriptions that is most appropriate for that new statement to join, and give reasons why.
-        Output the results in the following json format.
-        {
-            "session_id": ...,
-            "reason": "..."
-        }
-        In this json, give the session id (integer) and reason (string) why the new statement should be joined and the reason for not joining another session. If you think that the new statement cannot join to any existing session, "session_id" will be set to -1. 
-        Must not include any characters other than json in the output.
-        """    
-
-        sessions_decription = ""
-        for index, thread in enumerate(self.recipient_agent.threads, start=1):
-            sessions_decription += f"### Description of Session {index}:\n{thread.task_description}\n\n"
-            
-        if not sessions_decription:
+        threads = self.recipient_agent.get_threads(self.owner)
+        if not threads:
             return None
-        
-        # sessions_decription += f"### new statement\n{self.recipient_agent.name}:{message}"
-        
-        completion = self.client.chat.completions.create(
-            model="gpt-3.5-turbo-16k",
-            messages=[
-                {"role": "system", "content": classifier_instruction},
-                {"role": "user", "content": sessions_decription},
-                {"role": "user", "content": f"### new statement\n{self.recipient_agent.name}:{message}"},
-            ]
-        )
-        response = completion.choices[0].message.content
-        
+
+        # the same (or nearly the same) message against an unchanged set of threads is routed from the cache
+        routing_cache = self.recipient_agent.routing_cache
+        threads_version = self.recipient_agent.get_threads_version(self.owner)
+        hit, thread_id = routing_cache.lookup(self.owner, threads_version, message)
+        if hit:
+            logger.info(f"Routing cache hit for {self.recipient_agent.name}: thread [{thread_id}]")
+            return next((thread for thread in threads if thread.thread_id == thread_id), None)
+
         # Logging
         if isinstance(self.caller_agent, User):
             caller_name = "User"
         else:
             caller_name = self.caller_agent.name
-        log_header = f"retrieve one from {len(self.recipient_agent.threads)} sessions that {caller_name} → {self.recipient_agent.name}...\n"
-        logger.info(log_header + response)
-        
-        #
-        thread_json = json.loads(response)
-        session_id = thread_json["session_id"]
-        if session_id <= 0:
-            return None
-        else:
-            return self.recipient_agent.threads[session_id - 1]
+        logger.info(f"retrieve one from {len(threads)} sessions that {caller_name} → {self.recipient_agent.name}...")
+
+        # routing also summarizes the pending history of the threads, which changes their version
+        with self._usage_scope():
+            thread = self.ledger.route(threads, f"{self.recipient_agent.name}:{message}")
+        threads_version = self.recipient_agent.get_threads_version(self.owner)
+        routing_cache.store(self.owner, threads_version, message, thread.thread_id if thread else None)
+        return thread
                 
     def _update_task_description(self, thread:Thread, new_history:str):
-        # Generate the description of this session at this state. 
-        # instruction大意：requires clarity and conciseness.
-        # 如果description为空，则根据json中每个字段的描述生成decription。如果非空，则根据新历史来更新description。
-        # 更新方法如下：
-        # 只需要修改"existing results"和"unknown results"。 
-        # 分析最近产生的会话消息中是否存在"existing results"字段中未收录的最新的结果，如果有，则加入填入字段。同时，删除"unknown results"字段中对应的元素（如果有）。
-        # 分析最近产生的会话消息中是否存在"unknown results"字段中未收录的待获取的结果，如果有，则填土该字段。   
-        
-        instruction = """You are an expert on understanding and analyzing complex task session and you are responsible for generating a description of the task based on its session history. The description of the task session must be output in the following json format, which gives the fields required to be output and the detailed requirements for each field.
-        
-        {
-            "backgroud": "Extract the context of the task from the first message of session history and briefly summarize it in one sentence", 
-            "task_content": "Define clear and specific criteria based solely on the first message that indicate the task content is complete, focusing on the direct deliverables or outcomes requested.", 
-            "completion conditions": "Define clear and specific criteria based solely on the first message that indicate the task content is complete, focusing on the direct deliverables or outcomes requested.", 
-            "existing results": "Extract and *qualitatively summarize the (intermediate) results that have been produced by this task from the session history, and output them as a bulleted list.", 
-            "unknown results": "Based on the principle of the 'completion conditions' field, the (intermediate) results required by the task but not yet obtained are extracted from the session history and output as a bulleted list",
-            "status": "Analyze from the session history and the results what is the task status according to the completion condition, e.g., completed, uncompleted, unable to complete, uncertained etc."
-        }
-        
-        You will receive a task's recent session history and an existing description of the task's session, labeled with ####, respectively. Follow the steps below to output a new session description:
-        1. if description is empty, generate a description that strictly adheres to the requirements of each field in the json.
-        2. otherwise, update the "existing results" and "unknown results" fields in the description according to the new session history. The update method is:
-            - Analyze the most recent generated session messages for the presence of the latest (intermediate) results that are not included in the "existing results" field, and if so, populate the field. At the same time, delete the corresponding element (if any) in the "unknown results" field.
-            - Analyze the most recently generated session messages for any pending results that are not included in the "unknown results" field, and if so, populate the field.
-
-        Note that your description is required to be clear and unambiguous, and your final output cannot contain any characters other than the description in json format.
-        """
-        
-        message = f"### Description of Task Session:\n{thread.task_description}"
-        message += f"\n ### Recent Task Session History:\n{new_history}"
-
-        
-        completion = self.client.chat.completions.create(
-            model="gpt-4-1106-preview",
-            messages=[
-                {"role": "system", "content": instruction},
-                {"role": "user", "content": message},
-            ]
-        )
-        task_description = completion.choices[0].message.content
-        
+        # The history is summarized into the description by the next routing call, see SessionLedger.
         if isinstance(self.caller_agent, User):
-            log_header = f"Updated the task description of the session that User → {self.recipient_agent.name}:[{thread.thread_id}]...\n"
+            log_header = f"Recorded the history of the session that User → {self.recipient_agent.name}:[{thread.thread_id}]"
         else:
-            log_header = f"Updated the task description of the session that {self.caller_agent.name}:[{self.caller_thread.thread_id}] → {self.recipient_agent.name}:[{thread.thread_id}]...\n"
+            log_header = f"Recorded the history of the session that {self.caller_agent.name}:[{self.caller_thread.thread_id}] → {self.recipient_agent.name}:[{thread.thread_id}]"
+        logger.info(log_header, extra=self._log_fields(thread))
+        with self._usage_scope(thread):
+            self.ledger.record(thread, new_history)
 
-        logger.info(log_header + task_description)
-        thread.task_description = task_description
-        return task_description
+    @staticmethod
+    def _output_text(output) -> str:
+        # dicts and lists go to the model as compact JSON, not as their (longer, non-JSON) repr
+        if isinstance(output, (dict, list)):
+            return compact_json(output)
+        return str(output)
 
     def _execute_tool(self, tool_call, caller_thread:Thread):
         funcs = self.recipient_agent.functions
@@ -327,17 +453,70 @@ class Session:
 
         try:
             # init tool
-            func = func(**eval(tool_call.function.arguments))
+            func = func(**self._tool_arguments(tool_call))
             func.caller_agent = self.recipient_agent
-            # get outputs from the tool
-            output = func.run(caller_thread)
+            # get outputs from the tool, charging its model calls (e.g. vision) to this agent and thread
+            with self._usage_scope(caller_thread):
+                output = func.run(caller_thread)
+                if inspect.iscoroutine(output):
+                    output = run_coroutine(output)
 
             return output
         except Exception as e:
-            error_message = f"Error: {e}"
-            if "For further information visit" in error_message:
-                error_message = error_message.split("For further information visit")[0]
-            return error_message
+            return self._tool_error_message(e)
+
+    def _execute_async_tools(self, tool_calls, caller_thread: Thread) -> dict:
+        """
+        Runs the tool calls whose tool has an async run method concurrently on the background event loop.
+        Returns {tool_call.id: output}.
+        """
+        funcs = {func.__name__: func for func in self.recipient_agent.functions}
+        coroutines = {}
+        for tool_call in tool_calls:
+            func = funcs.get(tool_call.function.name)
+            if func is None or not inspect.iscoroutinefunction(func.run):
+                continue
+            try:
+                tool = func(**self._tool_arguments(tool_call))
+                tool.caller_agent = self.recipient_agent
+                coroutines[tool_call.id] = tool.run(caller_thread)
+            except Exception as e:
+                coroutines[tool_call.id] = self._tool_error_message(e)
+        if not coroutines:
+            return {}
+
+        pending = {call_id: coro for call_id, coro in coroutines.items() if inspect.iscoroutine(coro)}
+
+        async def gather():
+            return await asyncio.gather(*pending.values(), return_exceptions=True)
+
+        with self._usage_scope(caller_thread):
+            results = run_coroutine(gather()) if pending else []
+        outputs = dict(coroutines)
+        for call_id, result in zip(pending, results):
+            outputs[call_id] = self._tool_error_message(result) if isinstance(result, Exception) else result
+        return outputs
+
+    @staticmethod
+    def _tool_arguments(tool_call) -> dict:
+        # the model sends JSON arguments. A parse failure is raised as ValueError and becomes the tool output.
+        arguments = tool_call.function.arguments
+        if not arguments or not arguments.strip():
+            return {}
+        try:
+            value = json.loads(arguments)
+        except (ValueError, RecursionError) as e:
+            raise ValueError(f"Invalid JSON arguments for {tool_call.function.name}: {e}") from e
+        if not isinstance(value, dict):
+            raise ValueError(f"Arguments of {tool_call.function.name} must be a JSON object.")
+        return value
+
+    @staticmethod
+    def _tool_error_message(e: Exception) -> str:
+        error_message = f"Error: {e}"
+        if "For further information visit" in error_message:
+            error_message = error_message.split("For further information visit")[0]
+        return error_message
 
     def _wapper_expired_tool_output(self, output:str) -> str:
         """
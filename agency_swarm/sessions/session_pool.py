@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+from agency_swarm.agents import Agent
+from agency_swarm.user import User
+from .session import Session
+
+
+class PooledSession:
+    def __init__(self, user: User, session: Session):
+        self.user = user
+        self.session = session
+        self.lock = threading.Lock()  # one turn at a time per user
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+class SessionPool:
+    """
+    Multiplexes entrance sessions between many users of one agency.
+
+    Every user_id gets its own User and Session, and the threads created on behalf of that user are scoped to
+    them (see Thread.owner), so users never share threads or routing state. Turns of different users run concurrently;
+    turns of the same user are serialized. Sessions idle for longer than `idle_timeout` seconds, or the least recently
+    used ones beyond `max_sessions`, are evicted together with all threads they own.
+    """
+
+    def __init__(self, recipient_agent: Agent, agents: List[Agent], max_sessions: int = 1000,
+                 idle_timeout: float = 3600):
+        self.recipient_agent = recipient_agent
+        self.agents = agents
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()  # user_id -> PooledSession, least recently used first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def __contains__(self, user_id):
+        with self._lock:
+            return user_id in self._sessions
+
+    def get_completion(self, user_id: str, message: str, message_files=None, yield_messages=True):
+        """
+        Runs one turn of the user's conversation. Returns a generator, like Session.get_completion, whose return value
+        is the final response.
+        """
+        entry = self._checkout(user_id)
+        try:
+            with entry.lock:
+                return (yield from entry.session.get_completion(message=message,
+                                                                message_files=message_files,
+                                                                is_persist=True,
+                                                                yield_messages=yield_messages))
+        finally:
+            self._checkin(entry)
+
+    def evict_idle(self):
+        """Evicts sessions that have been idle for longer than idle_timeout. Returns the evicted user ids."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [user_id for user_id, entry in self._sessions.items()
+                       if entry.in_use == 0 and now - entry.last_used > self.idle_timeout]
+            for user_id in expired:
+                self._evict(user_id)
+        return expired
+
+    def remove(self, user_id: str):
+        """Drops a user's session and threads, e.g. when the user logs out."""
+        with self._lock:
+            if user_id in self._sessions:
+                self._evict(user_id)
+
+    def _checkout(self, user_id):
+        with self._lock:
+            entry = self._sessions.get(user_id)
+            if entry is None:
+                user = User(user_id=user_id)
+                entry = PooledSession(user, Session(user, self.recipient_agent))
+                self._sessions[user_id] = entry
+            self._sessions.move_to_end(user_id)
+            entry.in_use += 1
+            entry.last_used = time.monotonic()
+            self._enforce_limits()
+        return entry
+
+    def _checkin(self, entry):
+        with self._lock:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+
+    def _enforce_limits(self):
+        now = time.monotonic()
+        for user_id, entry in list(self._sessions.items()):
+            if entry.in_use:
+                continue
+            if len(self._sessions) > self.max_sessions or now - entry.last_used > self.idle_timeout:
+                self._evict(user_id)
+
+    def _evict(self, user_id):
+        entry = self._sessions.pop(user_id)
+        for agent in self.agents:
+            agent.remove_threads(entry.user.user_id)
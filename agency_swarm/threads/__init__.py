@@ -1,3 +1,5 @@
 from .thread import Thread
 from .thread import ThreadStatus
-from .thread import ThreadProperty
\ No newline at end of file
+from .thread import ThreadProperty
+from .watchdog import ThreadWatchdog
+from .description import TaskDescription
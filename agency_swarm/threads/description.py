@@ -0,0 +1,78 @@
+import json
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+# keys used by the free-form JSON descriptions of earlier versions
+_LEGACY_KEYS = {
+    "backgroud": "background",
+    "completion conditions": "completion_conditions",
+    "existing results": "existing_results",
+    "unknown results": "unknown_results",
+}
+
+
+class TaskDescription(BaseModel):
+    """Generalized description of a task session: its context, goals, status and (intermediate) results."""
+
+    background: str = Field(
+        "", description="The context of the task, extracted from the first message of the session history and "
+                        "summarized in one sentence."
+    )
+    task_content: str = Field(
+        "", description="The content of the task, i.e. the direct deliverables or outcomes requested."
+    )
+    completion_conditions: str = Field(
+        "", description="Clear and specific criteria, based solely on the first message, that indicate the task is "
+                        "complete."
+    )
+    existing_results: List[str] = Field(
+        default_factory=list, description="Qualitative summary of the (intermediate) results produced so far."
+    )
+    unknown_results: List[str] = Field(
+        default_factory=list, description="The (intermediate) results required by the completion conditions but not "
+                                          "obtained yet."
+    )
+    status: str = Field(
+        "uncompleted", description="Status of the task according to the completion conditions, e.g. completed, "
+                                   "uncompleted, unable to complete, uncertain."
+    )
+
+    @field_validator("existing_results", "unknown_results", mode="before")
+    @classmethod
+    def _as_list(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [line.lstrip("-*• ").strip() for line in value.splitlines() if line.strip()]
+        return value
+
+    @property
+    def is_completed(self) -> bool:
+        return self.status.strip().lower().startswith("completed")
+
+    def render(self) -> str:
+        return json.dumps(self.model_dump(), ensure_ascii=False, indent=2)
+
+    @classmethod
+    def parse(cls, text: str) -> Optional["TaskDescription"]:
+        """
+        Parses a description stored as text, including the free-form JSON of earlier versions. Returns None if the
+        text does not contain a description.
+        """
+        if not text:
+            return None
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end < start:
+            return None
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        data = {_LEGACY_KEYS.get(key, key): value for key, value in data.items()}
+        try:
+            return cls.model_validate(data)
+        except ValidationError:
+            return None
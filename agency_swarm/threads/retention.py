@@ -0,0 +1,69 @@
+import json
+import time
+
+
+class ThreadRetentionPolicy:
+    """
+    Bounds the number of threads an agent keeps available for routing.
+
+    Parameters:
+    max_threads (int, optional): Maximum number of threads kept per owner (user). The least recently used threads are archived first. Defaults to 50.
+    max_idle_seconds (float, optional): Threads unused for longer than this are archived. Defaults to None (no limit).
+    archive_completed (bool, optional): Archive threads whose task description reports the task as completed. Defaults to True.
+    max_archived (int, optional): Maximum number of archived thread records kept for recovery by id. Defaults to 10000.
+
+    Archived threads are dropped from routing but remain recoverable with Agent.recover_thread(thread_id), since
+    their conversation is still stored remotely.
+    """
+
+    def __init__(self, max_threads: int = 50, max_idle_seconds: float = None, archive_completed: bool = True,
+                 max_archived: int = 10000):
+        self.max_threads = max_threads
+        self.max_idle_seconds = max_idle_seconds
+        self.archive_completed = archive_completed
+        self.max_archived = max_archived
+
+    def select_for_archival(self, threads, now: float = None):
+        """
+        Returns the threads to archive out of the given threads of one owner. Threads currently leased by a turn are
+        never selected.
+        """
+        now = time.monotonic() if now is None else now
+        idle = [thread for thread in threads if thread.lease_owner is None]
+        selected = []
+        for thread in idle:
+            if self.archive_completed and is_task_completed(thread):
+                selected.append(thread)
+            elif self.max_idle_seconds is not None and now - thread.last_used_at > self.max_idle_seconds:
+                selected.append(thread)
+
+        if self.max_threads is not None:
+            overflow = len(threads) - len(selected) - self.max_threads
+            if overflow > 0:
+                remaining = [thread for thread in idle if thread not in selected]
+                remaining.sort(key=lambda thread: thread.last_used_at)
+                selected += remaining[:overflow]
+        return selected
+
+
+class ArchivedThread:
+    """Lightweight record of an archived thread, enough to restore it later."""
+
+    def __init__(self, thread):
+        self.thread_id = thread.thread_id
+        self.owner = thread.owner
+        self.task_description = thread.task_description
+        self.pending_history = list(getattr(thread, "pending_history", []))
+        self.archived_at = time.time()
+
+
+def is_task_completed(thread) -> bool:
+    """Reads the status field of the thread's task description."""
+    if getattr(thread, "description", None) is not None:
+        return thread.description.is_completed
+    try:
+        description = json.loads(thread.task_description)
+    except (TypeError, ValueError):
+        return False
+    status = description.get("status", "") if isinstance(description, dict) else ""
+    return isinstance(status, str) and status.strip().lower().startswith("completed")
@@ -0,0 +1,163 @@
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List
+
+from agency_swarm.util.oai import get_openai_client
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+# embeddings of missed lookups kept for the store() that follows them
+_MAX_PENDING_EMBEDDINGS = 64
+
+
+def normalize_message(message: str) -> str:
+    """Lowercases the message and strips punctuation and repeated whitespace."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", message.lower())).strip()
+
+
+class RoutingCache:
+    """
+    Caches the routing decisions of Session._retrieve_thread_of_topic for one recipient agent.
+
+    Entries are keyed by scope (the owner of the threads) and a hash of the normalized message, and carry the version
+    of the thread set they were computed for (see Agent.get_threads_version). Any change to that version, i.e. a
+    thread added, archived or removed or a description updated, invalidates them.
+
+    Near-duplicate messages can also hit the cache:
+    similarity_threshold (float, optional): Minimum Jaccard similarity of the normalized words. Defaults to None (off).
+    embed (Callable[[str], List[float]], optional): Function returning an embedding of a message, e.g. openai_embedder(). Defaults to None (off).
+    embedding_threshold (float, optional): Minimum cosine similarity of the embeddings. Defaults to 0.95.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 600, similarity_threshold: float = None,
+                 embed: Callable[[str], List[float]] = None, embedding_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.embed = embed
+        self.embedding_threshold = embedding_threshold
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (scope, digest) -> entry, least recently used first
+        self._pending_embeddings = OrderedDict()  # digest -> embedding computed by a lookup that missed
+        self._lock = threading.Lock()
+
+    def lookup(self, scope, version, message: str):
+        """
+        Returns (True, thread_id) on a hit, where thread_id is None if the cached decision was to start a new
+        thread, or (False, None) on a miss.
+        """
+        normalized = normalize_message(message)
+        digest = _digest(normalized)
+        key = (scope, digest)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_valid(entry, version, now):
+                return self._hit(entry)
+
+        embedding = None
+        if self.similarity_threshold or self.embed:
+            embedding = self.embed(normalized) if self.embed else None
+            with self._lock:
+                entry = self._find_similar(scope, version, normalized, embedding, now)
+                if entry is not None:
+                    return self._hit(entry)
+
+        with self._lock:
+            self.misses += 1
+            if embedding is not None:
+                # a miss is followed by store(), which reuses the embedding instead of requesting it again
+                self._pending_embeddings[digest] = embedding
+                self._pending_embeddings.move_to_end(digest)
+                while len(self._pending_embeddings) > _MAX_PENDING_EMBEDDINGS:
+                    self._pending_embeddings.popitem(last=False)
+        return False, None
+
+    def _hit(self, entry):
+        if entry["key"] in self._entries:
+            self._entries.move_to_end(entry["key"])
+        self.hits += 1
+        return True, entry["thread_id"]
+
+    def store(self, scope, version, message: str, thread_id: str = None):
+        normalized = normalize_message(message)
+        digest = _digest(normalized)
+        key = (scope, digest)
+        embedding = None
+        if self.embed:
+            with self._lock:
+                embedding = self._pending_embeddings.pop(digest, None)
+            if embedding is None:
+                embedding = self.embed(normalized)
+        entry = {
+            "key": key,
+            "scope": scope,
+            "version": version,
+            "thread_id": thread_id,
+            "words": set(normalized.split()) if self.similarity_threshold else None,
+            "embedding": embedding,
+            "created_at": time.monotonic(),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, scope=None):
+        with self._lock:
+            if scope is None:
+                self._entries.clear()
+                self._pending_embeddings.clear()
+                return
+            for key in [key for key, entry in self._entries.items() if entry["scope"] == scope]:
+                del self._entries[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _is_valid(self, entry, version, now):
+        return entry["version"] == version and now - entry["created_at"] <= self.ttl
+
+    def _find_similar(self, scope, version, normalized, embedding, now):
+        words = set(normalized.split())
+        for entry in reversed(self._entries.values()):
+            if entry["scope"] != scope or not self._is_valid(entry, version, now):
+                continue
+            if self.similarity_threshold and entry["words"] is not None:
+                if _jaccard(words, entry["words"]) >= self.similarity_threshold:
+                    return entry
+            if embedding is not None and entry["embedding"] is not None:
+                if _cosine(embedding, entry["embedding"]) >= self.embedding_threshold:
+                    return entry
+        return None
+
+
+def openai_embedder(model: str = "text-embedding-ada-002"):
+    """Returns an embed function for RoutingCache that uses the OpenAI embeddings endpoint."""
+    def embed(text: str) -> List[float]:
+        return get_openai_client().embeddings.create(model=model, input=text).data[0].embedding
+
+    return embed
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
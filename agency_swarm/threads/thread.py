@@ -1,7 +1,32 @@
+import threading
+import time
+
 from agency_swarm.util.oai import get_openai_client
+from agency_swarm.util.log_config import get_logger
+from .description import TaskDescription
 
 from enum import Enum
 
+# A turn renews its lease while it polls the run, so a lease only expires if its owner died or hung.
+DEFAULT_LEASE_TTL = 600
+# The Assistants API accepts at most 10 files and 32768 characters per message.
+MAX_MESSAGE_FILES = 10
+MAX_MESSAGE_CHARS = 32768
+# Largest transcript copied into a fork, the oldest messages are left out beyond it.
+MAX_FORK_CHARS = 4 * MAX_MESSAGE_CHARS
+_FORK_HEADER = "Below is the conversation of this task so far. Continue from where it left off."
+_FORK_CONTINUED = "(The conversation of this task, continued.)"
+
+logger = get_logger()
+
+
+def _clip(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    kept = limit - 50  # room for the marker
+    return text[:kept] + f"\n[... {len(text) - kept} characters left out]"
+
+
 class ThreadStatus(Enum):
     Running = "Running"
     Ready = "Ready"
@@ -13,27 +38,238 @@ class ThreadProperty(Enum):
 
 
 class Thread:
-    def __init__(self, thread_id: str=None, copy_from=None):
+    def __init__(self, thread_id: str=None, copy_from=None, deferred: bool=False):
+        """
+        Parameters:
+            thread_id (str, optional): Id of an existing OpenAI thread to attach to.
+            copy_from (Thread, optional): Thread to fork, see ThreadProperty.CoW.
+            deferred (bool, optional): Do not create the OpenAI thread yet. It is created together with its first message
+                and run by create_and_run(), which saves two round-trips per new thread. Defaults to False.
+        """
         self.client = get_openai_client()
         self.thread_id: str = thread_id
         self.openai_thread = None
         self.instruction: str = None
         self.in_message_chain: str = None
+        self.owner: str = None # user_id of the user whose conversation created this thread
         self.status: ThreadStatus = ThreadStatus.Ready
         self.properties: ThreadProperty = ThreadProperty.Persist
         self.sessions = {} # {"recipient agent name", session}
         self.session_as_sender = None    # 用于python线程异常挂掉后的处理
         self.session_as_recipient= None # 用于python线程异常挂掉后的处理
+        self.description_revision = 0 # incremented on every description update, invalidates cached routing
+        self.description: TaskDescription = None
         self.task_description = ""
-        
+        self.pending_history = [] # exchanges not yet summarized into the description, see SessionLedger
+        self.active_run_id: str = None
+        self.run_tools: list = None # tools of the runs of the current turn, see Agent.get_run_tools
+        self.lease_owner: str = None
+        self.lease_expires_at: float = 0.0
+        self.lease_ttl: float = DEFAULT_LEASE_TTL
+        self.last_used_at: float = time.monotonic()
+        self._lease_lock = threading.Lock()
+        self.forked_from: Thread = None
+        self._pending_merges = []
+        self._seed_messages = [] # messages the deferred OpenAI thread will be created with
+
         if self.thread_id:
             self.openai_thread = self.client.beta.threads.retrieve(self.thread_id)
         else:
-            self.openai_thread = self.client.beta.threads.create()
+            if copy_from is not None:
+                # Copy on Write: fork the source thread with its full transcript in a single create call
+                self.forked_from = copy_from
+                self.owner = copy_from.owner
+                self.task_description = copy_from.description or copy_from.task_description
+                self.properties = ThreadProperty.CoW
+                try:
+                    self._seed_messages = copy_from._transcript_messages()
+                except Exception as e:
+                    # the fork starts cold rather than failing the turn
+                    logger.info(f"Failed to copy the transcript of thread [{copy_from.thread_id}]: {str(e)}")
+            if not deferred:
+                self.ensure_created()
+
+    @property
+    def is_created(self) -> bool:
+        return self.thread_id is not None
+
+    def ensure_created(self):
+        """Creates the OpenAI thread of a deferred thread, without running it."""
+        if self.thread_id is None:
+            self.openai_thread = self._with_seed_messages(
+                lambda seed_messages: self.client.beta.threads.create(messages=seed_messages))
             self.thread_id = self.openai_thread.id
-        if copy_from is not None:
-            # TODO: copy all message from a existed thread
-            pass
+            self._seed_messages = []
+        return self.thread_id
+
+    def create_and_run(self, assistant_id: str, content: str, file_ids=None, tools: list = None):
+        """
+        Creates the OpenAI thread of a deferred thread with its first message and starts a run on it, in one request.
+        `tools` overrides the tools of the assistant for this run.
+
+        Returns:
+            Run: The created run.
+        """
+        message = {"role": "user", "content": content, "file_ids": file_ids or []}
+        options = {"tools": tools} if tools is not None else {}
+        run = self._with_seed_messages(lambda seed_messages: self.client.beta.threads.create_and_run(
+            assistant_id=assistant_id, thread={"messages": seed_messages + [message]}, **options))
+        self.thread_id = run.thread_id
+        self._seed_messages = []
+        return run
+
+    def _with_seed_messages(self, create):
+        # a fork whose transcript is rejected (400) is created cold instead, like a new thread
+        try:
+            return create(self._seed_messages)
+        except Exception as e:
+            if not self._seed_messages or getattr(e, "status_code", None) != 400:
+                raise
+            logger.info(f"Transcript of thread [{self.forked_from.thread_id}] rejected, the fork starts cold: {str(e)}")
+            self._seed_messages = []
+            return create([])
+
+    def _transcript_messages(self):
+        """
+        Packs the conversation of this thread into messages for creating a fork. The API only accepts user messages
+        at thread creation, so the transcript is copied as user messages that label each speaker. Each message fits
+        MAX_MESSAGE_CHARS, and the oldest turns are left out when the transcript exceeds MAX_FORK_CHARS.
+        """
+        transcript = []
+        file_ids = []
+        after = None
+        while True:
+            params = {"order": "asc", "limit": 100}
+            if after:
+                params["after"] = after
+            page = self.client.beta.threads.messages.list(thread_id=self.thread_id, **params)
+            for message in page.data:
+                text = "\n".join(part.text.value for part in message.content if part.type == "text")
+                transcript.append((f"[{message.role}]: {text}", message.file_ids))
+            if len(page.data) < 100:
+                break
+            after = page.data[-1].id
+
+        # a turn longer than a message is cut, then the oldest turns are dropped down to MAX_FORK_CHARS
+        limit = MAX_MESSAGE_CHARS - len(_FORK_HEADER) - 200
+        turns = [(_clip(text, limit), ids) for text, ids in transcript]
+        dropped, total = 0, sum(len(text) + 2 for text, _ in turns)
+        while dropped < len(turns) - 1 and total > MAX_FORK_CHARS:
+            total -= len(turns[dropped][0]) + 2
+            dropped += 1
+        turns = turns[dropped:]
+        if not turns:
+            return []
+
+        header = _FORK_HEADER
+        if dropped:
+            header += f" The {dropped} oldest messages were left out."
+        contents = [header]
+        for text, ids in turns:
+            if len(contents[-1]) + 2 + len(text) > MAX_MESSAGE_CHARS:
+                contents.append(_FORK_CONTINUED)
+            contents[-1] += "\n\n" + text
+            file_ids += [file_id for file_id in ids if file_id not in file_ids]
+
+        messages = [{"role": "user", "content": content, "file_ids": []} for content in contents]
+        messages[-1]["file_ids"] = file_ids[-MAX_MESSAGE_FILES:]
+        return messages
+
+    # --- Merge Methods ---
+
+    def add_pending_merge(self, content: str):
+        """Queues the result of a forked branch, to be posted to this thread once it is not running."""
+        with self._lease_lock:
+            self._pending_merges.append(content)
+
+    def take_pending_merges(self):
+        with self._lease_lock:
+            merges, self._pending_merges = self._pending_merges, []
+        return merges
+
+    # --- Description Methods ---
+
+    @property
+    def task_description(self) -> str:
+        return self.description.render() if self.description is not None else self._task_description
+
+    @task_description.setter
+    def task_description(self, value):
+        """Accepts a TaskDescription, or text that is parsed into one when possible."""
+        if isinstance(value, TaskDescription):
+            self.description = value
+        else:
+            self.description = TaskDescription.parse(value)
+        self._task_description = value if isinstance(value, str) else ""
+        self.description_revision += 1
+
+    def add_history(self, history: str):
+        """Records an exchange to be summarized into the description later. Invalidates cached routing too."""
+        with self._lease_lock:
+            self.pending_history.append(history)
+            self.description_revision += 1
+
+    def take_history(self):
+        with self._lease_lock:
+            history, self.pending_history = self.pending_history, []
+        return history
+
+    def restore_history(self, history):
+        """Puts back history taken with take_history() that could not be summarized."""
+        with self._lease_lock:
+            self.pending_history[:0] = history
+
+    # --- Lease Methods ---
+
+    def acquire(self, owner: str, ttl: float = DEFAULT_LEASE_TTL) -> bool:
+        """
+        Atomically takes ownership of the thread for one turn. Fails if another owner holds an unexpired lease.
+        """
+        with self._lease_lock:
+            now = time.monotonic()
+            if self.lease_owner is not None and now < self.lease_expires_at:
+                return False
+            self.lease_owner = owner
+            self.lease_expires_at = now + ttl
+            self.lease_ttl = ttl
+            self.last_used_at = now
+            self.status = ThreadStatus.Running
+            return True
+
+    def heartbeat(self, owner: str) -> bool:
+        """Extends the lease. Returns False if the lease was lost, e.g. reclaimed by the watchdog."""
+        with self._lease_lock:
+            if self.lease_owner != owner:
+                return False
+            self.lease_expires_at = time.monotonic() + self.lease_ttl
+            return True
+
+    def release(self, owner: str) -> bool:
+        with self._lease_lock:
+            if self.lease_owner != owner:
+                return False
+            self._reset_lease()
+            return True
+
+    def lease_expired(self, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return self.lease_owner is not None and now >= self.lease_expires_at
+
+    def reclaim(self, owner: str, ttl: float = DEFAULT_LEASE_TTL) -> bool:
+        """Takes over an expired lease. Returns False if the current lease is still valid."""
+        with self._lease_lock:
+            if not self.lease_expired():
+                return False
+            self.lease_owner = owner
+            self.lease_expires_at = time.monotonic() + ttl
+            self.lease_ttl = ttl
+            return True
+
+    def _reset_lease(self):
+        self.last_used_at = time.monotonic()
+        self.lease_owner = None
+        self.lease_expires_at = 0.0
+        self.status = ThreadStatus.Ready
 
     def _dump_info(self):
         pass
\ No newline at end of file
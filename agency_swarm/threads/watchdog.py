@@ -0,0 +1,80 @@
+import threading
+import uuid
+from typing import List
+
+from agency_swarm.util.oai import get_openai_client
+from agency_swarm.util.rate_limiter import request_priority, RequestPriority
+from agency_swarm.util.log_config import get_logger
+logger = get_logger()
+
+
+class ThreadWatchdog:
+    """
+    Periodically scans the threads of the given agents and reclaims those whose lease expired, i.e. threads whose
+    owning turn died or hung without releasing them. The orphaned remote run is cancelled so the thread can accept
+    new messages again. Each scan also applies the agents' thread retention policies, so idle threads are archived
+    even when no new threads are added.
+
+    Counters in `stats`:
+    leaked: expired leases found.
+    reclaimed: threads returned to the Ready state.
+    cancelled_runs: orphaned remote runs cancelled.
+    """
+
+    def __init__(self, agents: List, interval: float = 60):
+        self.agents = agents
+        self.interval = interval
+        self.stats = {"leaked": 0, "reclaimed": 0, "cancelled_runs": 0}
+        self._lease_id = "watchdog-" + uuid.uuid4().hex
+        self._stop_event = threading.Event()
+        self._worker = None
+
+    def start(self):
+        if self._worker is not None and self._worker.is_alive():
+            return self
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._loop, name="agency-swarm-thread-watchdog", daemon=True)
+        self._worker.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.info(f"Thread watchdog failed: {str(e)}")
+
+    def check(self):
+        """Runs one scan and returns the reclaimed threads."""
+        reclaimed = []
+        for agent in self.agents:
+            for thread in agent.threads:
+                if not thread.lease_expired():
+                    continue
+                self.stats["leaked"] += 1
+                if not thread.reclaim(self._lease_id):
+                    continue  # renewed in the meantime
+                if thread.active_run_id:
+                    self._cancel_run(thread, thread.active_run_id)
+                thread.release(self._lease_id)
+                self.stats["reclaimed"] += 1
+                reclaimed.append(thread)
+                logger.info(f"Reclaimed thread [{thread.thread_id}] of {agent.name} after its lease expired.")
+            agent.enforce_thread_retention()
+        return reclaimed
+
+    def _cancel_run(self, thread, run_id):
+        try:
+            with request_priority(RequestPriority.Background):
+                get_openai_client().beta.threads.runs.cancel(thread_id=thread.thread_id, run_id=run_id)
+            self.stats["cancelled_runs"] += 1
+        except Exception as e:
+            # the run may already be finished or expired on the server
+            logger.info(f"Failed to cancel run [{run_id}] of thread [{thread.thread_id}]: {str(e)}")
+        thread.active_run_id = None
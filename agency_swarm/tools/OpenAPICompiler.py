@@ -0,0 +1,252 @@
+import copy
+import json
+import threading
+from typing import Any, Dict, List, Union
+from urllib.parse import unquote
+
+from pydantic import ConfigDict, Field, create_model
+
+from .BaseTool import BaseTool
+from .ResponsePolicy import ResponsePolicy
+from ..util.http_pool import get_http_pool, get_async_http_pool
+from ..util.schema import intern_model, model_key
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+CALLABLE_METHODS = ("get", "post", "put", "delete", "patch")
+
+_PRIMITIVE_TYPES = {
+    'string': str,
+    'integer': int,
+    'number': float,
+    'boolean': bool,
+    'null': type(None),
+}
+
+
+class _LazyToolMetaclass(type(BaseTool)):
+    # Calling a lazy tool class builds its pydantic model on first use, and returns an instance of that model.
+    def __call__(cls, *args, **kwargs):
+        if "__openapi_function__" in cls.__dict__:
+            return cls.compile_model()(*args, **kwargs)
+        return super().__call__(*args, **kwargs)
+
+    # a property of the metaclass rather than a classmethod property, which Python 3.13 no longer supports
+    @property
+    def openai_schema(cls):
+        function = getattr(cls, "__openapi_function__", None)
+        if function is None:
+            raise AttributeError(f"{cls.__name__} was not compiled from an OpenAPI spec.")
+        return copy.deepcopy(function)
+
+
+class OpenAPITool(BaseTool, metaclass=_LazyToolMetaclass):
+    """
+    Base of the tools compiled from an OpenAPI spec. The function schema is taken from the spec directly; the pydantic
+    model that validates the arguments is only built when the tool is called for the first time.
+    """
+    model_config = ConfigDict(defer_build=True)
+
+    @classmethod
+    def compile_model(cls):
+        """Returns the pydantic model (a subclass of this tool) that validates the arguments, building it once."""
+        compiled = cls.__dict__.get("__openapi_model__")
+        if compiled is None:
+            compiled = cls.__openapi_compiler__.build_model(cls)
+        return compiled
+
+    def run(self, caller_thread=None):
+        return None
+
+
+class OpenAPICompiler:
+    """
+    Compiles the operations of an OpenAPI spec into tools in one pass. The spec is parsed once, each $ref is resolved
+    once and shared by all operations, identical object schemas share one interned model, and the models of a
+    tool are only built when it is first called (see OpenAPITool).
+
+    Parameters:
+    spec (Union[str, dict]): The OpenAPI spec, as a JSON string or a parsed dict.
+    headers (Dict[str, str], optional): Headers sent with every request. Defaults to None.
+    params (Dict[str, Any], optional): Query parameters added to every request. Defaults to None.
+    async_tools (bool, optional): Generate tools with an async run method. Defaults to False.
+    response_policy (ResponsePolicy, optional): Size caps and field selection applied to the responses. Defaults to
+        ResponsePolicy().
+    """
+
+    def __init__(self, spec: Union[str, dict], headers: Dict[str, str] = None, params: Dict[str, Any] = None,
+                 async_tools: bool = False, response_policy: ResponsePolicy = None):
+        self.spec = json.loads(spec) if isinstance(spec, (str, bytes)) else spec
+        self.headers = headers or {}
+        self.params = params
+        self.async_tools = async_tools
+        self.response_policy = response_policy or ResponsePolicy()
+        self._resolved = {}  # $ref -> resolved node
+        self._lock = threading.RLock()
+
+    def compile(self) -> List[type]:
+        servers = self.spec.get("servers") or [{"url": ""}]
+        base_url = servers[0]["url"]
+        tools = []
+        for path, path_item in self.spec.get("paths", {}).items():
+            path_item = self.resolve(path_item)
+            shared_parameters = path_item.get("parameters", [])
+            for method, operation in path_item.items():
+                if method not in HTTP_METHODS:
+                    continue
+                function = self._function_schema(operation, shared_parameters)
+                tools.append(type(function["name"], (OpenAPITool,), {
+                    "__doc__": function["description"],
+                    "__module__": __name__,
+                    "__openapi_function__": function,
+                    "__openapi_compiler__": self,
+                    "run": self._callback(base_url + path, method, function["name"]),
+                }))
+        return tools
+
+    # --- $ref resolution ---
+
+    def resolve(self, node, stack=()):
+        """Returns `node` with its local $refs replaced. A $ref back into itself is left as an open object."""
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str):
+                siblings = {k: v for k, v in node.items() if k != "$ref"}
+                if ref in stack or not ref.startswith("#/"):
+                    return self.resolve(siblings, stack)
+                resolved = self._resolved.get(ref)
+                if resolved is None:
+                    resolved = self.resolve(self._lookup(ref), stack + (ref,))
+                    self._resolved[ref] = resolved
+                return {**resolved, **self.resolve(siblings, stack)} if siblings else resolved
+            return {k: self.resolve(v, stack) for k, v in node.items()}
+        if isinstance(node, list):
+            return [self.resolve(item, stack) for item in node]
+        return node
+
+    def _lookup(self, ref: str):
+        node = self.spec
+        for part in ref[2:].split("/"):
+            part = unquote(part).replace("~1", "/").replace("~0", "~")
+            node = node[int(part)] if isinstance(node, list) else node[part]
+        return node
+
+    # --- Function schemas ---
+
+    def _function_schema(self, operation: dict, shared_parameters: list) -> dict:
+        operation = self.resolve(operation)
+        schema = {"type": "object", "properties": {}}
+        required = []
+
+        request_body = operation.get("requestBody", {})
+        body_schema = request_body.get("content", {}).get("application/json", {}).get("schema")
+        if body_schema:
+            schema["properties"]["requestBody"] = body_schema
+            if request_body.get("required"):
+                required.append("requestBody")
+
+        parameters = {(p["name"], p.get("in")): p for p in self.resolve(shared_parameters) if "name" in p}
+        parameters.update({(p["name"], p.get("in")): p for p in operation.get("parameters", []) if "name" in p})
+        if parameters:
+            properties, required_parameters = {}, []
+            for (name, _), parameter in parameters.items():
+                prop = dict(parameter.get("schema") or {"type": parameter.get("type", "string")})
+                for key in ("description", "example"):
+                    if key in parameter:
+                        prop[key] = parameter[key]
+                properties[name] = prop
+                if parameter.get("required"):
+                    required_parameters.append(name)
+            schema["properties"]["parameters"] = {"type": "object", "properties": properties}
+            if required_parameters:
+                schema["properties"]["parameters"]["required"] = required_parameters
+                required.append("parameters")
+        if required:
+            schema["required"] = required
+
+        return {
+            "name": operation.get("operationId"),
+            "description": operation.get("description") or operation.get("summary", ""),
+            "parameters": schema,
+        }
+
+    # --- Models ---
+
+    def build_model(self, tool: type) -> type:
+        """Builds the model that validates the arguments of a compiled tool."""
+        with self._lock:
+            compiled = tool.__dict__.get("__openapi_model__")
+            if compiled is None:
+                parameters = tool.__openapi_function__["parameters"]
+                fields = self._fields(parameters.get("properties", {}), parameters.get("required", []))
+                compiled = create_model(tool.__name__, __base__=tool, **fields)
+                type.__setattr__(tool, "__openapi_model__", compiled)
+            return compiled
+
+    def _fields(self, properties: dict, required: list) -> dict:
+        fields = {}
+        for prop, details in properties.items():
+            alias = None
+            if prop.startswith('_'):
+                alias = prop
+                prop = prop.lstrip('_')
+            field_type = self._type(details, prop)
+            field_default = ... if (alias or prop) in required else None
+            fields[prop] = (field_type, Field(default=field_default, description=details.get('description', ''),
+                                              alias=alias))
+        return fields
+
+    def _type(self, schema: dict, name: str):
+        json_type = schema.get('type')
+        if isinstance(json_type, list):  # OpenAPI 3.1, e.g. ["string", "null"]
+            json_type = next((t for t in json_type if t != "null"), "null")
+        if json_type is None and 'properties' in schema:
+            json_type = 'object'
+
+        if json_type == 'array':
+            items = schema.get('items')
+            return List[self._type(items, f"{name}Item")] if items else List[Any]
+        if json_type == 'object':
+            if not schema.get('properties'):
+                return dict
+            # identical shapes share one model across tools, compilers and agents
+            model_name = schema.get('title') or f"{name[:1].upper()}{name[1:]}Model"
+            return intern_model(model_key(model_name, schema), lambda: create_model(
+                model_name, **self._fields(schema['properties'], schema.get('required', []))))
+        return _PRIMITIVE_TYPES.get(json_type, Any)
+
+    # --- Callbacks ---
+
+    def _callback(self, url_template: str, method: str, operation_id: str):
+        headers, params, policy = self.headers, self.params, self.response_policy
+
+        def build_request(tool):
+            url = url_template
+            parameters = tool.model_dump().get('parameters') or {}
+            # replace all parameters in url
+            for param, value in parameters.items():
+                if "{" + str(param) + "}" in url:
+                    url = url.replace(f"{{{param}}}", str(value))
+                    parameters[param] = None
+            url = url.rstrip("/")
+            parameters = {k: v for k, v in parameters.items() if v is not None}
+            parameters = {**parameters, **params} if params else parameters
+            return url, {"params": parameters, "json": tool.model_dump().get('requestBody', None),
+                         "headers": headers}
+
+        if self.async_tools:
+            async def callback(self, caller_thread=None):
+                if method not in CALLABLE_METHODS:
+                    return None
+                url, kwargs = build_request(self)
+                response = await get_async_http_pool().request(method, url, max_bytes=policy.max_bytes, **kwargs)
+                return policy.apply(operation_id, response)
+        else:
+            def callback(self, caller_thread=None):
+                if method not in CALLABLE_METHODS:
+                    return None
+                url, kwargs = build_request(self)
+                # pooled keep-alive connections per host, see util.http_pool
+                response = get_http_pool().request(method, url, max_bytes=policy.max_bytes, **kwargs)
+                # streamed up to max_bytes, then projected, compacted and truncated, see ResponsePolicy
+                return policy.apply(operation_id, response)
+        return callback
@@ -0,0 +1,141 @@
+import json
+import re
+from typing import Dict, List, Union
+
+_PATH_TOKEN = re.compile(r"\.\.(\w[\w-]*|\*)|\.(\w[\w-]*|\*)|\[(\*|-?\d+|'[^']*'|\"[^\"]*\")\]")
+
+
+def compact_json(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def select_path(value, path: str):
+    """
+    Evaluates a JSONPath subset: $, .name, ['name'], [n], [*], .*, and ..name (recursive). Paths with a wildcard or a
+    recursive step return a list of matches, the others a single value (None if nothing matches).
+    """
+    if not path.startswith("$"):
+        raise ValueError(f"JSONPath must start with '$': {path}")
+    nodes, multiple, position = [value], False, 1
+    while position < len(path):
+        match = _PATH_TOKEN.match(path, position)
+        if match is None:
+            raise ValueError(f"Unsupported JSONPath at position {position}: {path}")
+        position = match.end()
+        recursive, name, index = match.group(1), match.group(2), match.group(3)
+        if recursive is not None:
+            multiple = True
+            nodes = [found for node in nodes for found in _descendants(node, recursive)]
+            continue
+        key = name if name is not None else index
+        if key == "*":
+            multiple = True
+            nodes = [child for node in nodes for child in _children(node)]
+        elif key[0] in "'\"":
+            nodes = [node[key[1:-1]] for node in nodes if isinstance(node, dict) and key[1:-1] in node]
+        elif name is None:
+            number = int(key)
+            nodes = [node[number] for node in nodes if isinstance(node, list) and -len(node) <= number < len(node)]
+        else:
+            nodes = [node[key] for node in nodes if isinstance(node, dict) and key in node]
+    if multiple:
+        return nodes
+    return nodes[0] if nodes else None
+
+
+def _children(node):
+    if isinstance(node, dict):
+        return list(node.values())
+    if isinstance(node, list):
+        return list(node)
+    return []
+
+
+def _descendants(node, name):
+    found = []
+    if isinstance(node, dict):
+        if name == "*":
+            found.extend(node.values())
+        elif name in node:
+            found.append(node[name])
+    for child in _children(node):
+        found.extend(_descendants(child, name))
+    return found
+
+
+def project_fields(value, fields: List[str]):
+    """Keeps only `fields` (dotted names for nested fields) of an object, or of every object of a list."""
+    tree = {}
+    for field in fields:
+        node = tree
+        for part in field.split("."):
+            node = node.setdefault(part, {})
+    return _project(value, tree)
+
+
+def _project(value, tree):
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+class ResponsePolicy:
+    """
+    How OpenAPI tools turn an HTTP response into the output submitted to the model: the body is streamed up to
+    `max_bytes`, JSON is reduced to the selected fields and serialized compactly, and outputs longer than `max_chars`
+    are cut with a marker that summarizes what was left out.
+
+    Parameters:
+    max_bytes (int, optional): Largest number of bytes read from a response body. Defaults to 2 MiB.
+    max_chars (int, optional): Largest output passed to the model. Defaults to 20000.
+    select (Dict[str, Union[str, List[str]]], optional): Selection per operationId ("*" for all others): a JSONPath
+        such as "$.items[*].name", or a list of (dotted) field names to keep from the object or from each object of
+        the list. Defaults to None.
+    """
+
+    def __init__(self, max_bytes: int = 2 * 1024 * 1024, max_chars: int = 20000,
+                 select: Dict[str, Union[str, List[str]]] = None):
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.select = select or {}
+
+    def apply(self, operation_id: str, response) -> str:
+        """Returns the output of a tool call from its (capped) response."""
+        status = response.status_code
+        value, is_json = None, False
+        if not response.truncated:
+            try:
+                value, is_json = response.json(), True
+            except ValueError:
+                pass
+
+        if is_json:
+            selection = self.select.get(operation_id, self.select.get("*"))
+            if isinstance(selection, str):
+                value = select_path(value, selection)
+            elif selection:
+                value = project_fields(value, selection)
+            output = compact_json(value)
+        else:
+            output = response.text
+        if status >= 400:
+            output = f"HTTP {status}: {output}"
+        return self.truncate(output, value if is_json else None, response.truncated)
+
+    def truncate(self, output: str, value=None, download_truncated: bool = False) -> str:
+        if len(output) <= self.max_chars and not download_truncated:
+            return output
+        summary = []
+        if download_truncated:
+            summary.append(f"the response exceeded {self.max_bytes} bytes and was not fully downloaded")
+        if len(output) > self.max_chars:
+            summary.append(f"showing {self.max_chars} of {len(output)} characters")
+        if isinstance(value, list):
+            summary.append(f"{len(value)} items in total")
+        elif isinstance(value, dict):
+            summary.append(f"top-level keys: {', '.join(list(value)[:20])}")
+        return f"{output[:self.max_chars]}\n[truncated: {'; '.join(summary)}]"
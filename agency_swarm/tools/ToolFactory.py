@@ -1,12 +1,12 @@
 import inspect
 from typing import Any, Dict, List, Type, Union
 
-import jsonref
-from jsonref import requests
 from pydantic import create_model, Field
 
 from .BaseTool import BaseTool
-from ..util.schema import reference_schema
+from ..util.schema import reference_schema, intern_model, model_key
+from .OpenAPICompiler import OpenAPICompiler
+from .ResponsePolicy import ResponsePolicy
 
 
 class ToolFactory:
@@ -96,12 +96,8 @@ class ToolFactory:
                             item_type = type_mapping[items_schema['type']]
                             field_type = List[item_type]
                         elif 'properties' in items_schema:  # Handling direct nested object in array
-                            nested_properties = items_schema['properties']
-                            nested_required = items_schema.get('required', [])
                             nested_model_name = items_schema.get('title', f"{prop}Item")
-                            nested_fields = create_fields(nested_properties, type_mapping, nested_required, defs)
-                            nested_model = create_model(nested_model_name, **nested_fields)
-                            field_type = List[nested_model]
+                            field_type = List[nested_model(nested_model_name, items_schema, defs)]
                         elif '$ref' in items_schema:
                             ref_model = resolve_ref(items_schema['$ref'], defs)
                             field_type = List[ref_model]
@@ -109,11 +105,8 @@ class ToolFactory:
                             raise ValueError("Array items must have a 'type', 'properties', or '$ref'")
                     elif json_type == 'object':
                         if 'properties' in details:
-                            nested_properties = details['properties']
-                            nested_required = details.get('required', [])
                             nested_model_name = details.get('title', f"{prop}Model")
-                            nested_fields = create_fields(nested_properties, type_mapping, nested_required, defs)
-                            field_type = create_model(nested_model_name, **nested_fields)
+                            field_type = nested_model(nested_model_name, details, defs)
                         elif '$ref' in details:
                             ref_model = resolve_ref(details['$ref'], defs)
                             field_type = ref_model
@@ -127,6 +120,11 @@ class ToolFactory:
 
             return fields
 
+        def nested_model(model_name: str, details: Dict[str, Any], defs: Dict[str, Any]):
+            # identical shapes share one model across tools, see util.schema.intern_model
+            return intern_model(model_key(model_name, details, defs), lambda: create_model(
+                model_name, **create_fields(details['properties'], type_mapping, details.get('required', []), defs)))
+
         type_mapping = {
             'string': str,
             'integer': int,
@@ -146,8 +144,7 @@ class ToolFactory:
         required_fields = schema['parameters'].get('required', [])
 
         # Add definitions ($defs) to type_mapping
-        defs = {k: create_model(k, **create_fields(v['properties'], type_mapping, v.get('required', []), {})) for k, v
-                in schema['parameters'].get('$defs', {}).items()}
+        defs = {k: nested_model(k, v, {}) for k, v in schema['parameters'].get('$defs', {}).items()}
         type_mapping.update(defs)
 
         fields = create_fields(properties, type_mapping, required_fields, defs)
@@ -163,94 +160,18 @@ class ToolFactory:
         return tool
 
     @staticmethod
-    def from_openapi_schema(schema: Union[str, dict], headers: Dict[str, str] = None, params: Dict[str, Any] = None):
-        if isinstance(schema, dict):
-            openapi_spec = schema
-            openapi_spec = jsonref.JsonRef.replace_refs(openapi_spec)
-        else:
-            openapi_spec = jsonref.loads(schema)
-        tools = []
-        headers = headers or {}
-        for path, methods in openapi_spec["paths"].items():
-            for method, spec_with_ref in methods.items():
-                def callback(self):
-                    url = openapi_spec["servers"][0]["url"] + path
-                    parameters = self.model_dump().get('parameters', {})
-                    # replace all parameters in url
-                    for param, value in parameters.items():
-                        if "{" + str(param) + "}" in url:
-                            url = url.replace(f"{{{param}}}", str(value))
-                            parameters[param] = None
-                    url = url.rstrip("/")
-                    parameters = {k: v for k, v in parameters.items() if v is not None}
-                    parameters = {**parameters, **params} if params else parameters
-                    if method == "get":
-                        return requests.get(url, params=parameters, headers=headers,
-                                            json=self.model_dump().get('requestBody', None)
-                                            ).json()
-                    elif method == "post":
-                        return requests.post(url,
-                                             params=parameters,
-                                             json=self.model_dump().get('requestBody', None),
-                                             headers=headers
-                                             ).json()
-                    elif method == "put":
-                        return requests.put(url,
-                                            params=parameters,
-                                            json=self.model_dump().get('requestBody', None),
-                                            headers=headers
-                                            ).json()
-                    elif method == "delete":
-                        return requests.delete(url,
-                                               params=parameters,
-                                               json=self.model_dump().get('requestBody', None),
-                                               headers=headers
-                                               ).json()
-
-                # 1. Resolve JSON references.
-                spec = jsonref.replace_refs(spec_with_ref)
-
-                # 2. Extract a name for the functions.
-                function_name = spec.get("operationId")
-
-                # 3. Extract a description and parameters.
-                desc = spec.get("description") or spec.get("summary", "")
-
-                schema = {"type": "object", "properties": {}}
-
-                req_body = (
-                    spec.get("requestBody", {})
-                    .get("content", {})
-                    .get("application/json", {})
-                    .get("schema")
-                )
-                if req_body:
-                    schema["properties"]["requestBody"] = req_body
-
-                spec_params = spec.get("parameters", [])
-                if spec_params:
-                    param_properties = {}
-                    for param in spec_params:
-                        if "schema" not in param and "type" in param:
-                            param["schema"] = {"type": param["type"]}
-                        param_properties[param["name"]] = param["schema"]
-                        if "description" in param:
-                            param_properties[param["name"]]["description"] = param["description"]
-                        if "required" in param:
-                            param_properties[param["name"]]["required"] = param["required"]
-                        if "example" in param:
-                            param_properties[param["name"]]["example"] = param["example"]
-                    schema["properties"]["parameters"] = {
-                        "type": "object",
-                        "properties": param_properties,
-                    }
-
-                function = {
-                    "name": function_name,
-                    "description": desc,
-                    "parameters": schema,
-                }
-
-                tools.append(ToolFactory.from_openai_schema(function, callback))
-
-        return tools
+    def from_openapi_schema(schema: Union[str, dict], headers: Dict[str, str] = None, params: Dict[str, Any] = None,
+                            async_tools: bool = False, response_policy: ResponsePolicy = None):
+        """
+        Converts the operations of an OpenAPI spec into BaseTools that call the API. The tool classes are compiled
+        lazily, see OpenAPICompiler.
+        :param schema: The OpenAPI spec, as a dict or JSON string.
+        :param headers: Headers sent with every request.
+        :param params: Query parameters added to every request.
+        :param async_tools: Generate tools with an async run method, backed by the async HTTP client. The async tool
+            calls of one run step are executed concurrently, see Session._execute_async_tools.
+        :param response_policy: Download cap, field selection and output size of the responses, see ResponsePolicy.
+        :return: A list of BaseTools.
+        """
+        return OpenAPICompiler(schema, headers=headers, params=params, async_tools=async_tools,
+                               response_policy=response_policy).compile()
@@ -0,0 +1,102 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import List, Sequence
+
+from .BaseTool import BaseTool
+
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of a text, with camelCase and snake_case names split into their parts."""
+    return _WORD.findall(_CAMEL_BOUNDARY.sub(" ", text or "").lower())
+
+
+def tool_document(schema: dict) -> List[str]:
+    """Words that describe a function tool: its name (counted twice), description and parameters."""
+    words = tokenize(schema.get("name", "")) * 2 + tokenize(schema.get("description", ""))
+    properties = schema.get("parameters", {}).get("properties", {})
+    for name, details in properties.items():
+        words += tokenize(name)
+        if isinstance(details, dict):
+            words += tokenize(details.get("description", ""))
+            # OpenAPI tools group their arguments under "parameters" and "requestBody"
+            for nested_name, nested in details.get("properties", {}).items():
+                words += tokenize(nested_name)
+                if isinstance(nested, dict):
+                    words += tokenize(nested.get("description", ""))
+    return words
+
+
+class ToolRetriever:
+    """
+    Picks the tools an agent with many tools gets for one run. The function tools are indexed locally (BM25 over
+    their names, descriptions and parameters) and a run only gets the `top_k` tools most relevant to its message,
+    plus the tools in `always` and the built-in tools (Retrieval, CodeInterpreter). Agents with at most
+    `top_k + len(always)` function tools always get all of them.
+
+    Parameters:
+    top_k (int, optional): Number of retrieved tools per run. Defaults to 8.
+    always (Sequence[str], optional): Names of the tools every run gets. Defaults to ("SendMessage",).
+    k1 (float, optional): BM25 term frequency saturation. Defaults to 1.5.
+    b (float, optional): BM25 length normalization. Defaults to 0.75.
+    """
+
+    def __init__(self, top_k: int = 8, always: Sequence[str] = ("SendMessage",), k1: float = 1.5, b: float = 0.75):
+        self.top_k = top_k
+        self.always = set(always)
+        self.k1 = k1
+        self.b = b
+        self._index = None
+        self._index_key = None
+        self._lock = threading.Lock()
+
+    def select(self, tools: list, query: str) -> list:
+        """
+        Returns the tools (classes, in their original order) a run for `query` gets, or None if it gets all of them.
+        """
+        functions = [tool for tool in tools if issubclass(tool, BaseTool)]
+        candidates = [tool for tool in functions if tool.__name__ not in self.always]
+        if len(candidates) <= self.top_k:
+            return None
+
+        scores = self._scores(candidates, tokenize(query))
+        ranked = sorted(range(len(candidates)), key=lambda i: (-scores[i], i))[:self.top_k]
+        dropped = set(candidates) - {candidates[i] for i in ranked}
+        return [tool for tool in tools if tool not in dropped]
+
+    def _scores(self, candidates: list, query: List[str]) -> List[float]:
+        index = self._get_index(candidates)
+        documents, document_frequency, average_length = index
+        count = len(documents)
+        scores = []
+        for frequencies, length in documents:
+            score = 0.0
+            for term in set(query):
+                frequency = frequencies.get(term)
+                if not frequency:
+                    continue
+                idf = math.log(1 + (count - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                score += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def _get_index(self, candidates: list):
+        # rebuilt whenever the tools of the agent change
+        key = tuple(id(tool) for tool in candidates)
+        with self._lock:
+            if self._index_key != key:
+                documents = []
+                document_frequency = Counter()
+                for tool in candidates:
+                    words = tool_document(tool.openai_schema)
+                    documents.append((Counter(words), len(words)))
+                    document_frequency.update(set(words))
+                average_length = sum(length for _, length in documents) / len(documents) or 1.0
+                self._index = (documents, document_frequency, average_length)
+                self._index_key = key
+            return self._index
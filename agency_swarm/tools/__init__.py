@@ -2,3 +2,6 @@ from .BaseTool import BaseTool
 from .oai.Retrieval import Retrieval
 from .oai.CodeInterpreter import CodeInterpreter
 from .ToolFactory import ToolFactory
+from .OpenAPICompiler import OpenAPICompiler, OpenAPITool
+from .ResponsePolicy import ResponsePolicy
+from .ToolRetriever import ToolRetriever
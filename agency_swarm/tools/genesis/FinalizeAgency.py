@@ -1,10 +1,5 @@
-import os
-from typing import List
-
-from pydantic import Field, model_validator, field_validator
-
 from agency_swarm import BaseTool, get_openai_client
-from agency_swarm.util import create_agent_template
+from agency_swarm.tools.genesis.util import find_agent_classes, finalize_agency_source
 
 
 class FinalizeAgency(BaseTool):
@@ -13,22 +8,17 @@ class FinalizeAgency(BaseTool):
     """
 
     def run(self):
-        client = get_openai_client()
-
         # read agency.py
         with open("./agency.py", "r") as f:
             agency_py = f.read()
             f.close()
 
-        res = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=examples + [
-                {'role': "user", 'content': agency_py},
-            ],
-            temperature=0.0,
-        )
-
-        message = res.choices[0].message.content
+        # the imports and agents are resolved locally from the agent folders, the model is only asked to fix the file
+        # when it doesn't parse or uses names that don't match an agent
+        try:
+            message = finalize_agency_source(agency_py, find_agent_classes("./"))
+        except (SyntaxError, ValueError):
+            message = self._finalize_with_model(agency_py)
 
         # write agency.py
         with open("./agency.py", "w") as f:
@@ -37,6 +27,18 @@ class FinalizeAgency(BaseTool):
 
         return "Successfully finalized agency structure. You can now instruct the user to run the agency.py file."
 
+    @staticmethod
+    def _finalize_with_model(agency_py: str) -> str:
+        client = get_openai_client()
+        res = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=examples + [
+                {'role': "user", 'content': agency_py},
+            ],
+            temperature=0.0,
+        )
+        return res.choices[0].message.content
+
 
 SYSTEM_PROMPT = """"Please read the file provided by the user and fix all the imports and indentation accordingly. 
 
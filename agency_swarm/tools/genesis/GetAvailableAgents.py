@@ -1,34 +1,24 @@
-import os.path
-
 from agency_swarm import BaseTool
-from agency_swarm.tools.genesis.util import get_modules
-import importlib
+from agency_swarm.tools.genesis.util import get_catalog
+
 
 class GetAvailableAgents(BaseTool):
     """
     This tool gets the list of pre-made available agents in the framework.
     """
     def run(self):
-        agent_paths = get_modules('agency_swarm.agents')
-        available_agents = [item.split(".")[-1] for item in agent_paths]
+        # read from the agents' source files, without importing or instantiating them
+        agents = get_catalog('agency_swarm.agents').entries(kind="agent")
 
         print("Available agents:")
-        for agent in available_agents:
-            print(agent)
-
-        agents_and_descriptions = {}
-        for path in agent_paths:
-            module = importlib.import_module(path)
-
-            class_name = path.split(".")[-1]
-
-            cls = getattr(module, class_name)()
+        for agent in agents:
+            print(agent.name)
 
-            agents_and_descriptions[class_name] = cls.description
+        agents_and_descriptions = {agent.name: agent.description for agent in agents}
 
         return str(agents_and_descriptions)
 
 
 if __name__ == "__main__":
-    tool = GetAvailableAgents(agent_name="BrowsingAgent")
-    print(tool.run())
\ No newline at end of file
+    tool = GetAvailableAgents()
+    print(tool.run())
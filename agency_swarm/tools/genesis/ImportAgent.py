@@ -3,13 +3,12 @@ import os
 from pydantic import Field, field_validator
 
 from agency_swarm import BaseTool
-from agency_swarm.tools.genesis.util import get_modules
+from agency_swarm.tools.genesis.util import get_catalog
 from agency_swarm.util import create_agent_template
 
-agent_paths = get_modules('agency_swarm.agents')
-available_agents = [item.split(".")[-1] for item in agent_paths]
 
-description = f"Name of the agent to be imported. Available agents are: " + str(available_agents)
+def get_available_agents():
+    return get_catalog('agency_swarm.agents').names(kind="agent")
 
 
 class ImportAgent(BaseTool):
@@ -21,7 +20,7 @@ class ImportAgent(BaseTool):
 
     def run(self):
         # find item in available_agents dict by value
-        import_path = [item for item in agent_paths if self.agent_name in item][0]
+        import_path = get_catalog('agency_swarm.agents').get(self.agent_name, kind="agent").module
 
         import_path = import_path.replace(f".{self.agent_name}", "")
 
@@ -42,6 +41,7 @@ class ImportAgent(BaseTool):
     @field_validator("agent_name", mode='after')
     @classmethod
     def agent_name_exists(cls, v):
+        available_agents = get_available_agents()
         if v not in available_agents:
             raise ValueError(
                 f"Agent with name {v} does not exist. Available agents are: {available_agents}")
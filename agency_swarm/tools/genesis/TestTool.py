@@ -2,8 +2,8 @@ import os
 from typing import Optional
 
 from agency_swarm.tools import BaseTool
+from agency_swarm.tools.genesis.util import get_tool_test_runner, format_report, parse_arguments
 from pydantic import Field, model_validator
-import importlib
 
 
 class TestTool(BaseTool):
@@ -16,28 +16,30 @@ class TestTool(BaseTool):
     tool_name: str = Field(..., description="Name of the tool to be run. Must be defined in tools.py file.")
     arguments: Optional[str] = Field(...,
                                      description="Arguments to be passed to the tool for testing. "
-                                                 "Must be in serialized json format.")
+                                                 "Must be in serialized json format. Pass a list of argument objects "
+                                                 "to run several tests in parallel.")
 
     def run(self):
-        # import tool by self.tool_name from local tools.py file
-        tool = importlib.import_module('tools')
-
-        try:
-            Tool = getattr(tool, self.tool_name)
-        except AttributeError:
-            return f"Tool {self.tool_name} not found in tools.py file."
-
+        # every test runs in a worker process with a timeout and loads the current tools.py, see ToolTestRunner
         try:
-            tool = Tool(**eval(self.arguments))
-        except Exception as e:
+            arguments = parse_arguments(self.arguments)
+        except ValueError as e:
             return f"Error initializing tool with arguments {self.arguments}. Error: {e}"
 
-        output = tool.run()
-
-        if not output:
-            raise ValueError(f"Tool {self.tool_name} did not return any output.")
-
-        return "Successfully initialized and ran tool. Output: " + output
+        runner = get_tool_test_runner()
+        if isinstance(arguments, list):
+            return format_report(self.tool_name, runner.run_matrix("tools.py", self.tool_name, arguments))
+
+        result = runner.run("tools.py", self.tool_name, arguments)
+        if result["status"] == "ok":
+            return "Successfully initialized and ran tool. Output: " + result["output"]
+        if result["status"] == "not_found":
+            return result["error"]
+        if result["status"] == "invalid_arguments":
+            return f"Error initializing tool with arguments {self.arguments}. Error: {result['error']}"
+        if result["status"] == "no_output":
+            raise ValueError(result["error"])
+        return f"Error running tool {self.tool_name} ({result['status']}): {result['error']}"
 
     @model_validator(mode="after")
     def validate_tool_name(self):
@@ -1 +1,4 @@
-from .get_modules import get_modules
\ No newline at end of file
+from .get_modules import get_modules, get_module_files
+from .catalog import Catalog, CatalogEntry, get_catalog
+from .tool_runner import ToolTestRunner, get_tool_test_runner, format_report, parse_arguments
+from .finalize import find_agent_classes, finalize_agency_source
@@ -0,0 +1,187 @@
+import ast
+import os
+import threading
+from typing import Dict, List, Optional
+
+from .get_modules import get_module_files
+
+AGENT_BASES = {"Agent"}
+TOOL_BASES = {"BaseTool", "OpenAISchema"}
+STRING_METHODS = {"replace", "strip", "lstrip", "rstrip"}
+
+
+class CatalogEntry:
+    """
+    What the catalog knows about one agent or tool class, read from its source file.
+
+    Attributes:
+    name (str): Name of the class.
+    kind (str): "agent" or "tool".
+    module (str): Module to import the class from.
+    path (str): Source file of the class.
+    description (str): Default description of an agent, or docstring of a tool.
+    tools (List[str]): Tools an agent adds to itself.
+    fields (Dict[str, str]): Fields of a tool and their descriptions.
+    """
+
+    def __init__(self, name: str, kind: str, module: str, path: str, description: str = "", tools: List[str] = None,
+                 fields: Dict[str, str] = None):
+        self.name = name
+        self.kind = kind
+        self.module = module
+        self.path = path
+        self.description = description
+        self.tools = tools if tools else []
+        self.fields = fields if fields else {}
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class Catalog:
+    """
+    Index of the agent and tool classes of a package, built from their source files with the ast module, so listing
+    and looking up classes never imports a module or instantiates an agent. The entries of a file are parsed again
+    when its modification time changes; files added or removed are picked up on the next query.
+
+    Parameters:
+    package (str): The package to index, e.g. "agency_swarm.agents".
+    """
+
+    def __init__(self, package: str):
+        self.package = package
+        self._files = {}  # path -> (mtime, entries)
+        self._lock = threading.Lock()
+
+    def entries(self, kind: str = None) -> List[CatalogEntry]:
+        entries = []
+        with self._lock:
+            module_files = get_module_files(self.package)
+            paths = {path for _, path in module_files}
+            for path in [path for path in self._files if path not in paths]:
+                del self._files[path]
+            for module, path in module_files:
+                entries.extend(self._file_entries(module, path))
+        return [entry for entry in entries if kind is None or entry.kind == kind]
+
+    def names(self, kind: str = None) -> List[str]:
+        return [entry.name for entry in self.entries(kind)]
+
+    def get(self, name: str, kind: str = None) -> Optional[CatalogEntry]:
+        return next((entry for entry in self.entries(kind) if entry.name == name), None)
+
+    def _file_entries(self, module: str, path: str) -> List[CatalogEntry]:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        cached = self._files.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, parse_classes(module, path))
+            self._files[path] = cached
+        return cached[1]
+
+
+def parse_classes(module: str, path: str) -> List[CatalogEntry]:
+    """Returns the agent and tool classes defined in a source file."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return []
+
+    entries = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = {_name(base) for base in node.bases}
+        if bases & AGENT_BASES:
+            description, tools = _agent_defaults(node)
+            entries.append(CatalogEntry(node.name, "agent", module, path,
+                                        description or ast.get_docstring(node) or "", tools=tools))
+        elif bases & TOOL_BASES:
+            entries.append(CatalogEntry(node.name, "tool", module, path, ast.get_docstring(node) or "",
+                                        fields=_tool_fields(node)))
+    return entries
+
+
+def _agent_defaults(node: ast.ClassDef):
+    # agents set their defaults in __init__: kwargs['description'] = "...", kwargs['tools'].extend([...]),
+    # or super().__init__(description="...", tools=[...])
+    description, tools = None, []
+    for child in ast.walk(node):
+        if isinstance(child, ast.Assign) and len(child.targets) == 1 \
+                and _kwargs_key(child.targets[0]) == "description":
+            description = _string(child.value) or description
+        elif isinstance(child, ast.Call):
+            function = child.func
+            if isinstance(function, ast.Attribute) and function.attr in ("extend", "append") \
+                    and _kwargs_key(function.value) == "tools":
+                for argument in child.args:
+                    tools.extend(_names(argument))
+            if isinstance(function, ast.Attribute) and function.attr == "__init__":
+                for keyword in child.keywords:
+                    if keyword.arg == "description":
+                        description = _string(keyword.value) or description
+                    elif keyword.arg == "tools":
+                        tools.extend(_names(keyword.value))
+    return description, tools
+
+
+def _tool_fields(node: ast.ClassDef) -> Dict[str, str]:
+    fields = {}
+    for child in node.body:
+        if isinstance(child, ast.AnnAssign) and isinstance(child.target, ast.Name):
+            description = ""
+            if isinstance(child.value, ast.Call):
+                for keyword in child.value.keywords:
+                    if keyword.arg == "description":
+                        description = _string(keyword.value) or ""
+            fields[child.target.id] = description
+    return fields
+
+
+def _kwargs_key(node) -> Optional[str]:
+    # the key of kwargs['key']
+    if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "kwargs":
+        return _string(node.slice)
+    return None
+
+
+def _string(node) -> Optional[str]:
+    # a string constant, also when concatenated or cleaned up with .replace("\n", "") or .strip()
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left, right = _string(node.left), _string(node.right)
+        return left + right if left is not None and right is not None else None
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in STRING_METHODS:
+        value = _string(node.func.value)
+        arguments = [_string(argument) for argument in node.args]
+        if value is not None and None not in arguments:
+            return getattr(value, node.func.attr)(*arguments)
+    return None
+
+
+def _name(node) -> str:
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return node.id if isinstance(node, ast.Name) else ""
+
+
+def _names(node) -> List[str]:
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [_name(element) for element in node.elts if _name(element)]
+    return [_name(node)] if _name(node) else []
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(package: str = "agency_swarm.agents") -> Catalog:
+    """The shared catalog of a package, e.g. get_catalog().get("BrowsingAgent").description."""
+    with _catalogs_lock:
+        if package not in _catalogs:
+            _catalogs[package] = Catalog(package)
+        return _catalogs[package]
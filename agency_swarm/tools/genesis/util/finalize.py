@@ -0,0 +1,116 @@
+import ast
+import builtins
+import os
+from typing import Dict, List
+
+from .catalog import parse_classes
+
+
+def find_agent_classes(agency_folder: str) -> Dict[str, str]:
+    """
+    Returns {class name: folder} of the agents in an agency folder, as created by create_agent_template: a folder
+    per agent whose module of the same name defines an Agent subclass.
+    """
+    classes = {}
+    for folder in sorted(os.listdir(agency_folder)):
+        path = os.path.join(agency_folder, folder, folder + ".py")
+        if os.path.isfile(path):
+            for entry in parse_classes(folder, path):
+                if entry.kind == "agent":
+                    classes[entry.name] = folder
+    return classes
+
+
+def finalize_agency_source(source: str, agent_classes: Dict[str, str]) -> str:
+    """
+    Adds the imports and instances of the agents that agency.py uses but does not define, e.g. `ceo` in the agency
+    chart becomes `from CEO import CEO` and `ceo = CEO()`. The rest of the file is kept as it is.
+
+    Raises SyntaxError if the file does not parse, and ValueError if a name can't be matched to one agent class.
+    """
+    tree = ast.parse(source)
+    defined = _defined_names(tree)
+    missing = [name for name in _used_names(tree) if name not in defined and not hasattr(builtins, name)]
+
+    imports, instances = [], []
+    for name in missing:
+        if name == "Agency":
+            imports.append("from agency_swarm import Agency")
+            continue
+        if name in agent_classes:  # a class used directly, e.g. Agency([CEO(), ...])
+            imports.append(f"from {agent_classes[name]} import {name}")
+            continue
+        class_name = _match_class(name, agent_classes)
+        if class_name not in defined and f"from {agent_classes[class_name]} import {class_name}" not in imports:
+            imports.append(f"from {agent_classes[class_name]} import {class_name}")
+        instances.append(f"{name} = {class_name}()")
+    if not imports and not instances:
+        return source
+
+    lines = source.splitlines()
+    statements = tree.body
+    last_import = max([node.end_lineno for node in statements if isinstance(node, (ast.Import, ast.ImportFrom))],
+                      default=_docstring_end(tree))
+    first_use = min([node.lineno for node in statements if _uses(node, set(missing))], default=len(lines) + 1)
+    if first_use <= last_import:
+        raise ValueError("The agents are used before the imports of agency.py.")
+
+    # imports after the existing ones, instances right before the first statement that uses them
+    block = instances + [""] if instances else []
+    if block and (first_use - 2 < last_import or lines[first_use - 2].strip()):
+        block.insert(0, "")
+    if imports and last_import < len(lines) and lines[last_import].strip() \
+            and not (block and first_use - 1 == last_import):
+        imports.append("")
+    lines = lines[:last_import] + imports + lines[last_import:first_use - 1] + block + lines[first_use - 1:]
+    finalized = "\n".join(lines) + ("\n" if source.endswith("\n") else "")
+    ast.parse(finalized)
+    return finalized
+
+
+def _match_class(name: str, agent_classes: Dict[str, str]) -> str:
+    # ceo -> CEO, news_analysis -> NewsAnalysisAgent, price_tracking_agent -> PriceTrackingAgent
+    def keys(text):
+        text = text.replace("_", "").lower()
+        return {text, text[:-len("agent")]} if text.endswith("agent") and text != "agent" else {text}
+
+    matches = [class_name for class_name in agent_classes if keys(class_name) & keys(name)]
+    if len(matches) != 1:
+        found = f"matches {', '.join(matches)}" if matches else "matches none"
+        raise ValueError(f"'{name}' {found} of the agents: {', '.join(agent_classes) or 'none'}.")
+    return matches[0]
+
+
+def _defined_names(tree: ast.Module) -> set:
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+    return names
+
+
+def _used_names(tree: ast.Module) -> List[str]:
+    # in the order of their first use in the file
+    positions = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            position = (node.lineno, node.col_offset)
+            positions[node.id] = min(positions.get(node.id, position), position)
+    return sorted(positions, key=positions.get)
+
+
+def _uses(node: ast.AST, names: set) -> bool:
+    return any(isinstance(child, ast.Name) and child.id in names for child in ast.walk(node))
+
+
+def _docstring_end(tree: ast.Module) -> int:
+    if tree.body and isinstance(tree.body[0], ast.Expr) and isinstance(tree.body[0].value, ast.Constant) \
+            and isinstance(tree.body[0].value.value, str):
+        return tree.body[0].end_lineno
+    return 0
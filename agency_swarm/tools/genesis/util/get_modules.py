@@ -1,47 +1,61 @@
-import importlib.resources
+import importlib.util
 import pathlib
 
 
-def get_modules(module_name):
+def get_module_files(module_name):
     """
-    Get all submodule names from a given module based on file names, without importing them,
+    Get all submodules of a given module with their file paths, without importing them (nor the module itself),
     excluding those containing '.agent' or '.genesis' in their paths.
 
     Args:
     - module_name: The name of the module to search through.
 
     Returns:
-    - A list of submodule names found within the given module.
+    - A list of (submodule name, file path) tuples found within the given module.
     """
-    submodule_names = []
-
     try:
-        # Using importlib.resources to access the package contents
-        with importlib.resources.path(module_name, '') as package_path:
-            # Walk through the package directory using pathlib
-            for path in pathlib.Path(package_path).rglob('*.py'):
-                if path.name != '__init__.py':
-                    # Construct the module name from the file path
-                    relative_path = path.relative_to(package_path)
-                    module_path = '.'.join(relative_path.with_suffix('').parts)
-
-                    submodule_names.append(f"{module_name}.{module_path}")
-
+        spec = importlib.util.find_spec(module_name)
     except ImportError:
+        spec = None
+    if spec is None or not spec.submodule_search_locations:
         print(f"Module {module_name} not found.")
-        return submodule_names
-
-    submodule_names = [name for name in submodule_names if not name.endswith(".agent") and
-                       '.genesis' not in name and
-                       'util' not in name and
-                       'oai' not in name and
-                       'ToolFactory' not in name and
-                       'BaseTool' not in name]
+        return []
+
+    module_files = []
+    for package_path in spec.submodule_search_locations:
+        # Walk through the package directory using pathlib
+        for path in sorted(pathlib.Path(package_path).rglob('*.py')):
+            if path.name != '__init__.py':
+                # Construct the module name from the file path
+                relative_path = path.relative_to(package_path)
+                module_path = '.'.join(relative_path.with_suffix('').parts)
+                module_files.append((f"{module_name}.{module_path}", str(path)))
+
+    module_files = [(name, path) for name, path in module_files if not name.endswith(".agent") and
+                    '.genesis' not in name and
+                    'util' not in name and
+                    'oai' not in name and
+                    'ToolFactory' not in name and
+                    'BaseTool' not in name]
 
     # remove repetition at the end of the path like 'agency_swarm.agents.coding.CodingAgent.CodingAgent'
-    for i in range(len(submodule_names)):
-        splitted = submodule_names[i].split(".")
+    for i, (name, path) in enumerate(module_files):
+        splitted = name.split(".")
         if splitted[-1] == splitted[-2]:
-            submodule_names[i] = ".".join(splitted[:-1])
+            module_files[i] = (".".join(splitted[:-1]), path)
+
+    return module_files
+
+
+def get_modules(module_name):
+    """
+    Get all submodule names from a given module based on file names, without importing them,
+    excluding those containing '.agent' or '.genesis' in their paths.
+
+    Args:
+    - module_name: The name of the module to search through.
 
-    return submodule_names
+    Returns:
+    - A list of submodule names found within the given module.
+    """
+    return [name for name, _ in get_module_files(module_name)]
@@ -0,0 +1,310 @@
+import ast
+import atexit
+import collections
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Union
+
+try:
+    import resource
+except ImportError:  # Windows: no memory limit
+    resource = None
+
+MAX_OUTPUT_CHARS = 2000
+STDERR_TAIL_LINES = 20
+_WORKER_CODE = "from agency_swarm.tools.genesis.util.tool_runner import worker_main; worker_main()"
+
+
+def parse_arguments(arguments: Union[str, dict, list, None]):
+    """
+    Parses the arguments of a tool test: a JSON object, or a list of them for a matrix of tests. Python literals
+    (single quotes, True/None) are accepted too, if they have a JSON equivalent; nothing is evaluated. Raises
+    ValueError for anything else.
+    """
+    if arguments is None or isinstance(arguments, (dict, list)):
+        return arguments or {}
+    if not arguments.strip():
+        return {}
+    try:
+        try:
+            value = json.loads(arguments)
+        except ValueError:
+            value = ast.literal_eval(arguments)
+            json.dumps(value)  # the test is sent to the worker as JSON: no bytes, sets or complex numbers
+    # literal_eval also fails with e.g. TypeError for {[1]: 2}, and with RecursionError for deeply nested input
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError) as e:
+        raise ValueError(f"{type(e).__name__}: {e}") from e
+    if isinstance(value, dict) or isinstance(value, list) and all(isinstance(item, dict) for item in value):
+        return value
+    raise ValueError("Arguments must be an object, or a list of objects.")
+
+
+def _clip(text: str) -> str:
+    if len(text) > MAX_OUTPUT_CHARS:
+        return f"{text[:MAX_OUTPUT_CHARS]}... [{len(text) - MAX_OUTPUT_CHARS} chars truncated]"
+    return text
+
+
+# --- Worker process ---
+
+def worker_main():
+    """Serves tool tests read as JSON lines from stdin. Started by ToolTestRunner."""
+    memory_limit_mb = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1] != "0" else None
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    # results go through the original stdout; whatever the tools write to it goes to stderr instead
+    results = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+
+    import agency_swarm.tools  # noqa: F401  warm: pydantic, instructor and openai are imported once per worker
+    warm_path = list(sys.path)
+    cwd = os.getcwd()
+    results.write(json.dumps({"ready": True}) + "\n")
+    results.flush()
+
+    for line in sys.stdin:
+        test = json.loads(line)
+        result = _run_test(test)
+        results.write(json.dumps(result) + "\n")
+        results.flush()
+        # the next test loads tools.py, and the local modules it imports, afresh. Installed packages stay loaded,
+        # extension modules can't be imported twice.
+        directory = os.path.dirname(test["path"]) + os.sep
+        for name, module in list(sys.modules.items()):
+            if name == "tools" or (getattr(module, "__file__", None) or "").startswith(directory):
+                del sys.modules[name]
+        sys.path[:] = warm_path
+        os.chdir(cwd)
+
+
+def _run_test(test: dict) -> dict:
+    started = time.monotonic()
+    result = {"arguments": test["arguments"], "status": "ok", "output": "", "stdout": ""}
+    directory = os.path.dirname(test["path"])
+    stdout = io.StringIO()
+    try:
+        os.chdir(directory)
+        sys.path.insert(0, directory)
+        with contextlib.redirect_stdout(stdout):
+            spec = importlib.util.spec_from_file_location("tools", test["path"])
+            module = importlib.util.module_from_spec(spec)
+            sys.modules["tools"] = module
+            spec.loader.exec_module(module)
+
+            tool_class = getattr(module, test["tool_name"], None)
+            if tool_class is None:
+                result.update(status="not_found", error=f"Tool {test['tool_name']} not found in tools.py file.")
+                return result
+            try:
+                tool = tool_class(**test["arguments"])
+            except Exception as e:
+                result.update(status="invalid_arguments", error=_clip(str(e)))
+                return result
+            output = tool.run()
+        if output:
+            result["output"] = _clip(str(output))
+        else:
+            result.update(status="no_output", error=f"Tool {test['tool_name']} did not return any output.")
+    except BaseException as e:  # includes MemoryError and SystemExit raised by the tool
+        result.update(status="error", error=_clip(traceback.format_exc(limit=-3) if not isinstance(e, MemoryError)
+                                                  else "MemoryError: the tool exceeded the memory limit."))
+    finally:
+        result["stdout"] = _clip(stdout.getvalue())
+        result["duration"] = round(time.monotonic() - started, 3)
+    return result
+
+
+# --- Runner ---
+
+class _Worker:
+    def __init__(self, memory_limit_mb: int):
+        import agency_swarm
+        import openai
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(agency_swarm.__file__)))
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [package_root,
+                                                                          os.environ.get("PYTHONPATH")]))}
+        if openai.api_key:  # set with set_openai_key(), tools that call the API read it from the environment
+            env["OPENAI_API_KEY"] = openai.api_key
+        self.process = subprocess.Popen([sys.executable, "-c", _WORKER_CODE, str(memory_limit_mb or 0)],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                        env=env, text=True, encoding="utf-8", errors="replace")
+        self.ready = threading.Event()
+        self.results = queue.Queue()
+        # the last lines of stderr tell why a worker died
+        self.stderr_tail = collections.deque(maxlen=STDERR_TAIL_LINES)
+        threading.Thread(target=self._read, daemon=True).start()
+        self._stderr_reader = threading.Thread(target=self._read_stderr, daemon=True)
+        self._stderr_reader.start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            message = json.loads(line)
+            if message.get("ready"):
+                self.ready.set()
+            else:
+                self.results.put(message)
+        self.ready.set()
+        self.results.put(None)  # the worker exited
+
+    def _read_stderr(self):
+        for line in self.process.stderr:
+            self.stderr_tail.append(line.rstrip("\n"))
+
+    def exit_reason(self) -> str:
+        """The exit code and last lines of stderr of a worker that died."""
+        try:
+            code = self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            code = None
+        self._stderr_reader.join(timeout=1)
+        reason = f"The worker process died (exit code {code}), e.g. it ran out of memory."
+        tail = "\n".join(self.stderr_tail)
+        return _clip(f"{reason}\n{tail}") if tail else reason
+
+    def run(self, test: dict, timeout: float) -> dict:
+        self.process.stdin.write(json.dumps(test) + "\n")
+        self.process.stdin.flush()
+        result = self.results.get(timeout=timeout)
+        if result is None:
+            raise EOFError("The worker exited.")
+        return result
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self._stderr_reader.join(timeout=1)
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.stderr.close()
+
+
+class ToolTestRunner:
+    """
+    Runs tests of the tools in a tools.py file in a pool of worker processes. Each test loads the file afresh, so
+    edits are picked up, and a test that hangs, crashes or uses too much memory only costs its worker, which is
+    replaced.
+
+    Parameters:
+    workers (int, optional): Worker processes, i.e. tests run at the same time. Defaults to 4.
+    timeout (float, optional): Seconds after which a test is abandoned and its worker killed. Defaults to 30.
+    memory_limit_mb (int, optional): Address space limit of a worker (POSIX only), None for no limit. Defaults to 2048.
+    """
+
+    def __init__(self, workers: int = 4, timeout: float = 30, memory_limit_mb: int = 2048):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._idle = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def warm_up(self, count: int = None, wait: bool = True):
+        """Starts workers ahead of the first tests (all of them by default), and waits until they are ready."""
+        started = []
+        with self._lock:
+            while self._started < min(count or self.workers, self.workers):
+                self._started += 1
+                started.append(_Worker(self.memory_limit_mb))
+                self._idle.put(started[-1])
+        for worker in started if wait else []:
+            worker.ready.wait(self.timeout)
+
+    def run(self, path: str, tool_name: str, arguments: dict = None) -> dict:
+        """
+        Runs one test. Returns {"arguments", "status", "output", "stdout", "duration"} and "error" if it failed.
+        status is one of ok, no_output, not_found, invalid_arguments, error, timeout or crashed.
+        """
+        test = {"path": os.path.abspath(path), "tool_name": tool_name, "arguments": arguments or {}}
+        worker = self._checkout()
+        try:
+            return worker.run(test, self.timeout)
+        except queue.Empty:
+            self._replace(worker)
+            worker = None
+            return {"arguments": test["arguments"], "status": "timeout", "output": "", "stdout": "",
+                    "error": f"The tool did not finish within {self.timeout} seconds.", "duration": self.timeout}
+        except (EOFError, OSError):
+            error = worker.exit_reason()
+            self._replace(worker)
+            worker = None
+            return {"arguments": test["arguments"], "status": "crashed", "output": "", "stdout": "",
+                    "error": error, "duration": None}
+        finally:
+            # also when the test could not be sent, e.g. arguments that are not JSON serializable
+            if worker is not None:
+                self._idle.put(worker)
+
+    def run_matrix(self, path: str, tool_name: str, argument_sets: List[dict]) -> List[dict]:
+        """Runs the tool with each argument set, in parallel. Results are in the order of `argument_sets`."""
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(argument_sets)))) as executor:
+            return list(executor.map(lambda arguments: self.run(path, tool_name, arguments), argument_sets))
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    self._idle.get_nowait().stop()
+                except queue.Empty:
+                    break
+            self._started = 0
+
+    def _checkout(self) -> _Worker:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The tool test runner is closed.")
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                if self._started < self.workers:
+                    self._started += 1
+                    return _Worker(self.memory_limit_mb)
+        return self._idle.get()
+
+    def _replace(self, worker: _Worker):
+        worker.stop()
+        with self._lock:
+            if self._closed:
+                return
+            self._idle.put(_Worker(self.memory_limit_mb))
+
+
+def format_report(tool_name: str, results: List[dict]) -> str:
+    """One line per test, and the output or error of each, e.g. for the agent that wrote the tool."""
+    passed = sum(result["status"] == "ok" for result in results)
+    lines = [f"{tool_name}: {passed}/{len(results)} passed"]
+    for index, result in enumerate(results, 1):
+        arguments = json.dumps(result["arguments"], ensure_ascii=False)
+        lines.append(f"[{index}] {result['status']} ({result['duration']}s) {arguments}")
+        detail = result.get("error") or result["output"]
+        if detail:
+            lines.append("    " + detail.replace("\n", "\n    "))
+    return "\n".join(lines)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_tool_test_runner() -> ToolTestRunner:
+    """The runner shared by the TestTool calls of all agents. Its workers are stopped at exit."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = ToolTestRunner()
+            atexit.register(_runner.close)
+        return _runner
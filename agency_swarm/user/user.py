@@ -2,7 +2,8 @@ import uuid
 class User:
     name: str = "User"
 
-    def __init__(self, name: str = None):
+    def __init__(self, name: str = None, user_id: str = None):
         # later, we can add more attributes to the user like bio, etc
         self.uuid = uuid.uuid4()
-        pass
+        # threads created for this user are scoped by user_id, so each user only sees their own conversations
+        self.user_id = user_id if user_id else str(self.uuid)
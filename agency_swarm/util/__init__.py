@@ -1,3 +1,34 @@
-from .create_agent_template import create_agent_template
-from .oai import set_openai_key, get_openai_client, set_openai_client
-from .log_config import setup_logging
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from .create_agent_template import create_agent_template  # same name as its module, see lazy_exports
+from .lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .oai import set_openai_key, get_openai_client, set_openai_client
+    from .log_config import setup_logging
+    from .rate_limiter import set_rate_limits, request_priority, request_model, RequestPriority
+    from .usage import set_usage_budget, usage_context, get_usage_tracker, UsageBudget, BudgetExceededError
+    from .cassette import record_openai_traffic, ReplayClient
+    from .http_pool import configure_http_pool, get_http_pool, get_async_http_pool, run_coroutine
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "set_openai_key": ".oai",
+    "get_openai_client": ".oai",
+    "set_openai_client": ".oai",
+    "setup_logging": ".log_config",
+    "set_rate_limits": ".rate_limiter",
+    "request_priority": ".rate_limiter",
+    "request_model": ".rate_limiter",
+    "RequestPriority": ".rate_limiter",
+    "set_usage_budget": ".usage",
+    "usage_context": ".usage",
+    "get_usage_tracker": ".usage",
+    "UsageBudget": ".usage",
+    "BudgetExceededError": ".usage",
+    "record_openai_traffic": ".cassette",
+    "ReplayClient": ".cassette",
+    "configure_http_pool": ".http_pool",
+    "get_http_pool": ".http_pool",
+    "get_async_http_pool": ".http_pool",
+    "run_coroutine": ".http_pool",
+})
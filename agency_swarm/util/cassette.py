@@ -0,0 +1,270 @@
+"""
+Record/replay of OpenAI traffic. A cassette is a JSONL file (gzip compressed if the name ends with .gz) with one line
+per call made through get_openai_client():
+
+    {"seq": 0, "path": "beta.threads.runs.create", "key": "...", "offset": 0.0, "duration": 0.41,
+     "request": {...}, "type": "openai.types.beta.threads.run.Run", "response": {...}}
+
+Recording:  recorder = record_openai_traffic("turns.jsonl.gz") ... recorder.close()
+Replaying:  set_openai_client(ReplayClient("turns.jsonl.gz", speed=2.0))
+"""
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import statistics
+import threading
+import time
+from collections import OrderedDict
+
+from .oai import add_client_hook, remove_client_hook
+
+
+class CassetteMismatch(Exception):
+    pass
+
+
+class ReplayedError(Exception):
+    """An error recorded in a cassette, raised again on replay."""
+
+    def __init__(self, message: str, error_type: str = None, status_code: int = None):
+        super().__init__(message)
+        self.error_type = error_type
+        self.status_code = status_code
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, mode + "b"), encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _to_json(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items() if type(v).__name__ != "NotGiven"}
+    if isinstance(value, (list, tuple, set)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, bytes):
+        return {"bytes": len(value)}
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if hasattr(value, "read"):
+        return {"file": str(getattr(value, "name", "upload"))}
+    if isinstance(value, type):
+        return value.__name__
+    return repr(value)
+
+
+def request_key(path: str, request: dict) -> str:
+    canonical = json.dumps({"path": path, "request": request}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+def _serialize_response(response):
+    if hasattr(response, "model_dump") and not _is_page(response):
+        return f"{type(response).__module__}.{type(response).__qualname__}", response.model_dump(mode="json")
+    if _is_page(response):
+        items = response.data
+        item_type = f"{type(items[0]).__module__}.{type(items[0]).__qualname__}" if items else None
+        return "page", {"item_type": item_type, "data": [_to_json(item) for item in items],
+                        "has_more": bool(getattr(response, "has_more", False))}
+    return None, _to_json(response)
+
+
+def _is_page(response):
+    return isinstance(getattr(response, "data", None), list) and hasattr(response, "_get_page_items")
+
+
+_types = {}
+
+
+def _load_type(name):
+    if name not in _types:
+        module, _, qualname = name.rpartition(".")
+        _types[name] = getattr(importlib.import_module(module), qualname)
+    return _types[name]
+
+
+class ReplayedPage:
+    def __init__(self, data, has_more=False):
+        self.data = data
+        self.has_more = has_more
+
+    def _get_page_items(self):
+        return self.data
+
+    def __iter__(self):
+        return iter(self.data)
+
+
+def _deserialize_response(type_name, payload):
+    if type_name is None:
+        return payload
+    if type_name == "page":
+        item_type = _load_type(payload["item_type"]) if payload["item_type"] else None
+        data = [item_type.model_validate(item) if item_type else item for item in payload["data"]]
+        return ReplayedPage(data, payload["has_more"])
+    return _load_type(type_name).model_validate(payload)
+
+
+class CassetteRecorder:
+    """
+    Client hook that appends every call, with its request, response or error and timing, to a cassette. Install it
+    with record_openai_traffic().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = _open(path, "a")
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._origin = time.monotonic()
+
+    def before_call(self, call):
+        call.context["cassette_request"] = {"args": _to_json(call.args), "kwargs": _to_json(call.kwargs)}
+
+    def after_call(self, call, response=None, error=None):
+        request = call.context.get("cassette_request")
+        if request is None:
+            return
+        entry = {
+            "path": call.path,
+            "key": request_key(call.path, request),
+            "offset": round((call.started_at or time.monotonic()) - self._origin, 6),
+            "duration": round(call.duration or 0.0, 6),
+            "request": request,
+        }
+        if error is not None:
+            entry["error"] = {"type": type(error).__name__, "message": str(error),
+                              "status_code": getattr(error, "status_code", None)}
+        else:
+            entry["type"], entry["response"] = _serialize_response(response)
+
+        with self._lock:
+            if self._file is None:
+                return
+            entry = {"seq": self._seq, **entry}
+            self._seq += 1
+            self._file.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        remove_client_hook(self)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def record_openai_traffic(path: str) -> CassetteRecorder:
+    """Starts recording every call made through get_openai_client() to the cassette at `path`."""
+    recorder = CassetteRecorder(path)
+    add_client_hook(recorder)
+    return recorder
+
+
+def load_cassette(path: str):
+    with _open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayClient:
+    """
+    Serves the calls of a cassette back in place of the OpenAI client.
+
+    Parameters:
+    path (str): The cassette to replay.
+    speed (float, optional): None replays without delay; 1.0 waits the recorded duration of each call, 2.0 half of it,
+        and so on. Defaults to None.
+    strict (bool, optional): Only serve calls whose request matches a recording exactly. If False, a call without an
+        exact match gets the next unserved recording of the same endpoint, so changed orchestration code (different
+        prompts, merged messages, ...) can still be replayed. Defaults to False.
+    """
+
+    def __init__(self, path: str, speed: float = None, strict: bool = False):
+        self.api_key = "replay"
+        self.speed = speed
+        self.strict = strict
+        self.served = []  # (path, recorded duration, replay duration) of every served call
+        self._lock = threading.Lock()
+        self._queues = {}  # call path -> OrderedDict(line number -> entry) of unserved recordings
+        for index, entry in enumerate(load_cassette(path)):
+            entry["index"] = index
+            self._queues.setdefault(entry["path"], OrderedDict())[index] = entry
+        self._paths = set(self._queues)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _ReplayResource(self, "")._child(name)
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _replay(self, path, args, kwargs):
+        started = time.monotonic()
+        request = {"args": _to_json(args), "kwargs": _to_json(kwargs)}
+        key = request_key(path, request)
+        with self._lock:
+            queue = self._queues.get(path) or OrderedDict()
+            entry = next((e for e in queue.values() if e["key"] == key), None)
+            if entry is None and not self.strict and queue:
+                entry = next(iter(queue.values()))
+            if entry is None:
+                raise CassetteMismatch(f"No recorded call left for {path} with request {request}.")
+            del queue[entry["index"]]
+
+        if self.speed:
+            time.sleep(entry["duration"] / self.speed)
+        self.served.append((path, entry["duration"], time.monotonic() - started))
+        if "error" in entry:
+            error = entry["error"]
+            raise ReplayedError(error["message"], error["type"], error["status_code"])
+        return _deserialize_response(entry["type"], entry["response"])
+
+
+class _ReplayResource:
+    _is_api_resource = True
+
+    def __init__(self, client: ReplayClient, path: str):
+        self._client = client
+        self._path = path
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._child(name)
+
+    def _child(self, name):
+        path = f"{self._path}.{name}" if self._path else name
+        if any(recorded.startswith(path + ".") for recorded in self._client._paths):
+            return _ReplayResource(self._client, path)
+
+        def method(*args, **kwargs):
+            return self._client._replay(path, args, kwargs)
+
+        method.__name__ = name
+        return method
+
+
+def latency_profile(durations):
+    """
+    Summarizes call durations per endpoint: {path: {"calls", "total", "p50", "p95"}}. Accepts cassette entries or
+    the `served` list of a ReplayClient.
+    """
+    by_path = {}
+    for item in durations:
+        path, duration = (item["path"], item["duration"]) if isinstance(item, dict) else (item[0], item[-1])
+        by_path.setdefault(path, []).append(duration)
+    profile = {}
+    for path, values in sorted(by_path.items()):
+        values.sort()
+        profile[path] = {"calls": len(values), "total": round(sum(values), 6),
+                         "p50": round(statistics.median(values), 6),
+                         "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 6)}
+    return profile
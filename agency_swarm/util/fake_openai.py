@@ -0,0 +1,668 @@
+"""
+In-process fake of the OpenAI endpoints used by agency-swarm (assistants, threads, messages, runs, files and chat
+completions), for load testing the orchestration layer without network:
+
+    fake = FakeOpenAI(run_duration=uniform(0.05, 0.2), responders={"CEO": scripted(tool_call("SendMessage", ...), "Done")})
+    set_openai_client(fake)
+    Session.poll_interval = 0.01
+
+Runs advance with wall-clock time: a run stays "in_progress" for `run_duration` seconds per step and then resolves
+through the responder of its assistant, either to a text reply or to tool calls ("requires_action"). FakeOpenAIServer
+serves the same fake over localhost HTTP for clients that cannot be swapped in process.
+"""
+import copy
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Union
+from urllib.parse import urlparse, parse_qs
+
+from openai.types import FileObject, FileDeleted
+from openai.types.beta import Assistant, AssistantDeleted, Thread, ThreadDeleted
+from openai.types.beta.threads import Run, ThreadMessage
+from openai.types.chat import ChatCompletion
+
+# content limit of a message, as enforced by the Assistants API
+MAX_MESSAGE_CHARS = 32768
+
+
+# --- Latency distributions ---
+
+_random = random.Random()
+
+
+def constant(seconds: float) -> Callable[[], float]:
+    return lambda: seconds
+
+
+def uniform(low: float, high: float, rng: random.Random = None) -> Callable[[], float]:
+    rng = rng or _random
+    return lambda: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5, rng: random.Random = None) -> Callable[[], float]:
+    """Long-tailed latency, like real API calls: half the samples are below `median`."""
+    rng = rng or _random
+    return lambda: rng.lognormvariate(math.log(median), sigma)
+
+
+# --- Scripted behaviour ---
+
+class RunContext:
+    """What a responder knows when a run step resolves."""
+
+    def __init__(self, assistant: Assistant, thread_id: str, run_id: str, messages: List[ThreadMessage],
+                 tool_outputs: List[dict], step: int):
+        self.assistant = assistant
+        self.thread_id = thread_id
+        self.run_id = run_id
+        self.messages = messages  # oldest first
+        self.tool_outputs = tool_outputs  # outputs submitted during this run so far
+        self.step = step  # 0 for the first resolution of the run, 1 after the first tool outputs, ...
+
+    @property
+    def last_user_message(self) -> str:
+        for message in reversed(self.messages):
+            if message.role == "user":
+                return "\n".join(part.text.value for part in message.content if part.type == "text")
+        return ""
+
+
+class RunFailed:
+    """Responder result that fails the run."""
+
+    def __init__(self, message: str = "Fake failure.", code: str = "server_error"):
+        self.message = message
+        self.code = code
+
+
+def tool_call(name: str, **arguments) -> dict:
+    return {"name": name, "arguments": arguments}
+
+
+def echo(context: RunContext):
+    return f"Echo: {context.last_user_message}"
+
+
+def scripted(*steps):
+    """
+    Responder that plays `steps` in order within each run: a step is a reply text, a tool_call(), a list of
+    tool_call()s, a RunFailed, or a callable taking the RunContext. The last step is repeated if the run goes on.
+    """
+    def respond(context: RunContext):
+        step = steps[min(context.step, len(steps) - 1)]
+        return step(context) if callable(step) else step
+
+    return respond
+
+
+def example_arguments(schema: dict, defs: dict = None):
+    """Builds valid arguments for a JSON schema, used to answer function calls of chat completions."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return example_arguments(defs[schema["$ref"].split("/")[-1]], defs)
+    if "allOf" in schema:
+        return example_arguments(schema["allOf"][0], defs)
+    if "anyOf" in schema:
+        return example_arguments(schema["anyOf"][0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "default" in schema:
+        return schema["default"]
+    kind = schema.get("type", "object")
+    if kind == "object":
+        return {name: example_arguments(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    return {"array": [], "string": "fake", "integer": 1, "number": 0, "boolean": False, "null": None}.get(kind)
+
+
+# --- Fake client ---
+
+class NotFoundError(Exception):
+    status_code = 404
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+class FakePage:
+    def __init__(self, data, has_more=False):
+        self.data = data
+        self.has_more = has_more
+
+    def _get_page_items(self):
+        return self.data
+
+    def __iter__(self):
+        return iter(self.data)
+
+
+class FakeOpenAI:
+    """
+    Parameters:
+    responders (Dict[str, Callable]): Responder per assistant name, see scripted(). Defaults to {}.
+    default_responder (Callable, optional): Responder of assistants without their own. Defaults to echo.
+    chat_responder (Callable, optional): Called with the kwargs of chat.completions.create, returns the reply text or,
+        for function calls, the arguments dict. Defaults to a text reply, or example_arguments() of the called function.
+    run_duration (Union[float, Callable], optional): Seconds a run spends in progress per step. Defaults to 0.
+    latency (Dict[str, Union[float, Callable]], optional): Added latency per call, keyed by the end of the call path
+        (e.g. "runs.create", "chat.completions.create") or "*" for all calls. Defaults to none.
+    """
+
+    def __init__(self, responders: Dict[str, Callable] = None, default_responder: Callable = echo,
+                 chat_responder: Callable = None, run_duration: Union[float, Callable] = 0,
+                 latency: Dict[str, Union[float, Callable]] = None):
+        self.api_key = "fake"
+        self.responders = responders if responders else {}
+        self.default_responder = default_responder
+        self.chat_responder = chat_responder
+        self.run_duration = run_duration if callable(run_duration) else constant(run_duration)
+        self.latency = {key: value if callable(value) else constant(value) for key, value in (latency or {}).items()}
+        self.calls = {}  # call path -> count
+
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._assistants = {}
+        self._threads = {}
+        self._messages = {}  # thread_id -> [message dict], oldest first
+        self._runs = {}  # run_id -> run dict
+        self._run_state = {}  # run_id -> {"ready_at", "step", "tool_outputs"}
+        self._files = {}
+
+        self.beta = _Beta(self)
+        self.chat = _Chat(self)
+        self.files = _Files(self)
+
+    # --- Inspection helpers for tests ---
+
+    @property
+    def thread_ids(self):
+        with self._lock:
+            return list(self._threads)
+
+    def thread_messages(self, thread_id: str) -> List[ThreadMessage]:
+        with self._lock:
+            return [ThreadMessage.model_validate(message) for message in self._messages[thread_id]]
+
+    # --- Internals ---
+
+    def _new_id(self, prefix):
+        return f"{prefix}_fake{next(self._ids):08d}"
+
+    def _enter(self, path):
+        with self._lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+        delay = None
+        for key, sample in self.latency.items():
+            if path.endswith(key):
+                delay = sample
+                break
+        delay = delay or self.latency.get("*")
+        if delay is not None:
+            time.sleep(max(0.0, delay()))
+
+    def _get(self, store, object_id, kind):
+        if object_id not in store:
+            raise NotFoundError(f"No {kind} found with id '{object_id}'.")
+        return store[object_id]
+
+    def _add_message(self, thread_id, role, content, file_ids=None, assistant_id=None, run_id=None, metadata=None):
+        if isinstance(content, list):
+            content = "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+        if len(content) > MAX_MESSAGE_CHARS:
+            raise BadRequestError(f"Message content must be at most {MAX_MESSAGE_CHARS} characters.")
+        message = {
+            "id": self._new_id("msg"), "object": "thread.message", "created_at": int(time.time()),
+            "thread_id": thread_id, "role": role, "assistant_id": assistant_id, "run_id": run_id,
+            "content": [{"type": "text", "text": {"value": content, "annotations": []}}],
+            "file_ids": list(file_ids or []), "metadata": metadata or {},
+        }
+        self._messages[thread_id].append(message)
+        return message
+
+    def _create_thread(self, messages=None, metadata=None):
+        thread = {"id": self._new_id("thread"), "object": "thread", "created_at": int(time.time()),
+                  "metadata": metadata or {}}
+        self._threads[thread["id"]] = thread
+        self._messages[thread["id"]] = []
+        for message in messages or []:
+            self._add_message(thread["id"], message.get("role", "user"), message["content"],
+                              message.get("file_ids"), metadata=message.get("metadata"))
+        return thread
+
+    def _create_run(self, thread_id, assistant_id, model=None, instructions=None, tools=None, metadata=None):
+        assistant = self._get(self._assistants, assistant_id, "assistant")
+        self._get(self._threads, thread_id, "thread")
+        if any(run["thread_id"] == thread_id and run["status"] in ("queued", "in_progress", "requires_action")
+               for run in self._runs.values()):
+            raise Exception(f"Thread {thread_id} already has an active run.")
+        now = int(time.time())
+        run = {
+            "id": self._new_id("run"), "object": "thread.run", "created_at": now, "thread_id": thread_id,
+            "assistant_id": assistant_id, "status": "queued", "required_action": None, "last_error": None,
+            "expires_at": now + 600, "started_at": None, "cancelled_at": None, "failed_at": None,
+            "completed_at": None, "model": model or assistant["model"],
+            "instructions": instructions or assistant["instructions"] or "",
+            "tools": tools if tools is not None else assistant["tools"], "file_ids": assistant["file_ids"],
+            "metadata": metadata or {}, "usage": None,
+        }
+        self._runs[run["id"]] = run
+        self._run_state[run["id"]] = {"ready_at": time.monotonic() + self.run_duration(), "step": 0,
+                                      "tool_outputs": [], "prompt_tokens": 0, "completion_tokens": 0}
+        return run
+
+    def _advance(self, run):
+        """Resolves the current step of a run once its duration has passed."""
+        state = self._run_state[run["id"]]
+        if run["status"] == "queued":
+            run["status"] = "in_progress"
+            run["started_at"] = int(time.time())
+        if run["status"] != "in_progress" or time.monotonic() < state["ready_at"]:
+            return
+
+        assistant = Assistant.model_validate(self._assistants[run["assistant_id"]])
+        messages = [ThreadMessage.model_validate(message) for message in self._messages[run["thread_id"]]]
+        context = RunContext(assistant, run["thread_id"], run["id"], messages, list(state["tool_outputs"]),
+                             state["step"])
+        responder = self.responders.get(assistant.name, self.default_responder)
+        result = responder(context)
+        state["step"] += 1
+        state["prompt_tokens"] += sum(len(part.text.value) for message in messages for part in message.content
+                                      if part.type == "text") // 4 + len(run["instructions"]) // 4
+
+        if isinstance(result, RunFailed):
+            run.update(status="failed", failed_at=int(time.time()),
+                       last_error={"code": result.code, "message": result.message})
+        elif isinstance(result, str):
+            self._add_message(run["thread_id"], "assistant", result, assistant_id=run["assistant_id"],
+                              run_id=run["id"])
+            state["completion_tokens"] += len(result) // 4 + 1
+            run.update(status="completed", completed_at=int(time.time()), required_action=None)
+        else:
+            calls = [result] if isinstance(result, dict) else list(result)
+            tool_calls = [{"id": self._new_id("call"), "type": "function",
+                           "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}}
+                          for call in calls]
+            state["completion_tokens"] += sum(len(call["function"]["arguments"]) for call in tool_calls) // 4 + 1
+            run.update(status="requires_action",
+                       required_action={"type": "submit_tool_outputs",
+                                        "submit_tool_outputs": {"tool_calls": tool_calls}})
+
+        if run["status"] in ("completed", "failed"):
+            run["usage"] = {"prompt_tokens": state["prompt_tokens"],
+                            "completion_tokens": state["completion_tokens"],
+                            "total_tokens": state["prompt_tokens"] + state["completion_tokens"]}
+
+    def _chat_completion(self, **kwargs):
+        functions = kwargs.get("functions") or []
+        function_call = kwargs.get("function_call")
+        name = function_call.get("name") if isinstance(function_call, dict) else None
+        function = next((f for f in functions if f["name"] == name), None)
+
+        if self.chat_responder is not None:
+            reply = self.chat_responder(kwargs)
+        elif function is not None:
+            reply = example_arguments(function.get("parameters", {}))
+        else:
+            reply = "Fake completion."
+
+        message = {"role": "assistant", "content": None}
+        if function is not None:
+            arguments = reply if isinstance(reply, str) else json.dumps(reply)
+            message["function_call"] = {"name": name, "arguments": arguments}
+            completion_text = arguments
+        else:
+            message["content"] = completion_text = str(reply)
+
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in kwargs.get("messages", [])) // 4
+        completion_tokens = len(completion_text) // 4 + 1
+        return ChatCompletion.model_validate({
+            "id": self._new_id("chatcmpl"), "object": "chat.completion", "created": int(time.time()),
+            "model": kwargs.get("model", "gpt-3.5-turbo"),
+            "choices": [{"index": 0, "finish_reason": "function_call" if function else "stop", "logprobs": None,
+                         "message": message}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+
+class _Resource:
+    _is_api_resource = True
+
+    def __init__(self, fake: FakeOpenAI, path: str):
+        self._fake = fake
+        self._path = path
+
+    def _call(self, method):
+        self._fake._enter(f"{self._path}.{method}")
+
+
+class _Beta(_Resource):
+    def __init__(self, fake):
+        super().__init__(fake, "beta")
+        self.assistants = _Assistants(fake)
+        self.threads = _Threads(fake)
+
+
+class _Assistants(_Resource):
+    def __init__(self, fake):
+        super().__init__(fake, "beta.assistants")
+
+    def create(self, *, model, name=None, description=None, instructions=None, tools=None, file_ids=None,
+               metadata=None, **kwargs):
+        self._call("create")
+        with self._fake._lock:
+            assistant = {"id": self._fake._new_id("asst"), "object": "assistant", "created_at": int(time.time()),
+                         "name": name, "description": description, "instructions": instructions, "model": model,
+                         "tools": tools or [], "file_ids": file_ids or [], "metadata": metadata or {}}
+            self._fake._assistants[assistant["id"]] = assistant
+            return Assistant.model_validate(copy.deepcopy(assistant))
+
+    def retrieve(self, assistant_id, **kwargs):
+        self._call("retrieve")
+        with self._fake._lock:
+            return Assistant.model_validate(copy.deepcopy(self._fake._get(self._fake._assistants, assistant_id,
+                                                                          "assistant")))
+
+    def update(self, assistant_id, **kwargs):
+        self._call("update")
+        with self._fake._lock:
+            assistant = self._fake._get(self._fake._assistants, assistant_id, "assistant")
+            assistant.update({key: value for key, value in kwargs.items() if key in assistant})
+            return Assistant.model_validate(copy.deepcopy(assistant))
+
+    def list(self, limit=20, **kwargs):
+        self._call("list")
+        with self._fake._lock:
+            return FakePage([Assistant.model_validate(copy.deepcopy(a)) for a in self._fake._assistants.values()][:limit])
+
+    def delete(self, assistant_id, **kwargs):
+        self._call("delete")
+        with self._fake._lock:
+            self._fake._get(self._fake._assistants, assistant_id, "assistant")
+            del self._fake._assistants[assistant_id]
+        return AssistantDeleted(id=assistant_id, deleted=True, object="assistant.deleted")
+
+
+class _Threads(_Resource):
+    def __init__(self, fake):
+        super().__init__(fake, "beta.threads")
+        self.messages = _Messages(fake)
+        self.runs = _Runs(fake)
+
+    def create(self, *, messages=None, metadata=None, **kwargs):
+        self._call("create")
+        with self._fake._lock:
+            return Thread.model_validate(copy.deepcopy(self._fake._create_thread(messages, metadata)))
+
+    def retrieve(self, thread_id, **kwargs):
+        self._call("retrieve")
+        with self._fake._lock:
+            return Thread.model_validate(copy.deepcopy(self._fake._get(self._fake._threads, thread_id, "thread")))
+
+    def delete(self, thread_id, **kwargs):
+        self._call("delete")
+        with self._fake._lock:
+            self._fake._get(self._fake._threads, thread_id, "thread")
+            del self._fake._threads[thread_id]
+            del self._fake._messages[thread_id]
+        return ThreadDeleted(id=thread_id, deleted=True, object="thread.deleted")
+
+    def create_and_run(self, *, assistant_id, thread=None, model=None, instructions=None, tools=None, metadata=None,
+                       **kwargs):
+        self._call("create_and_run")
+        thread = thread or {}
+        with self._fake._lock:
+            created = self._fake._create_thread(thread.get("messages"), thread.get("metadata"))
+            run = self._fake._create_run(created["id"], assistant_id, model, instructions, tools, metadata)
+            return Run.model_validate(copy.deepcopy(run))
+
+
+class _Messages(_Resource):
+    def __init__(self, fake):
+        super().__init__(fake, "beta.threads.messages")
+
+    def create(self, thread_id, *, content, role="user", file_ids=None, metadata=None, **kwargs):
+        self._call("create")
+        with self._fake._lock:
+            self._fake._get(self._fake._threads, thread_id, "thread")
+            message = self._fake._add_message(thread_id, role, content, file_ids, metadata=metadata)
+            return ThreadMessage.model_validate(copy.deepcopy(message))
+
+    def list(self, thread_id, *, order="desc", limit=20, after=None, before=None, **kwargs):
+        self._call("list")
+        with self._fake._lock:
+            messages = list(self._fake._get(self._fake._messages, thread_id, "thread"))
+        if order == "desc":
+            messages.reverse()
+        ids = [message["id"] for message in messages]
+        if after in ids:
+            messages = messages[ids.index(after) + 1:]
+        if before in ids:
+            messages = messages[:ids.index(before)]
+        page = [ThreadMessage.model_validate(copy.deepcopy(message)) for message in messages[:limit]]
+        return FakePage(page, has_more=len(messages) > limit)
+
+
+class _Runs(_Resource):
+    def __init__(self, fake):
+        super().__init__(fake, "beta.threads.runs")
+
+    def create(self, thread_id, *, assistant_id, model=None, instructions=None, tools=None, metadata=None, **kwargs):
+        self._call("create")
+        with self._fake._lock:
+            run = self._fake._create_run(thread_id, assistant_id, model, instructions, tools, metadata)
+            return Run.model_validate(copy.deepcopy(run))
+
+    def retrieve(self, run_id, *, thread_id, **kwargs):
+        self._call("retrieve")
+        with self._fake._lock:
+            run = self._fake._get(self._fake._runs, run_id, "run")
+            self._fake._advance(run)
+            return Run.model_validate(copy.deepcopy(run))
+
+    def submit_tool_outputs(self, run_id, *, thread_id, tool_outputs, **kwargs):
+        self._call("submit_tool_outputs")
+        with self._fake._lock:
+            run = self._fake._get(self._fake._runs, run_id, "run")
+            if run["status"] != "requires_action":
+                raise Exception(f"Runs in status {run['status']} do not accept tool outputs.")
+            state = self._fake._run_state[run_id]
+            state["tool_outputs"] += list(tool_outputs)
+            state["ready_at"] = time.monotonic() + self._fake.run_duration()
+            run.update(status="queued", required_action=None)
+            return Run.model_validate(copy.deepcopy(run))
+
+    def cancel(self, run_id, *, thread_id, **kwargs):
+        self._call("cancel")
+        with self._fake._lock:
+            run = self._fake._get(self._fake._runs, run_id, "run")
+            if run["status"] in ("queued", "in_progress", "requires_action"):
+                run.update(status="cancelled", cancelled_at=int(time.time()), required_action=None)
+            return Run.model_validate(copy.deepcopy(run))
+
+
+class _Chat(_Resource):
+    def __init__(self, fake):
+        super().__init__(fake, "chat")
+        self.completions = _Completions(fake)
+
+
+class _Completions(_Resource):
+    def __init__(self, fake):
+        super().__init__(fake, "chat.completions")
+
+    def create(self, **kwargs):
+        self._call("create")
+        return self._fake._chat_completion(**kwargs)
+
+
+class _Files(_Resource):
+    def __init__(self, fake):
+        super().__init__(fake, "files")
+
+    def create(self, *, file, purpose, **kwargs):
+        self._call("create")
+        if isinstance(file, tuple):
+            filename, content = file[0], file[1]
+        else:
+            filename, content = getattr(file, "name", "upload"), file.read()
+        with self._fake._lock:
+            record = {"id": self._fake._new_id("file"), "object": "file", "bytes": len(content),
+                      "created_at": int(time.time()), "filename": str(filename).split("/")[-1],
+                      "purpose": purpose, "status": "processed", "status_details": None}
+            self._fake._files[record["id"]] = record
+            return FileObject.model_validate(dict(record))
+
+    def retrieve(self, file_id, **kwargs):
+        self._call("retrieve")
+        with self._fake._lock:
+            return FileObject.model_validate(dict(self._fake._get(self._fake._files, file_id, "file")))
+
+    def list(self, **kwargs):
+        self._call("list")
+        with self._fake._lock:
+            return FakePage([FileObject.model_validate(dict(record)) for record in self._fake._files.values()])
+
+    def delete(self, file_id, **kwargs):
+        self._call("delete")
+        with self._fake._lock:
+            self._fake._get(self._fake._files, file_id, "file")
+            del self._fake._files[file_id]
+        return FileDeleted(id=file_id, deleted=True, object="file")
+
+
+# --- Localhost HTTP server ---
+
+_ROUTES = [
+    ("POST", r"/assistants", lambda f, m, b, q: f.beta.assistants.create(**b)),
+    ("GET", r"/assistants", lambda f, m, b, q: f.beta.assistants.list(**q)),
+    ("GET", r"/assistants/(?P<id>[^/]+)", lambda f, m, b, q: f.beta.assistants.retrieve(m["id"])),
+    ("POST", r"/assistants/(?P<id>[^/]+)", lambda f, m, b, q: f.beta.assistants.update(m["id"], **b)),
+    ("DELETE", r"/assistants/(?P<id>[^/]+)", lambda f, m, b, q: f.beta.assistants.delete(m["id"])),
+    ("POST", r"/threads", lambda f, m, b, q: f.beta.threads.create(**b)),
+    ("POST", r"/threads/runs", lambda f, m, b, q: f.beta.threads.create_and_run(**b)),
+    ("GET", r"/threads/(?P<id>[^/]+)", lambda f, m, b, q: f.beta.threads.retrieve(m["id"])),
+    ("DELETE", r"/threads/(?P<id>[^/]+)", lambda f, m, b, q: f.beta.threads.delete(m["id"])),
+    ("POST", r"/threads/(?P<id>[^/]+)/messages", lambda f, m, b, q: f.beta.threads.messages.create(m["id"], **b)),
+    ("GET", r"/threads/(?P<id>[^/]+)/messages", lambda f, m, b, q: f.beta.threads.messages.list(m["id"], **q)),
+    ("POST", r"/threads/(?P<id>[^/]+)/runs", lambda f, m, b, q: f.beta.threads.runs.create(m["id"], **b)),
+    ("GET", r"/threads/(?P<id>[^/]+)/runs/(?P<run>[^/]+)",
+     lambda f, m, b, q: f.beta.threads.runs.retrieve(m["run"], thread_id=m["id"])),
+    ("POST", r"/threads/(?P<id>[^/]+)/runs/(?P<run>[^/]+)/submit_tool_outputs",
+     lambda f, m, b, q: f.beta.threads.runs.submit_tool_outputs(m["run"], thread_id=m["id"], **b)),
+    ("POST", r"/threads/(?P<id>[^/]+)/runs/(?P<run>[^/]+)/cancel",
+     lambda f, m, b, q: f.beta.threads.runs.cancel(m["run"], thread_id=m["id"])),
+    ("POST", r"/chat/completions", lambda f, m, b, q: f.chat.completions.create(**b)),
+    ("POST", r"/files", lambda f, m, b, q: f.files.create(**b)),
+    ("GET", r"/files", lambda f, m, b, q: f.files.list()),
+    ("GET", r"/files/(?P<id>[^/]+)", lambda f, m, b, q: f.files.retrieve(m["id"])),
+    ("DELETE", r"/files/(?P<id>[^/]+)", lambda f, m, b, q: f.files.delete(m["id"])),
+]
+_ROUTES = [(method, re.compile(f"^/v1{pattern}$"), handler) for method, pattern, handler in _ROUTES]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fake: FakeOpenAI = None
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        query = {key: int(values[0]) if values[0].isdigit() else values[0]
+                 for key, values in parse_qs(url.query).items()}
+        for route_method, pattern, handler in _ROUTES:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                break
+        else:
+            return self._send(404, {"error": {"message": f"Unknown route {method} {url.path}", "type": "invalid_request_error"}})
+
+        try:
+            result = handler(self.fake, match.groupdict(), self._body(), query)
+        except NotFoundError as e:
+            return self._send(404, {"error": {"message": str(e), "type": "invalid_request_error"}})
+        except Exception as e:
+            return self._send(400, {"error": {"message": str(e), "type": "invalid_request_error"}})
+
+        if isinstance(result, FakePage):
+            data = [item.model_dump() for item in result.data]
+            return self._send(200, {"object": "list", "data": data, "has_more": result.has_more,
+                                    "first_id": data[0]["id"] if data else None,
+                                    "last_id": data[-1]["id"] if data else None})
+        return self._send(200, result.model_dump())
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + raw)
+            body = {}
+            for part in message.get_payload():
+                name = part.get_param("name", header="content-disposition")
+                filename = part.get_filename()
+                payload = part.get_payload(decode=True)
+                body[name] = (filename, payload) if filename else payload.decode()
+            return body
+        return json.loads(raw) if raw else {}
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeOpenAIServer:
+    """
+    Serves a FakeOpenAI over localhost HTTP, for clients in other processes:
+
+        server = FakeOpenAIServer(FakeOpenAI()).start()
+        client = openai.OpenAI(base_url=server.url, api_key="fake")
+    """
+
+    def __init__(self, fake: FakeOpenAI = None, host: str = "127.0.0.1", port: int = 0):
+        self.fake = fake if fake is not None else FakeOpenAI()
+        handler = type("FakeOpenAIHandler", (_Handler,), {"fake": self.fake})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._worker = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._worker = threading.Thread(target=self._server.serve_forever, name="fake-openai-server", daemon=True)
+        self._worker.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,367 @@
+"""
+Shared HTTP client of the OpenAPI tools. Requests to the same origin (scheme, host and port) go through one pooled
+httpx.Client, so connections are kept alive and reused across tool calls, with timeouts, retries and a cap on the
+number of connections per host.
+
+    configure_http_pool(timeout=10, retries=3)                         # defaults of every host
+    get_http_pool().configure_host("api.example.com", max_connections=4, timeout=60)
+    get_http_pool().metrics()   # {"https://api.example.com": {"requests": 12, "connections_opened": 2, ...}}
+
+Async tools (ToolFactory.from_openapi_schema(..., async_tools=True)) use get_async_http_pool() instead, whose clients
+live on one background event loop (see run_coroutine) and speak HTTP/2 when the h2 package is installed.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+
+from .log_config import get_logger
+logger = get_logger()
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class HostSettings:
+    """
+    Connection settings of one host.
+
+    Parameters:
+    timeout (float, optional): Seconds to wait for the response, and for a free connection of the pool. Defaults to 30.
+    connect_timeout (float, optional): Seconds to wait for a new connection. Defaults to 10.
+    max_connections (int, optional): Connections, and therefore concurrent requests, per host. Defaults to 10.
+    keepalive_expiry (float, optional): Seconds an idle connection is kept open. Defaults to 60.
+    retries (int, optional): Retries of a failed request. Requests that were never sent (connection errors) and
+        requests refused with 429 are retried for every method; other errors and the statuses 502, 503 and 504 only
+        for idempotent methods. Defaults to 2.
+    backoff (float, optional): Base of the exponential backoff between retries, in seconds. Defaults to 0.5.
+    """
+
+    def __init__(self, timeout: float = 30, connect_timeout: float = 10, max_connections: int = 10,
+                 keepalive_expiry: float = 60, retries: int = 2, backoff: float = 0.5):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.retries = retries
+        self.backoff = backoff
+
+    def updated(self, **overrides) -> "HostSettings":
+        unknown = set(overrides) - set(vars(self))
+        if unknown:
+            raise ValueError(f"Unknown host settings: {', '.join(sorted(unknown))}")
+        return HostSettings(**{**vars(self), **overrides})
+
+
+class HostMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.retries = 0
+        self.errors = 0
+        self.total_time = 0.0
+
+    def as_dict(self) -> dict:
+        return {"requests": self.requests, "connections_opened": self.connections_opened,
+                "connections_reused": max(0, self.requests + self.retries - self.connections_opened),
+                "retries": self.retries, "errors": self.errors, "total_time": round(self.total_time, 6)}
+
+
+class CappedResponse:
+    """A response whose body was read up to a size limit. `truncated` tells whether the body was cut."""
+
+    def __init__(self, response: httpx.Response, content: bytes, truncated: bool):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = content
+        self.truncated = truncated
+        self.encoding = response.charset_encoding or "utf-8"
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class _HostPool:
+    def __init__(self, origin: str, settings: HostSettings, client):
+        self.origin = origin
+        self.settings = settings
+        self.metrics = HostMetrics()
+        self.client = client
+
+
+def _client_options(settings: HostSettings) -> dict:
+    # redirects are followed, like requests did for the OpenAPI tools
+    return {"follow_redirects": True,
+            "timeout": httpx.Timeout(settings.timeout, connect=settings.connect_timeout),
+            "limits": httpx.Limits(max_connections=settings.max_connections,
+                                   max_keepalive_connections=settings.max_connections,
+                                   keepalive_expiry=settings.keepalive_expiry)}
+
+
+class HttpPool:
+    """
+    Pooled HTTP client with one connection pool per host. Thread safe; tool calls of all agents share it.
+
+    Parameters:
+    settings (HostSettings, optional): Settings of the hosts without settings of their own. Defaults to HostSettings().
+    """
+
+    def __init__(self, settings: HostSettings = None):
+        self.settings = settings or HostSettings()
+        self._host_settings = {}  # host -> HostSettings
+        self._pools = {}  # origin -> _HostPool
+        self._lock = threading.Lock()
+
+    def configure_host(self, host: str, **settings):
+        """Overrides the settings (see HostSettings) of one host. Its existing connections are closed."""
+        with self._lock:
+            self._host_settings[host] = self._settings_of(host).updated(**settings)
+            for origin in [origin for origin in self._pools if urlsplit(origin).hostname == host]:
+                self._close_client(self._pools.pop(origin).client)
+
+    def request(self, method: str, url: str, max_bytes: int = None, **kwargs):
+        """
+        Sends a request through the pool of its host. Accepts the keyword arguments of httpx.Client.request.
+        With `max_bytes`, the body is streamed and at most that many bytes are read, and a CappedResponse is returned
+        instead of an httpx.Response.
+        """
+        method = method.upper()
+        pool = self._pool(url)
+        opened = []
+        started = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    request = pool.client.build_request(method, url, extensions={"trace": self._tracer(opened)},
+                                                        **kwargs)
+                    response = pool.client.send(request, stream=max_bytes is not None)
+                    error = None
+                except httpx.TransportError as e:
+                    response, error = None, e
+                delay = self._retry_delay(pool, method, url, attempt, response, error)
+                if delay is None:
+                    return self._read_capped(response, max_bytes) if max_bytes is not None else response
+                if response is not None:
+                    response.close()
+                attempt += 1
+                time.sleep(delay)
+        finally:
+            self._record(pool, opened, started)
+
+    @staticmethod
+    def _read_capped(response, max_bytes):
+        chunks, size, truncated = [], 0, False
+        try:
+            for chunk in response.iter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > max_bytes:
+                    truncated = True
+                    break
+        finally:
+            response.close()
+        return CappedResponse(response, b"".join(chunks)[:max_bytes], truncated)
+
+    def metrics(self) -> dict:
+        """Request, connection and retry counts per origin."""
+        with self._lock:
+            return {origin: pool.metrics.as_dict() for origin, pool in self._pools.items()}
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                self._close_client(pool.client)
+            self._pools = {}
+
+    def _new_client(self, settings: HostSettings):
+        return httpx.Client(**_client_options(settings))
+
+    def _close_client(self, client):
+        client.close()
+
+    @staticmethod
+    def _tracer(opened: list):
+        def trace(event, info):
+            if event == "connection.connect_tcp.complete":
+                opened.append(event)
+        return trace
+
+    def _retry_delay(self, pool, method, url, attempt, response=None, error=None):
+        """Seconds to wait before retrying the attempt, or None if its response (or error) is final."""
+        settings = pool.settings
+        if error is not None:
+            never_sent = isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+            if attempt >= settings.retries or not (never_sent or method in IDEMPOTENT_METHODS):
+                with self._lock:
+                    pool.metrics.errors += 1
+                raise error
+            delay = self._backoff(settings, attempt)
+            logger.debug(f"Retrying {method} {url} in {delay:.2f}s: {type(error).__name__} {str(error)}")
+        else:
+            # a 429 was refused before it was processed, so it is retried for every method
+            if (response.status_code not in RETRY_STATUSES or attempt >= settings.retries
+                    or method not in IDEMPOTENT_METHODS and response.status_code != 429):
+                return None
+            delay = self._retry_after(response) or self._backoff(settings, attempt)
+            logger.debug(f"Retrying {method} {url} in {delay:.2f}s: status {response.status_code}")
+        with self._lock:
+            pool.metrics.retries += 1
+        return delay
+
+    def _record(self, pool, opened, started):
+        with self._lock:
+            pool.metrics.requests += 1
+            pool.metrics.connections_opened += len(opened)
+            pool.metrics.total_time += time.monotonic() - started
+
+    def _settings_of(self, host):
+        return self._host_settings.get(host, self.settings)
+
+    def _pool(self, url) -> _HostPool:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        pool = self._pools.get(origin)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(origin)
+                if pool is None:
+                    settings = self._settings_of(parts.hostname)
+                    pool = _HostPool(origin, settings, self._new_client(settings))
+                    self._pools[origin] = pool
+        return pool
+
+    @staticmethod
+    def _backoff(settings, attempt):
+        return settings.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    @staticmethod
+    def _retry_after(response):
+        value = response.headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return min(float(value), 60.0)
+        except ValueError:
+            try:
+                return min(max(0.0, parsedate_to_datetime(value).timestamp() - time.time()), 60.0)
+            except (TypeError, ValueError):
+                return None
+
+
+class AsyncHttpPool(HttpPool):
+    """
+    HttpPool for async tools. Its clients belong to the background event loop, so request() must be awaited on it,
+    see run_coroutine().
+    """
+
+    async def request(self, method: str, url: str, max_bytes: int = None, **kwargs):
+        method = method.upper()
+        pool = self._pool(url)
+        opened = []
+        started = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    request = pool.client.build_request(method, url, extensions={"trace": self._async_tracer(opened)},
+                                                        **kwargs)
+                    response = await pool.client.send(request, stream=max_bytes is not None)
+                    error = None
+                except httpx.TransportError as e:
+                    response, error = None, e
+                delay = self._retry_delay(pool, method, url, attempt, response, error)
+                if delay is None:
+                    return await self._aread_capped(response, max_bytes) if max_bytes is not None else response
+                if response is not None:
+                    await response.aclose()
+                attempt += 1
+                await asyncio.sleep(delay)
+        finally:
+            self._record(pool, opened, started)
+
+    @staticmethod
+    async def _aread_capped(response, max_bytes):
+        chunks, size, truncated = [], 0, False
+        try:
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > max_bytes:
+                    truncated = True
+                    break
+        finally:
+            await response.aclose()
+        return CappedResponse(response, b"".join(chunks)[:max_bytes], truncated)
+
+    def _new_client(self, settings: HostSettings):
+        return httpx.AsyncClient(http2=HTTP2_AVAILABLE, **_client_options(settings))
+
+    def _close_client(self, client):
+        asyncio.run_coroutine_threadsafe(client.aclose(), get_background_loop())
+
+    @staticmethod
+    def _async_tracer(opened: list):
+        async def trace(event, info):
+            if event == "connection.connect_tcp.complete":
+                opened.append(event)
+        return trace
+
+
+_background_loop = None
+_background_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """The event loop, running in a daemon thread, that executes async tools and owns the async HTTP clients."""
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="agency-async-tools", daemon=True).start()
+        return _background_loop
+
+
+def run_coroutine(coro, timeout: float = None):
+    """Runs a coroutine on the background loop and waits for its result. Safe to call from any thread but that loop."""
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop()).result(timeout)
+
+
+http_pool = HttpPool()
+async_http_pool = AsyncHttpPool()
+
+
+def get_http_pool() -> HttpPool:
+    return http_pool
+
+
+def get_async_http_pool() -> AsyncHttpPool:
+    return async_http_pool
+
+
+def configure_http_pool(**settings):
+    """
+    Replaces the default settings (see HostSettings) of the hosts called by OpenAPI tools. Open connections are
+    closed; settings of single hosts (HttpPool.configure_host) are kept.
+    """
+    for pool in (http_pool, async_http_pool):
+        with pool._lock:
+            pool.settings = pool.settings.updated(**settings)
+            for host_pool in pool._pools.values():
+                pool._close_client(host_pool.client)
+            pool._pools = {}
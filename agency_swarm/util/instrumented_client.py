@@ -0,0 +1,107 @@
+import inspect
+import time
+
+_PASSTHROUGH_TYPES = (str, bytes, int, float, bool, type(None), dict, list, tuple, set)
+
+
+def _is_resource(obj):
+    # API resources of the openai package, or any stand-in client resource that opts in with `_is_api_resource`
+    return type(obj).__module__.startswith("openai.resources") or getattr(type(obj), "_is_api_resource", False)
+
+
+class ClientCall:
+    """
+    Describes a single call made through an InstrumentedClient. Hooks receive the same object in before_call and
+    after_call, so they can mutate the arguments before the call is sent and keep per-call state in `context`.
+    """
+
+    def __init__(self, path: str, args: tuple, kwargs: dict):
+        self.path = path  # e.g. "beta.threads.runs.create"
+        self.args = args
+        self.kwargs = kwargs
+        self.context = {}
+        self.started_at: float = None
+        self.duration: float = None
+
+    @property
+    def method(self):
+        return self.path.split(".")[-1]
+
+    @property
+    def model(self):
+        return self.kwargs.get("model")
+
+
+class InstrumentedClient:
+    """
+    Transparent proxy around the OpenAI client that runs every API call through a list of hooks.
+
+    Resource attributes (client.beta, client.beta.threads, ...) are wrapped recursively, so code written against
+    the plain client keeps working unchanged; other attributes are returned as is. A hook is any object implementing
+    `before_call(call)` and `after_call(call, response=None, error=None)`.
+    """
+
+    def __init__(self, target, hooks=None, path: str = ""):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_hooks", hooks if hooks is not None else [])
+        object.__setattr__(self, "_path", path)
+
+    @property
+    def unwrapped(self):
+        return self._target
+
+    @property
+    def hooks(self):
+        return self._hooks
+
+    def add_hook(self, hook):
+        if hook not in self._hooks:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith("_") or isinstance(attr, _PASSTHROUGH_TYPES) or inspect.isclass(attr):
+            return attr
+
+        path = f"{self._path}.{name}" if self._path else name
+        if callable(attr):
+            return self._wrap_callable(attr, path)
+        if _is_resource(attr):
+            return InstrumentedClient(attr, self._hooks, path)
+        return attr
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __repr__(self):
+        return f"InstrumentedClient({self._target!r})"
+
+    def _wrap_callable(self, func, path):
+        hooks = self._hooks
+
+        def call(*args, **kwargs):
+            client_call = ClientCall(path, args, kwargs)
+            for hook in hooks:
+                hook.before_call(client_call)
+
+            client_call.started_at = time.monotonic()
+            try:
+                response = func(*client_call.args, **client_call.kwargs)
+            except Exception as e:
+                client_call.duration = time.monotonic() - client_call.started_at
+                for hook in reversed(hooks):
+                    hook.after_call(client_call, error=e)
+                raise e
+            client_call.duration = time.monotonic() - client_call.started_at
+
+            for hook in reversed(hooks):
+                hook.after_call(client_call, response=response)
+            return response
+
+        call.__name__ = getattr(func, "__name__", path.split(".")[-1])
+        call.__doc__ = getattr(func, "__doc__", None)
+        return call
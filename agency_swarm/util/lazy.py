@@ -0,0 +1,30 @@
+import importlib
+import sys
+from typing import Dict
+
+
+def lazy_exports(package: str, exports: Dict[str, str]):
+    """
+    Returns the module __getattr__ and __dir__ (PEP 562) of a package whose public names are only imported on
+    first access, so importing the package stays cheap.
+
+    Parameters:
+    package (str): __name__ of the package.
+    exports (Dict[str, str]): Public name -> module (relative to the package, e.g. ".agency") that defines it.
+
+    A submodule with the same name as an export would shadow it once imported, so such names must be imported
+    eagerly instead.
+    """
+
+    def __getattr__(name):
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        setattr(sys.modules[package], name, value)  # later lookups don't go through __getattr__
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -1,32 +1,177 @@
+import atexit
+import json
 import os
+import queue
+import random
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from datetime import datetime
 
-def setup_logging():
-    logger = logging.getLogger('agency_swarm')
-    logger.setLevel(logging.DEBUG)
+# 结构化字段，通过 logger.info(..., extra={"agent": ..., "thread_id": ..., "run_id": ...}) 传入
+# (LogRecord 已有 thread 属性，所以使用 thread_id)
+STRUCTURED_FIELDS = ("agent", "thread_id", "run_id", "user_id")
+
+# 可通过环境变量配置
+MAX_PAYLOAD_CHARS = int(os.getenv('AS_LOG_MAX_PAYLOAD', 4000))
+VERBOSE_SAMPLE_RATE = float(os.getenv('AS_LOG_VERBOSE_SAMPLE_RATE', 0.1))
+QUEUE_SIZE = int(os.getenv('AS_LOG_QUEUE_SIZE', 10000))
+
+LOGGER_NAME = 'agency_swarm'
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+def truncate(text: str, limit: int = None) -> str:
+    limit = MAX_PAYLOAD_CHARS if limit is None else limit
+    if limit and len(text) > limit:
+        return f"{text[:limit]}... [{len(text) - limit} chars truncated]"
+    return text
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, with the structured fields passed in `extra`."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.getMessage()),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = truncate(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TruncatingFormatter(logging.Formatter):
+    def formatMessage(self, record):
+        record.message = truncate(record.message)
+        return super().formatMessage(record)
+
+
+class VerboseSamplingFilter(logging.Filter):
+    """
+    Keeps only a sample of the records logged with extra={"verbose": True} (run status polls, routing reasons, ...).
+    The other records always pass.
+    """
+
+    def __init__(self, rate: float = None):
+        super().__init__()
+        self.rate = VERBOSE_SAMPLE_RATE if rate is None else rate
+
+    def filter(self, record):
+        if getattr(record, "verbose", False):
+            return self.rate >= 1 or random.random() < self.rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the background writer without formatting them, and drops them instead of blocking when the
+    queue is full.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # the listener runs in the same process, formatting is left to its thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _SetupOnFirstRecord(logging.Handler):
+    """
+    Placeholder handler of get_logger(): the log folder, files and writer thread are only set up (by setup_logging)
+    when the first record is logged, instead of when the modules that log are imported.
+    """
+
+    def handle(self, record):
+        logger = setup_logging()
+        for handler in logger.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+    def emit(self, record):
+        pass
+
+
+def get_logger():
+    """The agency_swarm logger, without setting it up yet. Modules use this at import time."""
+    logger = logging.getLogger(LOGGER_NAME)
     if not logger.handlers:
-        project_root = os.getenv('AS_PROJECT_ROOT')
-        current_datetime = datetime.utcnow()
-        formatted_datetime = current_datetime.strftime("%Y-%m-%d %H:%M:%S")
-
-        log_file_name = f"{formatted_datetime}.log"
-        log_file_path = os.path.join(project_root, 'logs', log_file_name)
-        os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
-        
-        # 创建一个handler，用于将日志输出到控制台
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        
-        file_handler = RotatingFileHandler(log_file_path, maxBytes=1048576, backupCount=5)
-        file_handler.setLevel(logging.DEBUG)
-        
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s \n%(message)s\n')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-        
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(_SetupOnFirstRecord())
+    return logger
 
+
+def setup_logging():
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(logging.DEBUG)
+    with _setup_lock:
+        for handler in [handler for handler in logger.handlers if isinstance(handler, _SetupOnFirstRecord)]:
+            logger.removeHandler(handler)
+        if not logger.handlers:
+            _create_handlers(logger)
     return logger
+
+
+def _create_handlers(logger):
+    global _listener, _queue_handler
+    from .oai import load_env
+
+    load_env()  # AS_PROJECT_ROOT may be set in .env
+    project_root = os.getenv('AS_PROJECT_ROOT') or os.getcwd()
+    current_datetime = datetime.utcnow()
+    formatted_datetime = current_datetime.strftime("%Y-%m-%d %H:%M:%S")
+
+    log_file_name = f"{formatted_datetime}.jsonl"
+    log_file_path = os.path.join(project_root, 'logs', log_file_name)
+    os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
+
+    # 创建一个handler，用于将日志输出到控制台
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(TruncatingFormatter('%(asctime)s - %(levelname)s \n%(message)s\n'))
+
+    file_handler = RotatingFileHandler(log_file_path, maxBytes=1048576, backupCount=5)
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(JsonLinesFormatter())
+
+    # 文件写入和格式化都在后台线程中进行，不阻塞 agent 的执行
+    log_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(VerboseSamplingFilter())
+    logger.addHandler(_queue_handler)
+
+
+def flush_logging():
+    """Blocks until the background writer has written every queued record."""
+    if _queue_handler is not None:
+        _queue_handler.queue.join()
+
+
+def set_console_log_level(level):
+    setup_logging()
+    if _listener is not None:
+        for handler in _listener.handlers:
+            if not isinstance(handler, logging.FileHandler):
+                handler.setLevel(level)
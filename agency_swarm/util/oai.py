@@ -1,36 +1,74 @@
-import openai
 import threading
 import os
-import instructor
 
-from dotenv import load_dotenv
+from .instrumented_client import InstrumentedClient
+from .rate_limiter import get_request_scheduler
+from .usage import get_usage_tracker
 
-load_dotenv()
+# openai, instructor and dotenv are imported when the first client is created, not with the package
+_env_loaded = False
 
 client_lock = threading.Lock()
 client = None
+# hooks shared by every client returned from get_openai_client, in call order. Budgets are checked before a call
+# waits for the rate limiter.
+client_hooks = [get_usage_tracker(), get_request_scheduler()]
 
 
 def get_openai_client():
     global client
     with client_lock:
         if client is None:
+            import openai
+            import instructor
+
+            load_env()
             # Check if the API key is set
             api_key = openai.api_key or os.getenv('OPENAI_API_KEY')
             if api_key is None:
                 raise ValueError("OpenAI API key is not set. Please set it using set_openai_key.")
-            client = instructor.patch(openai.OpenAI(api_key=api_key,
-                                                    max_retries=5))
+            client = _instrument(instructor.patch(openai.OpenAI(api_key=api_key,
+                                                                max_retries=5)))
     return client
 
 
 def set_openai_client(new_client):
     global client
     with client_lock:
-        client = new_client
+        client = _instrument(new_client) if new_client is not None else None
+
+
+def _instrument(new_client):
+    # every call goes through the shared hooks: usage accounting and the agency-wide rate limiter
+    if isinstance(new_client, InstrumentedClient):
+        return new_client
+    return InstrumentedClient(new_client, hooks=client_hooks)
+
+
+def add_client_hook(hook):
+    with client_lock:
+        if hook not in client_hooks:
+            client_hooks.append(hook)
+
+
+def remove_client_hook(hook):
+    with client_lock:
+        if hook in client_hooks:
+            client_hooks.remove(hook)
 
 
 def set_openai_key(key):
+    import openai
+
     if not key:
         raise ValueError("Invalid API key. The API key cannot be empty.")
     openai.api_key = key
+
+
+def load_env():
+    # reads the .env file of the working directory (or a parent) once
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
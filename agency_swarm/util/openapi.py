@@ -1,8 +1,10 @@
 import json
 
 
-def validate_openapi_spec(spec: str):
-    spec = json.loads(spec)
+def validate_openapi_spec(spec):
+    # accepts the parsed spec too, so callers parse it only once
+    if isinstance(spec, (str, bytes)):
+        spec = json.loads(spec)
 
     # Validate that 'paths' is present in the spec
     if 'paths' not in spec:
@@ -0,0 +1,252 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+
+IMAGE_TOKEN_ESTIMATE = 765
+
+
+class RequestPriority(IntEnum):
+    """Lower value is served first when several calls wait for the same bucket."""
+    UserFacing = 0
+    Interactive = 1
+    Polling = 2
+    Background = 3
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `capacity` units per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self.refill(now)
+        # a single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        self.level -= amount
+
+    def drain(self):
+        self.level = min(self.level, 0.0)
+
+
+class ModelLimiter:
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.blocked_until = 0.0
+        self.waiters = []
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        delay = max(0.0, self.blocked_until - now)
+        if self.requests:
+            delay = max(delay, self.requests.wait_time(1, now))
+        if self.tokens and tokens:
+            delay = max(delay, self.tokens.wait_time(tokens, now))
+        return delay
+
+    def consume(self, tokens: int):
+        if self.requests:
+            self.requests.consume(1)
+        if self.tokens and tokens:
+            self.tokens.consume(tokens)
+
+
+class RequestScheduler:
+    """
+    Agency-wide token-bucket scheduler for OpenAI calls.
+
+    Limits are configured per model (requests and tokens per minute); calls without a configured model share the
+    default limiter. When calls have to wait, they are released in priority order, so user-facing run creation is not
+    starved by description updates or run polling. The scheduler is installed as a hook on the client returned by
+    `get_openai_client()`, so every call in the package passes through it.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._limiters = {}
+        self._default = None
+        self._local = threading.local()
+        self._seq = itertools.count()
+
+    # --- Configuration ---
+
+    def set_limits(self, model: str = None, requests_per_minute: float = None, tokens_per_minute: float = None):
+        """
+        Sets the limits for a model, or the default limits if model is None. Passing no limits removes them.
+        """
+        limiter = None
+        if requests_per_minute or tokens_per_minute:
+            limiter = ModelLimiter(requests_per_minute, tokens_per_minute)
+        with self._cond:
+            if model is None:
+                self._default = limiter
+            elif limiter is None:
+                self._limiters.pop(model, None)
+            else:
+                self._limiters[model] = limiter
+            self._cond.notify_all()
+
+    def _limiter_for(self, model):
+        return self._limiters.get(model, self._default)
+
+    # --- Priorities ---
+
+    @contextmanager
+    def priority(self, priority: RequestPriority):
+        previous = getattr(self._local, "priority", None)
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current_priority(self, path: str = ""):
+        priority = getattr(self._local, "priority", None)
+        if priority is not None:
+            return priority
+        if path.endswith("runs.retrieve"):
+            return RequestPriority.Polling
+        return RequestPriority.Interactive
+
+    @contextmanager
+    def model(self, model: str):
+        # the Assistants calls (runs, polling, tool outputs) carry no model argument, they run on the assistant's model
+        previous = getattr(self._local, "model", None)
+        self._local.model = model
+        try:
+            yield
+        finally:
+            self._local.model = previous
+
+    def current_model(self, call=None):
+        model = call.model if call is not None else None
+        return model if model is not None else getattr(self._local, "model", None)
+
+    # --- Scheduling ---
+
+    def acquire(self, model: str = None, tokens: int = 0, priority: RequestPriority = RequestPriority.Interactive):
+        """
+        Blocks until the model's buckets have room for one request with `tokens` tokens and no call with a higher
+        priority (or the same priority, queued earlier) is waiting for the same buckets.
+        """
+        with self._cond:
+            limiter = self._limiter_for(model)
+            if limiter is None:
+                return
+            ticket = (int(priority), next(self._seq))
+            heapq.heappush(limiter.waiters, ticket)
+            try:
+                while True:
+                    timeout = None
+                    if limiter.waiters[0] == ticket:
+                        timeout = limiter.wait_time(tokens, time.monotonic())
+                        if timeout <= 0:
+                            limiter.consume(tokens)
+                            return
+                    self._cond.wait(timeout)
+            finally:
+                limiter.waiters.remove(ticket)
+                heapq.heapify(limiter.waiters)
+                self._cond.notify_all()
+
+    def reconcile(self, model: str, estimated: int, actual: int):
+        """Corrects the token bucket once the real usage of a call is known."""
+        with self._cond:
+            limiter = self._limiter_for(model)
+            if limiter is None or limiter.tokens is None:
+                return
+            limiter.tokens.consume(actual - estimated)
+            self._cond.notify_all()
+
+    def penalize(self, model: str, seconds: float):
+        """Pauses a model's queue after the API rejected a call with 429."""
+        with self._cond:
+            limiter = self._limiter_for(model)
+            if limiter is None:
+                return
+            limiter.blocked_until = max(limiter.blocked_until, time.monotonic() + seconds)
+            if limiter.requests:
+                limiter.requests.drain()
+            self._cond.notify_all()
+
+    # --- Client hook ---
+
+    def before_call(self, call):
+        if "." not in call.path:
+            return
+        tokens = estimate_tokens(call.kwargs)
+        call.context["estimated_tokens"] = tokens
+        call.context["model"] = self.current_model(call)
+        self.acquire(call.context["model"], tokens, self.current_priority(call.path))
+
+    def after_call(self, call, response=None, error=None):
+        if "estimated_tokens" not in call.context:
+            return
+        if error is not None:
+            if getattr(error, "status_code", None) == 429:
+                self.penalize(call.context["model"], _retry_after(error))
+            return
+        usage = getattr(response, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        if total_tokens is not None:
+            self.reconcile(call.context["model"], call.context["estimated_tokens"], total_tokens)
+
+
+def estimate_tokens(kwargs: dict) -> int:
+    """Rough pre-call token estimate (4 characters per token) used to charge the token bucket."""
+    chars = 0
+    images = 0
+    for message in kwargs.get("messages", None) or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    chars += len(part.get("text", ""))
+                else:
+                    images += 1
+    return chars // 4 + images * IMAGE_TOKEN_ESTIMATE + (kwargs.get("max_tokens") or 0)
+
+
+def _retry_after(error) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 1))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+scheduler = RequestScheduler()
+
+
+def get_request_scheduler():
+    return scheduler
+
+
+def set_rate_limits(model: str = None, requests_per_minute: float = None, tokens_per_minute: float = None):
+    scheduler.set_limits(model, requests_per_minute, tokens_per_minute)
+
+
+def request_priority(priority: RequestPriority):
+    return scheduler.priority(priority)
+
+
+def request_model(model: str):
+    return scheduler.model(model)
@@ -1,3 +1,7 @@
+import hashlib
+import json
+import threading
+import weakref
 from typing import Dict, Any
 
 
@@ -51,3 +55,46 @@ def reference_schema(schema):
 
 
 
+
+
+# --- Model interning ---
+# Nested models generated from JSON schemas are shared by every tool (and agent) with the same shape, instead of
+# creating one pydantic class per occurrence. Models are held weakly, so they go away with the last tool using them.
+_interned_models = weakref.WeakValueDictionary()  # key -> model
+_interned_keys = weakref.WeakKeyDictionary()  # model -> key
+_intern_lock = threading.RLock()
+
+
+def model_key(name: str, schema: Dict[str, Any], refs: Dict[str, Any] = None) -> str:
+    """
+    Canonical structural hash of a model: its name and JSON schema, independent of key order. `refs` maps the names of
+    $ref targets to their models, so a $ref is hashed by the shape it points to rather than by its path.
+    """
+    def canonical(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and refs and ref.split("/")[-1] in refs:
+                target = refs[ref.split("/")[-1]]
+                return {"$model": _interned_keys.get(target) or f"id:{id(target)}"}
+            return {k: canonical(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [canonical(item) for item in node]
+        return node
+
+    canonical_json = json.dumps([name, canonical(schema)], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical_json.encode()).hexdigest()
+
+
+def intern_model(key: str, build):
+    """Returns the model interned under `key`, calling build() to create it the first time."""
+    with _intern_lock:
+        model = _interned_models.get(key)
+        if model is None:
+            model = build()
+            _interned_models[key] = model
+            _interned_keys[model] = key
+        return model
+
+
+def interned_model_count() -> int:
+    return len(_interned_models)
@@ -0,0 +1,238 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# USD per 1K (prompt, completion) tokens, matched by the longest model prefix
+MODEL_PRICES = {
+    "gpt-4-1106-preview": (0.01, 0.03),
+    "gpt-4-vision-preview": (0.01, 0.03),
+    "gpt-4-32k": (0.06, 0.12),
+    "gpt-4": (0.03, 0.06),
+    "gpt-3.5-turbo-16k": (0.003, 0.004),
+    "gpt-3.5-turbo-1106": (0.001, 0.002),
+    "gpt-3.5-turbo": (0.0015, 0.002),
+}
+
+SCOPES = ("agent", "thread", "user", "chain")
+# calls that accept a `model` argument overriding the assistant's or the caller's model
+_DOWNGRADABLE = ("chat.completions.create", "runs.create", "threads.create_and_run")
+_MAX_COUNTED_RUNS = 10000
+
+
+class BudgetExceededError(Exception):
+    pass
+
+
+class Usage:
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.calls = 0
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cost: float):
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+        self.calls += 1
+
+    def __repr__(self):
+        return (f"Usage(prompt_tokens={self.prompt_tokens}, completion_tokens={self.completion_tokens}, "
+                f"cost={self.cost:.4f}, calls={self.calls})")
+
+
+class UsageBudget:
+    """
+    Spending limit of one agent, thread, user or message chain.
+
+    Parameters:
+    max_tokens (int, optional): Maximum number of prompt and completion tokens. Defaults to None (no limit).
+    max_cost (float, optional): Maximum cost in USD, see MODEL_PRICES. Defaults to None (no limit).
+    action (str, optional): What happens to calls once the budget is exceeded: "reject" raises BudgetExceededError,
+        "downgrade" switches runs and chat completions to `fallback_model`. Defaults to "reject".
+    fallback_model (str, optional): Model used by "downgrade". Defaults to "gpt-3.5-turbo-16k".
+    """
+
+    def __init__(self, max_tokens: int = None, max_cost: float = None, action: str = "reject",
+                 fallback_model: str = "gpt-3.5-turbo-16k"):
+        if action not in ("reject", "downgrade"):
+            raise ValueError(f"Unknown budget action: {action}")
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.action = action
+        self.fallback_model = fallback_model
+
+    def exceeded(self, usage: Usage) -> bool:
+        if self.max_tokens is not None and usage.total_tokens >= self.max_tokens:
+            return True
+        return self.max_cost is not None and usage.cost >= self.max_cost
+
+
+class UsageTracker:
+    """
+    Records the token usage of every OpenAI call and aggregates it per agent, thread, user and message chain.
+
+    Calls are attributed to the scopes set with `context()` on the calling Python thread; Session sets them around
+    runs, routing, description updates and tool execution, so the vision calls of the browsing tools are charged to
+    the agent and thread that ran the tool. Run usage is recorded once, when a run reaches a final state. The tracker
+    is installed as a hook on the client returned by `get_openai_client()` and enforces the budgets set with
+    `set_budget()` before each call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._totals = {scope: {} for scope in SCOPES}
+        self._total = Usage()
+        self._budgets = {}  # (scope, key or None) -> UsageBudget
+        self._counted_runs = OrderedDict()
+
+    # --- Attribution ---
+
+    @contextmanager
+    def context(self, **attribution):
+        """Attributes the calls made inside the block, e.g. context(agent="CEO", user="alice")."""
+        previous = getattr(self._local, "attribution", {})
+        self._local.attribution = {**previous, **{k: v for k, v in attribution.items() if v is not None}}
+        try:
+            yield
+        finally:
+            self._local.attribution = previous
+
+    def current_attribution(self) -> dict:
+        return getattr(self._local, "attribution", {})
+
+    # --- Budgets ---
+
+    def set_budget(self, scope: str, budget: UsageBudget = None, key: str = None):
+        """
+        Sets the budget of one key of a scope (e.g. scope="user", key="alice"), or of every key of the scope if key
+        is None. Passing no budget removes it.
+        """
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown usage scope: {scope}. Expected one of {SCOPES}.")
+        with self._lock:
+            if budget is None:
+                self._budgets.pop((scope, key), None)
+            else:
+                self._budgets[(scope, key)] = budget
+
+    def _exceeded_budget(self, attribution: dict):
+        with self._lock:
+            for scope in SCOPES:
+                key = attribution.get(scope)
+                if key is None:
+                    continue
+                budget = self._budgets.get((scope, key)) or self._budgets.get((scope, None))
+                usage = self._totals[scope].get(key)
+                if budget is not None and usage is not None and budget.exceeded(usage):
+                    return scope, key, budget
+        return None
+
+    # --- Reporting ---
+
+    def get_usage(self, scope: str = None, key: str = None):
+        """
+        Returns the usage of one key of a scope, a {key: Usage} dict of a whole scope, or the overall usage if no
+        scope is given.
+        """
+        with self._lock:
+            if scope is None:
+                return self._total
+            if key is None:
+                return dict(self._totals[scope])
+            return self._totals[scope].get(key, Usage())
+
+    def reset(self):
+        with self._lock:
+            self._totals = {scope: {} for scope in SCOPES}
+            self._total = Usage()
+            self._counted_runs.clear()
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int, attribution: dict):
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            self._total.add(prompt_tokens, completion_tokens, cost)
+            for scope in SCOPES:
+                key = attribution.get(scope)
+                if key is not None:
+                    self._totals[scope].setdefault(key, Usage()).add(prompt_tokens, completion_tokens, cost)
+
+    # --- Client hook ---
+
+    def before_call(self, call):
+        attribution = self.current_attribution()
+        call.context["usage_attribution"] = attribution
+        exceeded = self._exceeded_budget(attribution)
+        if exceeded is None:
+            return
+        scope, key, budget = exceeded
+        if budget.action == "reject":
+            raise BudgetExceededError(f"Usage budget of {scope} '{key}' exceeded, {call.path} rejected.")
+        if call.path.endswith(_DOWNGRADABLE) and not _has_images(call.kwargs):
+            call.kwargs["model"] = budget.fallback_model
+
+    def after_call(self, call, response=None, error=None):
+        if error is not None or response is None:
+            return
+        prompt_tokens, completion_tokens = _usage_tokens(getattr(response, "usage", None))
+        if prompt_tokens is None:
+            return
+        if call.path.startswith("beta.threads"):
+            # runs report their usage on every retrieve once finished; count each run once
+            run_id = getattr(response, "id", None)
+            with self._lock:
+                if run_id in self._counted_runs:
+                    return
+                self._counted_runs[run_id] = True
+                while len(self._counted_runs) > _MAX_COUNTED_RUNS:
+                    self._counted_runs.popitem(last=False)
+        attribution = dict(call.context.get("usage_attribution", {}))
+        if "thread" not in attribution and getattr(response, "thread_id", None):
+            attribution["thread"] = response.thread_id
+        model = getattr(response, "model", None) or call.model
+        self.record(model, prompt_tokens, completion_tokens, attribution)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prices = None
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model and model.startswith(name):
+            prices = MODEL_PRICES[name]
+            break
+    if prices is None:
+        return 0.0
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1000
+
+
+def _usage_tokens(usage):
+    # usage is a model on chat completions and, depending on the API version, a plain dict on runs
+    if usage is None:
+        return None, None
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+
+
+def _has_images(kwargs: dict) -> bool:
+    return any(isinstance(message, dict) and isinstance(message.get("content"), list)
+               for message in kwargs.get("messages", None) or [])
+
+
+usage_tracker = UsageTracker()
+
+
+def get_usage_tracker():
+    return usage_tracker
+
+
+def set_usage_budget(scope: str, budget: UsageBudget = None, key: str = None):
+    usage_tracker.set_budget(scope, budget, key)
+
+
+def usage_context(**attribution):
+    return usage_tracker.context(**attribution)
@@ -0,0 +1,311 @@
+"""
+Orchestration benchmarks, run against the in-process fake of the OpenAI API (agency_swarm.util.fake_openai) so only
+the overhead of agency-swarm itself is measured.
+
+    python run_benchmarks.py                      # run, compare with baseline.json, exit 1 on regressions
+    python run_benchmarks.py --output out.json    # also write the results
+    python run_benchmarks.py --update-baseline    # store the results as the new baseline
+    python run_benchmarks.py --only routing       # run the benchmarks whose name contains "routing"
+
+Results are JSON: {"meta": {...}, "results": {name: {"value": float, "unit": str}}}. Every metric is lower-is-better;
+a metric regresses when it exceeds its baseline by more than --tolerance (relative).
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("AS_PROJECT_ROOT", tempfile.gettempdir())
+
+from pydantic import Field
+
+from agency_swarm import Agency, Agent, BaseTool
+from agency_swarm.sessions import Session
+from agency_swarm.threads import Thread
+from agency_swarm.threads.retention import ThreadRetentionPolicy
+from agency_swarm.tools import ToolFactory
+from agency_swarm.user import User
+from agency_swarm.util import set_openai_client
+from agency_swarm.util.fake_openai import FakeOpenAI
+from agency_swarm.util.log_config import set_console_log_level
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+BENCHMARKS = []
+
+
+def benchmark(func):
+    BENCHMARKS.append(func)
+    return func
+
+
+def measure(func, repeat: int, warmup: int = 1):
+    """Median wall time of `func` in milliseconds."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def drain(gen):
+    while True:
+        try:
+            next(gen)
+        except StopIteration as e:
+            return e.value
+
+
+def fresh_agent(name="Dev", tools=None):
+    # no thread limit, so benchmarks control the number of threads
+    agent = Agent(name=name, description=f"{name} agent.", instructions=f"You are {name}.", tools=tools,
+                  thread_retention=ThreadRetentionPolicy(max_threads=None))
+    agent.init_oai()
+    return agent
+
+
+class EchoTool(BaseTool):
+    """Returns its text."""
+    text: str = Field(..., description="Text to echo.")
+
+    def run(self, caller_thread=None):
+        return self.text
+
+
+# --- Benchmarks ---
+
+@benchmark
+def session_turn(scale):
+    """Per-turn orchestration overhead of Session.get_completion, new thread and follow-up turn."""
+    agent = fresh_agent()
+    user = User()
+    session = Session(user, agent)
+    counter = iter(range(10 ** 9))
+    new_thread = measure(lambda: (agent.remove_threads(user.user_id),
+                                  drain(session.get_completion(f"task {next(counter)}"))), repeat=20 * scale)
+    follow_up = measure(lambda: drain(session.get_completion(f"follow up {next(counter)}")), repeat=20 * scale)
+    return {"session_turn.new_thread": (new_thread, "ms"), "session_turn.follow_up": (follow_up, "ms")}
+
+
+@benchmark
+def routing(scale):
+    """Latency of routing a message versus the number of threads of the user."""
+    results = {}
+    for count in (1, 10, 50, 200):
+        agent = fresh_agent()
+        user = User()
+        session = Session(user, agent)
+        for index in range(count):
+            thread = Thread()
+            thread.owner = user.user_id
+            thread.task_description = json.dumps({"background": f"task {index}", "status": "uncompleted"})
+            agent.add_thread(thread)
+        counter = iter(range(10 ** 9))
+        elapsed = measure(lambda: session._retrieve_thread_of_topic(f"message {next(counter)}"), repeat=10 * scale)
+        results[f"routing.threads_{count}"] = (elapsed, "ms")
+    return results
+
+
+@benchmark
+def tool_dispatch(scale):
+    """Cost of dispatching one tool call in Session._execute_tool."""
+    agent = fresh_agent(tools=[EchoTool])
+    session = Session(User(), agent)
+    thread = Thread(deferred=True)
+    call = type("ToolCall", (), {"function": type("Function", (), {"name": "EchoTool",
+                                                                    "arguments": '{"text": "hello"}'})()})()
+
+    def dispatch():
+        for _ in range(100):
+            session._execute_tool(call, caller_thread=thread)
+
+    return {"tool_dispatch": (measure(dispatch, repeat=5 * scale) / 100, "ms")}
+
+
+def openapi_spec(paths: int) -> dict:
+    spec = {"openapi": "3.0.0", "info": {"title": "Bench", "version": "1.0"},
+            "servers": [{"url": "https://example.com"}], "paths": {},
+            "components": {"schemas": {"Item": {"type": "object", "properties": {
+                "id": {"type": "integer"}, "name": {"type": "string"},
+                "tags": {"type": "array", "items": {"type": "string"}}}}}}}
+    for index in range(paths):
+        spec["paths"][f"/items{index}/{{item_id}}"] = {"post": {
+            "operationId": f"updateItem{index}", "description": f"Updates item {index}.",
+            "parameters": [{"name": "item_id", "in": "path", "required": True, "schema": {"type": "string"}},
+                           {"name": "verbose", "in": "query", "schema": {"type": "boolean"}}],
+            "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}},
+        }}
+    return spec
+
+
+@benchmark
+def openapi_compile(scale):
+    """ToolFactory.from_openapi_schema compile time versus the number of operations in the spec."""
+    results = {}
+    for paths in (10, 50, 200):
+        text = json.dumps(openapi_spec(paths))
+        results[f"openapi_compile.paths_{paths}"] = (measure(lambda: ToolFactory.from_openapi_schema(text),
+                                                             repeat=max(1, 3 * scale)), "ms")
+    return results
+
+
+LARGE_SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "schemas",
+                               "petstore-multi-store.json")
+
+
+@benchmark
+def openapi_large_spec(scale):
+    """Compile time of a 304 operation spec, the schemas sent to the assistant, and the first call of one tool."""
+    with open(LARGE_SPEC_PATH) as f:
+        text = f.read()
+    compile_time = measure(lambda: ToolFactory.from_openapi_schema(text), repeat=max(1, 3 * scale))
+    tools = ToolFactory.from_openapi_schema(text)
+    schemas = measure(lambda: [tool.openai_schema for tool in tools], repeat=max(1, 3 * scale))
+    start = time.perf_counter()
+    tools[0](requestBody={"name": "doggie", "photoUrls": []})
+    first_call = (time.perf_counter() - start) * 1000
+    return {"openapi_large_spec.compile": (compile_time, "ms"), "openapi_large_spec.schemas": (schemas, "ms"),
+            "openapi_large_spec.first_call": (first_call, "ms")}
+
+
+@benchmark
+def agency_cold_start(scale):
+    """Time to construct and initialize an Agency versus its number of agents."""
+    results = {}
+    for count in (2, 5, 10):
+        def build():
+            set_openai_client(FakeOpenAI())
+            agents = [Agent(name=f"Agent{index}", description="Agent.", instructions="Work.") for index in range(count)]
+            Agency([agents[0]] + [[agents[0], agent] for agent in agents[1:]], watchdog_interval=None)
+            os.remove("settings.json")
+
+        results[f"agency_cold_start.agents_{count}"] = (measure(build, repeat=max(1, 3 * scale)), "ms")
+    set_openai_client(FakeOpenAI())
+    return results
+
+
+@benchmark
+def memory_per_thread(scale):
+    """Memory held per Thread registered with an agent, excluding the fake's copy of the remote thread."""
+    agent = fresh_agent()
+    count = 200 * scale
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for index in range(count):
+        thread = Thread(deferred=True)
+        thread.thread_id = f"thread_{index}"
+        thread.owner = "bench"
+        thread.task_description = json.dumps({"background": f"task {index}"})
+        agent.add_thread(thread)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return {"memory_per_thread": (allocated / count / 1024, "KiB")}
+
+
+@benchmark
+def import_time(scale):
+    """Time to import the package, and the Agency class, in a fresh interpreter."""
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT}
+
+    def timed_import(statement):
+        code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+        samples = [float(subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True,
+                                        text=True).stdout) * 1000 for _ in range(5 * scale)]
+        return statistics.median(samples)
+
+    return {"import_time.package": (timed_import("import agency_swarm"), "ms"),
+            "import_time.agency": (timed_import("from agency_swarm import Agency"), "ms")}
+
+
+# --- Runner ---
+
+def run(only: str = None, scale: int = 1) -> dict:
+    set_console_log_level(logging.WARNING)  # keep the file logging, it is part of the measured overhead
+
+    Session.poll_interval = 0
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)  # Agent.init_oai writes settings.json to the working directory
+        try:
+            for func in BENCHMARKS:
+                if only and only not in func.__name__:
+                    continue
+                set_openai_client(FakeOpenAI())
+                if os.path.exists("settings.json"):
+                    os.remove("settings.json")  # assistants saved by the previous benchmark's fake
+                for name, (value, unit) in func(scale).items():
+                    results[name] = {"value": round(value, 4), "unit": unit}
+                    print(f"{name:40s} {value:12.4f} {unit}")
+        finally:
+            set_openai_client(None)
+            os.chdir(cwd)
+
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "timestamp": datetime.utcnow().isoformat(timespec="seconds"), "scale": scale},
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Returns the metrics that regressed as (name, baseline, current) tuples."""
+    regressions = []
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None or previous["value"] <= 0:
+            continue
+        if current["value"] > previous["value"] * (1 + tolerance):
+            regressions.append((name, previous["value"], current["value"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the agency-swarm orchestration benchmarks.")
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline to compare with.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown. Defaults to 0.5.")
+    parser.add_argument("--only", help="Run only the benchmarks whose name contains this text.")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplies the number of repetitions.")
+    args = parser.parse_args(argv)
+
+    results = run(args.only, args.scale)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        return 0
+    if not os.path.isfile(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for name, previous, current in regressions:
+        print(f"REGRESSION {name}: {previous:.4f} -> {current:.4f}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm.tools.genesis import GetAvailableAgents, ImportAgent
+from agency_swarm.tools.genesis.util import Catalog, get_catalog
+
+AGENT_SOURCE = '''
+from agency_swarm import Agent
+from agency_swarm.tools import Retrieval
+from .tools import Search
+
+
+class ResearchAgent(Agent):
+    def __init__(self, **kwargs):
+        if 'tools' not in kwargs:
+            kwargs['tools'] = []
+        kwargs['tools'].extend([Search, Retrieval])
+        if 'description' not in kwargs:
+            kwargs['description'] = ("""Finds papers
+and summarizes them.""".replace("\\n", " "))
+        super().__init__(**kwargs)
+
+raise RuntimeError("imported")
+'''
+
+TOOL_SOURCE = '''
+from pydantic import Field
+from agency_swarm import BaseTool
+
+
+class Search(BaseTool):
+    """Searches the web."""
+    query: str = Field(..., description="The search query.")
+
+    def run(self):
+        return ""
+'''
+
+
+class AgentCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.package = os.path.join(self.tmp.name, "catalog_agents")
+        os.makedirs(self.package)
+        open(os.path.join(self.package, "__init__.py"), "w").close()
+        self.write("ResearchAgent.py", AGENT_SOURCE)
+        self.write("tools.py", TOOL_SOURCE)
+        sys.path.insert(0, self.tmp.name)
+
+    def tearDown(self):
+        sys.path.remove(self.tmp.name)
+        self.tmp.cleanup()
+
+    def write(self, name, source, mtime=None):
+        path = os.path.join(self.package, name)
+        with open(path, "w") as f:
+            f.write(source)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    def test_reads_classes_without_importing(self):
+        catalog = Catalog("catalog_agents")
+        agent = catalog.get("ResearchAgent", kind="agent")
+        self.assertEqual(agent.description, "Finds papers and summarizes them.")
+        self.assertEqual(agent.tools, ["Search", "Retrieval"])
+        self.assertEqual(agent.module, "catalog_agents.ResearchAgent")
+        tool = catalog.get("Search")
+        self.assertEqual((tool.kind, tool.description, tool.fields), ("tool", "Searches the web.",
+                                                                       {"query": "The search query."}))
+        self.assertNotIn("catalog_agents.ResearchAgent", sys.modules)
+
+    def test_invalidated_by_mtime(self):
+        catalog = Catalog("catalog_agents")
+        self.assertEqual(catalog.names(kind="agent"), ["ResearchAgent"])
+        mtime = os.stat(os.path.join(self.package, "ResearchAgent.py")).st_mtime_ns
+        self.write("ResearchAgent.py", AGENT_SOURCE.replace("Finds papers", "Finds books"), mtime + 10 ** 9)
+        self.assertTrue(catalog.get("ResearchAgent").description.startswith("Finds books"))
+        os.remove(os.path.join(self.package, "tools.py"))
+        self.assertIsNone(catalog.get("Search"))
+
+    def test_genesis_tools(self):
+        self.assertEqual(get_catalog().names(kind="agent"), ["BrowsingAgent", "CodingAgent"])
+        self.assertIn("'CodingAgent': 'This agent is equipped", GetAvailableAgents().run())
+        with self.assertRaises(ValueError):
+            ImportAgent(agent_name="MissingAgent")
+        self.assertEqual(ImportAgent(agent_name="CodingAgent").agent_name, "CodingAgent")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm import Agency, Agent
+from agency_swarm.agency import BatchRunner
+from agency_swarm.sessions import Session
+from agency_swarm.util import set_openai_client
+from agency_swarm.util.fake_openai import FakeOpenAI, constant
+
+
+class BatchRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)  # Agent.init_oai writes settings.json to the working directory
+        self.poll_interval = Session.poll_interval
+        Session.poll_interval = 0.01
+
+        self.fake = FakeOpenAI()
+        set_openai_client(self.fake)
+        ceo = Agent(name="CEO", description="Leads the agency.", instructions="Answer.")
+        self.agency = Agency([ceo], watchdog_interval=None)
+        with open("jobs.jsonl", "w") as f:
+            for index in range(5):
+                f.write(json.dumps({"id": f"job-{index}", "message": f"task {index}"}) + "\n")
+
+    def tearDown(self):
+        set_openai_client(None)
+        Session.poll_interval = self.poll_interval
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def read_results(self):
+        with open("results.jsonl") as f:
+            return [json.loads(line) for line in f]
+
+    def test_runs_jobs_and_resumes(self):
+        with open("results.jsonl", "w") as f:
+            f.write(json.dumps({"id": "job-0", "status": "completed", "response": "earlier"}) + "\n")
+            f.write(json.dumps({"id": "job-1", "status": "failed"}) + "\n")
+
+        summary = BatchRunner(self.agency, workers=3).run("jobs.jsonl", "results.jsonl")
+        self.assertEqual(summary, {"completed": 4, "failed": 0, "timeout": 0, "skipped": 1})
+        results = {result["id"]: result for result in self.read_results()[2:]}
+        self.assertEqual(sorted(results), ["job-1", "job-2", "job-3", "job-4"])
+        self.assertEqual(results["job-3"]["response"], "Echo: task 3")
+        self.assertGreater(results["job-3"]["usage"]["total_tokens"], 0)
+        self.assertEqual(len(self.agency.user_sessions), 0)  # per-job conversations are dropped
+
+        summary = BatchRunner(self.agency).run("jobs.jsonl", "results.jsonl")
+        self.assertEqual(summary["skipped"], 5)
+
+    def test_timeout_cancels_run(self):
+        self.fake.run_duration = constant(1)
+        summary = BatchRunner(self.agency, workers=5, timeout=0.1).run("jobs.jsonl", "results.jsonl")
+        self.assertEqual(summary["timeout"], 5)
+        self.assertTrue(all(result["status"] == "timeout" for result in self.read_results()))
+
+    def test_timeout_of_stuck_run(self):
+        # the runs stay in progress and nothing is yielded while the sessions poll them
+        self.fake.run_duration = constant(60)
+        Session.poll_interval = 5
+        started = time.monotonic()
+        summary = BatchRunner(self.agency, workers=5, timeout=0.3).run("jobs.jsonl", "results.jsonl")
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual(summary["timeout"], 5)
+        self.assertTrue(all(run["status"] == "cancelled" for run in self.fake._runs.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
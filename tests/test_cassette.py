@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm import Agent
+from agency_swarm.sessions import Session
+from agency_swarm.user import User
+from agency_swarm.util import set_openai_client, record_openai_traffic, ReplayClient
+from agency_swarm.util.cassette import CassetteMismatch, load_cassette, latency_profile
+from agency_swarm.util.fake_openai import FakeOpenAI, scripted, tool_call
+
+
+class CassetteTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.poll_interval = Session.poll_interval
+        Session.poll_interval = 0
+        self.cassette = os.path.join(self.tmp.name, "turns.jsonl.gz")
+
+        set_openai_client(FakeOpenAI(responders={"Dev": scripted(tool_call("Missing"), "Done")}))
+        recorder = record_openai_traffic(self.cassette)
+        try:
+            self.agent = Agent(name="Dev", description="Writes code.", instructions="Code.")
+            self.agent.init_oai()
+            self.user = User()
+            self.recorded = self._turn("hello")
+        finally:
+            recorder.close()
+
+    def tearDown(self):
+        set_openai_client(None)
+        Session.poll_interval = self.poll_interval
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _turn(self, message):
+        gen = Session(self.user, self.agent).get_completion(message)
+        while True:
+            try:
+                next(gen)
+            except StopIteration as e:
+                return e.value
+
+    def test_recording(self):
+        entries = load_cassette(self.cassette)
+        paths = [entry["path"] for entry in entries]
+        self.assertIn("beta.threads.create_and_run", paths)
+        self.assertIn("beta.threads.runs.submit_tool_outputs", paths)
+        self.assertTrue(all(entry["duration"] >= 0 for entry in entries))
+        self.assertEqual(latency_profile(entries)["beta.threads.runs.retrieve"]["calls"], paths.count("beta.threads.runs.retrieve"))
+
+    def test_replay(self):
+        self.agent.remove_threads(self.user.user_id)
+        replay = ReplayClient(self.cassette, strict=True)
+        set_openai_client(replay)
+        replay_paths = [entry["path"] for entry in load_cassette(self.cassette) if entry["path"].startswith("beta.threads")]
+        self.assertEqual(self._turn("hello"), self.recorded)
+        self.assertEqual([path for path, _, _ in replay.served], replay_paths)
+
+    def test_strict_replay_rejects_changed_requests(self):
+        self.agent.remove_threads(self.user.user_id)
+        set_openai_client(ReplayClient(self.cassette, strict=True))
+        with self.assertRaises(CassetteMismatch):
+            self._turn("something else")
+
+        set_openai_client(ReplayClient(self.cassette))
+        self.agent.remove_threads(self.user.user_id)
+        self.assertEqual(self._turn("something else"), self.recorded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from typing import Optional
+
+import openai
+from pydantic import Field
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm import Agency, Agent, BaseTool
+from agency_swarm.sessions import Session
+from agency_swarm.threads import Thread, ThreadWatchdog
+from agency_swarm.user import User
+from agency_swarm.util import set_openai_client
+from agency_swarm.util.fake_openai import FakeOpenAI, FakeOpenAIServer, scripted, tool_call, constant
+
+
+class Toggle(BaseTool):
+    """Switches a feature."""
+    enabled: bool = Field(..., description="Whether the feature is on.")
+    note: Optional[str] = Field(None, description="A note.")
+
+    def run(self, caller_thread=None):
+        return f"enabled={self.enabled} note={self.note}"
+
+
+class AsyncToggle(Toggle):
+    """Switches a feature asynchronously."""
+
+    async def run(self, caller_thread=None):
+        return f"async enabled={self.enabled}"
+
+
+class FakeOpenAITest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)  # Agent.init_oai writes settings.json to the working directory
+        self.poll_interval = Session.poll_interval
+        Session.poll_interval = 0.01
+
+        self.fake = FakeOpenAI(responders={
+            "CEO": scripted(tool_call("SendMessage", recipient="Dev", message="build it", chain_of_thought="delegate"),
+                            "Done"),
+        })
+        set_openai_client(self.fake)
+        self.ceo = Agent(name="CEO", description="Leads the agency.", instructions="Delegate.")
+        self.dev = Agent(name="Dev", description="Writes code.", instructions="Code.")
+        self.agency = Agency([self.ceo, [self.ceo, self.dev]], watchdog_interval=None)
+
+    def tearDown(self):
+        set_openai_client(None)
+        Session.poll_interval = self.poll_interval
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_turn_with_tool_call(self):
+        self.assertEqual(self.agency.get_completion("hello", yield_messages=False), "Done")
+        self.assertEqual(len(self.ceo.threads), 1)
+        self.assertEqual(len(self.dev.threads), 1)
+        dev_messages = self.fake.thread_messages(self.dev.threads[0].thread_id)
+        self.assertEqual([message.role for message in dev_messages], ["user", "assistant"])
+        self.assertEqual(dev_messages[1].content[0].text.value, "Echo: build it")
+        # brand-new threads are created with their first run
+        self.assertEqual(self.fake.calls["beta.threads.create_and_run"], 2)
+        self.assertNotIn("beta.threads.create", self.fake.calls)
+
+    def test_tool_arguments_are_json(self):
+        self.fake.responders["Tools"] = scripted(tool_call("Toggle", enabled=True, note=None), "Done")
+        agent = Agent(name="Tools", description="Toggles.", instructions="Toggle.", tools=[Toggle, AsyncToggle])
+        agent.init_oai()
+        outputs = [message.content for message in Session(User(), agent).get_completion("toggle")
+                   if message.msg_type == "function_output"]
+        self.assertEqual(outputs, ["enabled=True note=None"])
+
+        session = Session(User(), agent)
+
+        def call(name, arguments):
+            return SimpleNamespace(id=f"call_{name}", function=SimpleNamespace(name=name, arguments=arguments))
+        self.assertEqual(session._execute_async_tools([call("AsyncToggle", '{"enabled": false}')], None),
+                         {"call_AsyncToggle": "async enabled=False"})
+        # invalid arguments are reported to the model instead of failing the run
+        self.assertTrue(session._execute_tool(call("Toggle", '{"enabled": tru'), None).startswith(
+            "Error: Invalid JSON arguments for Toggle"))
+        self.assertTrue(session._execute_tool(call("Toggle", '__import__("os")'), None).startswith(
+            "Error: Invalid JSON"))
+        self.assertTrue(session._execute_async_tools([call("AsyncToggle", "[1]")], None)["call_AsyncToggle"]
+                        .startswith("Error: Arguments of AsyncToggle must be a JSON object"))
+
+    def test_concurrent_turns_fork_busy_thread(self):
+        user = User()
+        first, second = Session(user, self.dev), Session(user, self.dev)
+        self._drain(first.get_completion("start"))
+        origin = self.dev.threads[0]
+
+        self.fake.run_duration = constant(0.2)
+        worker = threading.Thread(target=self._drain, args=(first.get_completion("long task"),))
+        worker.start()
+        while origin.lease_owner is None:
+            time.sleep(0.005)
+        self.assertEqual(self._drain(second.get_completion("parallel task")), "Echo: parallel task")
+        worker.join()
+
+        self.assertEqual(self.dev.threads, [origin])
+        self.assertEqual(self.fake.thread_ids, [origin.thread_id])  # the fork was merged back and deleted
+        merged = [message.content[0].text.value for message in self.fake.thread_messages(origin.thread_id)]
+        self.assertTrue(any("parallel branch" in text and "Echo: parallel task" in text for text in merged))
+
+    def test_fork_long_transcript(self):
+        origin = Thread()
+        for i in range(8):
+            self.fake.beta.threads.messages.create(origin.thread_id, content=f"turn {i} " + "x" * 30000)
+        fork = Thread(copy_from=origin, deferred=True)
+        run = fork.create_and_run(self.dev.id, "next")
+        self.assertEqual(self.fake.beta.threads.runs.retrieve(run.id, thread_id=fork.thread_id).status, "completed")
+
+        texts = [message.content[0].text.value for message in self.fake.thread_messages(fork.thread_id)]
+        self.assertGreater(len(texts), 2)  # the transcript is split into several seed messages
+        self.assertIn("oldest messages were left out", texts[0])
+        self.assertNotIn("turn 0 ", "".join(texts))
+        self.assertIn("turn 7 ", "".join(texts))
+        self.assertEqual(texts[-2:], ["next", "Echo: next"])
+
+    def test_fork_starts_cold_when_transcript_is_rejected(self):
+        origin = Thread()
+        fork = Thread(copy_from=origin, deferred=True)
+        fork._seed_messages = [{"role": "user", "content": "x" * 40000, "file_ids": []}]
+        fork.create_and_run(self.dev.id, "next")
+        self.assertEqual(fork.forked_from, origin)
+        self.assertEqual(self.fake.thread_messages(fork.thread_id)[0].content[0].text.value, "next")
+
+    def test_watchdog_cancels_orphaned_run(self):
+        thread = Thread()
+        thread.owner = "alice"
+        self.dev.add_thread(thread)
+        run = self.fake.beta.threads.runs.create(thread_id=thread.thread_id, assistant_id=self.dev.id)
+        thread.active_run_id = run.id
+        thread.acquire("crashed-turn", ttl=0)
+
+        watchdog = ThreadWatchdog([self.dev])
+        self.assertEqual(watchdog.check(), [thread])
+        self.assertEqual(self.fake.beta.threads.runs.retrieve(run.id, thread_id=thread.thread_id).status, "cancelled")
+        self.assertTrue(thread.acquire("next-turn"))
+
+    def test_http_server(self):
+        with FakeOpenAIServer(self.fake) as server:
+            client = openai.OpenAI(base_url=server.url, api_key="fake", max_retries=0)
+            thread = client.beta.threads.create(messages=[{"role": "user", "content": "hi"}])
+            run = client.beta.threads.runs.create(thread_id=thread.id, assistant_id=self.dev.id)
+            self.assertEqual(client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id).status, "completed")
+            messages = client.beta.threads.messages.list(thread_id=thread.id)
+            self.assertEqual(messages.data[0].content[0].text.value, "Echo: hi")
+            self.assertEqual(client.files.create(file=("a.txt", b"abc"), purpose="assistants").bytes, 3)
+
+    @staticmethod
+    def _drain(gen):
+        while True:
+            try:
+                next(gen)
+            except StopIteration as e:
+                return e.value
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm.tools.genesis import FinalizeAgency
+from agency_swarm.tools.genesis.util import find_agent_classes, finalize_agency_source
+from agency_swarm.util import create_agent_template, set_openai_client
+from agency_swarm.util.fake_openai import FakeOpenAI
+
+# as written by CreateAgencyFolder
+AGENCY_PY = """from agency_swarm import Agency
+
+
+agency = Agency([ceo, [ceo, news_analysis],
+ [ceo, price_tracking],
+ [news_analysis, price_tracking]],
+shared_instructions='./agency_manifesto.md')
+
+if __name__ == '__main__':
+    agency.demo_gradio()
+"""
+
+
+class FinalizeAgencyTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name in ("CEO", "NewsAnalysisAgent", "PriceTrackingAgent"):
+                create_agent_template(name, f"{name} description", path=self.folder.name)
+        with open(os.path.join(self.folder.name, "agency.py"), "w") as f:
+            f.write(AGENCY_PY)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        set_openai_client(None)
+        self.folder.cleanup()
+
+    def test_find_agent_classes(self):
+        self.assertEqual(find_agent_classes(self.folder.name), {
+            "CEO": "CEO", "NewsAnalysisAgent": "NewsAnalysisAgent", "PriceTrackingAgent": "PriceTrackingAgent"})
+
+    def test_adds_imports_and_instances(self):
+        finalized = finalize_agency_source(AGENCY_PY, find_agent_classes(self.folder.name))
+        self.assertEqual(finalized, """from agency_swarm import Agency
+from CEO import CEO
+from NewsAnalysisAgent import NewsAnalysisAgent
+from PriceTrackingAgent import PriceTrackingAgent
+
+
+ceo = CEO()
+news_analysis = NewsAnalysisAgent()
+price_tracking = PriceTrackingAgent()
+
+agency = Agency([ceo, [ceo, news_analysis],
+ [ceo, price_tracking],
+ [news_analysis, price_tracking]],
+shared_instructions='./agency_manifesto.md')
+
+if __name__ == '__main__':
+    agency.demo_gradio()
+""")
+        # finalized files are left as they are
+        self.assertEqual(finalize_agency_source(finalized, find_agent_classes(self.folder.name)), finalized)
+
+    def test_keeps_existing_imports(self):
+        source = AGENCY_PY.replace("from agency_swarm import Agency\n",
+                                   "from agency_swarm import Agency\nfrom CEO import CEO\nceo = CEO()\n")
+        finalized = finalize_agency_source(source, find_agent_classes(self.folder.name))
+        self.assertEqual(finalized.count("from CEO import CEO"), 1)
+        self.assertEqual(finalized.count("ceo = CEO()"), 1)
+        self.assertIn("news_analysis = NewsAnalysisAgent()", finalized)
+
+    def test_unknown_agent(self):
+        with self.assertRaises(ValueError):
+            finalize_agency_source(AGENCY_PY.replace("price_tracking]]", "support]]"),
+                                   find_agent_classes(self.folder.name))
+
+    def test_tool_runs_locally(self):
+        fake = FakeOpenAI(chat_responder=lambda kwargs: self.fail("The model was called."))
+        set_openai_client(fake)
+        os.chdir(self.folder.name)
+        FinalizeAgency().run()
+        with open("agency.py") as f:
+            self.assertIn("price_tracking = PriceTrackingAgent()", f.read())
+
+    def test_tool_falls_back_to_model(self):
+        fixed = AGENCY_PY.replace("agency = ", "# fixed\nagency = ")
+        fake = FakeOpenAI(chat_responder=lambda kwargs: fixed)
+        set_openai_client(fake)
+        os.chdir(self.folder.name)
+        with open("agency.py", "w") as f:
+            f.write(AGENCY_PY.replace("if __name__", "  if __name__"))
+        FinalizeAgency().run()
+        with open("agency.py") as f:
+            self.assertEqual(f.read(), fixed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import datetime
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm import Agency, Agent, BaseTool
+from agency_swarm.agency import AgencyGateway
+from agency_swarm.sessions import Session
+from agency_swarm.util import set_openai_client
+from agency_swarm.util.fake_openai import FakeOpenAI, scripted, tool_call
+
+
+def http_scope(method, path):
+    return {"type": "http", "method": method, "path": path, "headers": []}
+
+
+class GetSchedule(BaseTool):
+    """Returns the release schedule."""
+
+    def run(self, caller_thread=None):
+        return {"release": datetime.date(2024, 1, 31), "platforms": {"linux"}}
+
+
+class GatewayTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)  # Agent.init_oai writes settings.json to the working directory
+        self.poll_interval = Session.poll_interval
+        Session.poll_interval = 0.01
+
+        set_openai_client(FakeOpenAI(responders={
+            "CEO": scripted(tool_call("SendMessage", recipient="Dev", message="build it", chain_of_thought="delegate"),
+                            "Done"),
+            "Planner": scripted(tool_call("GetSchedule"), "Done"),
+        }))
+        ceo = Agent(name="CEO", description="Leads the agency.", instructions="Delegate.")
+        dev = Agent(name="Dev", description="Writes code.", instructions="Code.")
+        self.gateway = AgencyGateway(Agency([ceo, [ceo, dev]], watchdog_interval=None), keepalive=0.05)
+
+    def tearDown(self):
+        self.gateway.close()
+        set_openai_client(None)
+        Session.poll_interval = self.poll_interval
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def request(self, method, path, body=b""):
+        sent = []
+
+        async def run():
+            events = [{"type": "http.request", "body": body, "more_body": False}]
+
+            async def receive():
+                if events:
+                    return events.pop(0)
+                await asyncio.sleep(3600)
+
+            async def send(event):
+                sent.append(event)
+
+            await self.gateway(http_scope(method, path), receive, send)
+
+        asyncio.run(run())
+        return sent[0]["status"], b"".join(event.get("body", b"") for event in sent[1:])
+
+    def test_sse_streams_each_message_once(self):
+        status, body = self.request("POST", "/v1/conversations/alice/messages", b'{"message": "hello"}')
+        self.assertEqual(status, 200)
+        events = [block for block in body.decode().split("\n\n") if block.startswith("event:")]
+        kinds = [block.split("\n")[0][len("event: "):] for block in events]
+        self.assertEqual(kinds[-1], "done")
+        self.assertEqual(json.loads(events[-1].split("data: ", 1)[1])["response"], "Done")
+        messages = [json.loads(block.split("data: ", 1)[1]) for block in events[:-1]]
+        self.assertEqual(messages[0]["content"], "hello")
+        self.assertTrue(any(message["sender"] == "Dev" for message in messages))
+        self.assertEqual(len(messages), len({json.dumps(message) for message in messages}))
+
+    def test_bad_requests(self):
+        self.assertEqual(self.request("POST", "/v1/conversations/alice/messages", b"not json")[0], 400)
+        self.assertEqual(self.request("GET", "/v1/conversations/alice/messages")[0], 405)
+        self.assertEqual(self.request("GET", "/nowhere")[0], 404)
+        self.assertEqual(self.request("GET", "/health")[0], 200)
+
+    def websocket(self, path, message):
+        sent = []
+
+        async def run():
+            events = [{"type": "websocket.connect"},
+                      {"type": "websocket.receive", "text": json.dumps({"message": message})}]
+            finished = asyncio.Event()
+
+            async def receive():
+                if events:
+                    return events.pop(0)
+                await finished.wait()
+                return {"type": "websocket.disconnect"}
+
+            async def send(event):
+                sent.append(event)
+                if "done" in event.get("text", ""):
+                    finished.set()
+
+            await self.gateway({"type": "websocket", "path": path}, receive, send)
+
+        asyncio.run(run())
+        self.assertEqual(sent[0]["type"], "websocket.accept")
+        return [json.loads(event["text"]) for event in sent if event["type"] == "websocket.send"]
+
+    def test_websocket(self):
+        payloads = self.websocket("/v1/conversations/bob/ws", "hello")
+        self.assertEqual(payloads[-1], {"type": "done", "response": "Done"})
+
+    def test_tool_output_that_is_not_json(self):
+        self.gateway.close()
+        planner = Agent(name="Planner", description="Plans releases.", instructions="Plan.", tools=[GetSchedule])
+        self.gateway = AgencyGateway(Agency([planner], watchdog_interval=None), keepalive=0.05)
+
+        status, body = self.request("POST", "/v1/conversations/alice/messages", b'{"message": "when?"}')
+        events = [json.loads(block.split("data: ", 1)[1]) for block in body.decode().split("\n\n")
+                  if block.startswith("event:")]
+        self.assertEqual(events[-1], {"type": "done", "response": "Done"})
+        outputs = [event["content"] for event in events if event.get("msg_type") == "function_output"]
+        self.assertEqual(len(outputs), 1)
+        self.assertIn("2024, 1, 31", outputs[0])
+
+        payloads = self.websocket("/v1/conversations/bob/ws", "when?")
+        self.assertEqual(payloads[-1], {"type": "done", "response": "Done"})
+        self.assertTrue(any("2024, 1, 31" in str(payload.get("content")) for payload in payloads))
+
+        # objects that reach the event serializer unconverted are sent as text
+        sent = []
+
+        async def send(event):
+            sent.append(event)
+        asyncio.run(AgencyGateway._send_event(send, "message", {"content": {datetime.date(2024, 1, 31)}}))
+        self.assertIn(b'"content": "{datetime.date(2024, 1, 31)}"', sent[0]["body"])
+
+
+if __name__ == '__main__':
+    unittest.main()
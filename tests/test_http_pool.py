@@ -0,0 +1,195 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm import Agent
+from agency_swarm.sessions import Session
+from agency_swarm.tools import ResponsePolicy, ToolFactory
+from agency_swarm.user import User
+from agency_swarm.util import set_openai_client
+from agency_swarm.util.fake_openai import FakeOpenAI, scripted, tool_call
+from agency_swarm.util.http_pool import AsyncHttpPool, HttpPool, HostSettings, run_coroutine
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    failures = 0
+
+    def do_GET(self):
+        if self.path.startswith("/moved"):
+            self.send_response(301)
+            self.send_header("Location", "/items")
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+        if self.path.startswith("/slow"):
+            time.sleep(0.3)
+        if self.path.startswith("/big"):
+            return self.reply(200, [{"id": index, "name": f"pet {index}", "tags": ["x"] * 20} for index in range(5000)])
+        if self.path.startswith("/flaky") and Handler.failures > 0:
+            Handler.failures -= 1
+            self.reply(503, {"error": "busy"})
+        else:
+            self.reply(200, {"path": self.path})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if Handler.failures > 0:
+            Handler.failures -= 1
+            return self.reply(429 if self.path.startswith("/limited") else 503, {"error": "busy"})
+        self.reply(200, {"path": self.path, "body": body})
+
+    def reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.pool = HttpPool(HostSettings(backoff=0.01))
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            self.assertEqual(self.pool.request("get", self.url + "/items").json(), {"path": "/items"})
+        metrics = self.pool.metrics()[self.url]
+        self.assertEqual(metrics["requests"], 5)
+        self.assertEqual(metrics["connections_opened"], 1)
+        self.assertEqual(metrics["connections_reused"], 4)
+
+    def test_retries_idempotent_requests(self):
+        Handler.failures = 2
+        self.assertEqual(self.pool.request("GET", self.url + "/flaky").status_code, 200)
+        self.assertEqual(self.pool.metrics()[self.url]["retries"], 2)
+
+        Handler.failures = 5
+        self.pool.configure_host("127.0.0.1", retries=0)
+        self.assertEqual(self.pool.request("GET", self.url + "/flaky").status_code, 503)
+        Handler.failures = 0
+
+    def test_rate_limited_posts_are_retried(self):
+        Handler.failures = 1
+        self.assertEqual(self.pool.request("POST", self.url + "/limited", json={}).status_code, 200)
+        self.assertEqual(self.pool.metrics()[self.url]["retries"], 1)
+        Handler.failures = 1
+        self.assertEqual(self.pool.request("POST", self.url + "/flaky", json={}).status_code, 503)
+        self.assertEqual(self.pool.metrics()[self.url]["retries"], 1)
+        Handler.failures = 0
+
+    def test_follows_redirects(self):
+        response = self.pool.request("GET", self.url + "/moved")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"path": "/items"})
+        self.assertEqual(self.pool.request("GET", self.url + "/moved", max_bytes=1000).json(), {"path": "/items"})
+
+    def test_openapi_tool_uses_pool(self):
+        spec = {"openapi": "3.0.0", "servers": [{"url": self.url}], "paths": {"/items/{item_id}": {"post": {
+            "operationId": "updateItem", "description": "Updates an item.",
+            "parameters": [{"name": "item_id", "in": "path", "required": True, "schema": {"type": "string"}}],
+            "requestBody": {"content": {"application/json": {"schema": {
+                "type": "object", "properties": {"name": {"type": "string"}}}}}},
+        }}}}
+        tool = ToolFactory.from_openapi_schema(spec)[0]
+        output = tool(parameters={"item_id": "7"}, requestBody={"name": "x"}).run()
+        self.assertEqual(output, '{"path":"/items/7","body":{"name":"x"}}')
+
+    def test_capped_download(self):
+        response = self.pool.request("GET", self.url + "/big", max_bytes=1000)
+        self.assertTrue(response.truncated)
+        self.assertEqual(len(response.content), 1000)
+        self.assertEqual(self.pool.request("GET", self.url + "/items", max_bytes=1000).json(), {"path": "/items"})
+        # the truncated response was closed, its connection is not left hanging
+        self.assertEqual(self.pool.request("GET", self.url + "/items").status_code, 200)
+
+    def test_openapi_response_policy(self):
+        spec = {"openapi": "3.0.0", "servers": [{"url": self.url}], "paths": {
+            "/big": {"get": {"operationId": "listPets", "description": "Lists pets."}},
+            "/big/names": {"get": {"operationId": "listNames", "description": "Lists pet names."}},
+        }}
+        policy = ResponsePolicy(max_chars=500, select={"listPets": ["id", "name"], "listNames": "$[*].name"})
+        list_pets, list_names = ToolFactory.from_openapi_schema(spec, response_policy=policy)
+
+        output = list_pets().run()
+        self.assertTrue(output.startswith('[{"id":0,"name":"pet 0"},{"id":1,"name":"pet 1"}'))
+        self.assertIn("[truncated: showing 500 of", output)
+        self.assertIn("5000 items in total", output)
+        self.assertTrue(list_names().run().startswith('["pet 0","pet 1",'))
+
+        capped = ToolFactory.from_openapi_schema(spec, response_policy=ResponsePolicy(max_bytes=100))[0]
+        self.assertIn("exceeded 100 bytes", capped().run())
+
+
+class AsyncToolTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)  # Agent.init_oai writes settings.json to the working directory
+        self.poll_interval = Session.poll_interval
+        Session.poll_interval = 0.01
+
+    def tearDown(self):
+        set_openai_client(None)
+        Session.poll_interval = self.poll_interval
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_async_pool(self):
+        pool = AsyncHttpPool()
+
+        async def fetch_all():
+            return await asyncio.gather(*(pool.request("GET", f"{self.url}/slow/{index}") for index in range(5)))
+
+        started = time.monotonic()
+        responses = run_coroutine(fetch_all())
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual([response.json()["path"] for response in responses], [f"/slow/{index}" for index in range(5)])
+        self.assertEqual(pool.metrics()[self.url]["requests"], 5)
+        self.assertEqual(run_coroutine(pool.request("GET", self.url + "/moved")).json(), {"path": "/items"})
+        pool.close()
+
+    def test_async_tool_calls_run_concurrently(self):
+        spec = {"openapi": "3.0.0", "servers": [{"url": self.url}], "paths": {
+            "/slow/a": {"get": {"operationId": "getA", "description": "Slow A."}},
+            "/slow/b": {"get": {"operationId": "getB", "description": "Slow B."}},
+        }}
+        tools = ToolFactory.from_openapi_schema(spec, async_tools=True)
+        fake = FakeOpenAI(responders={"Dev": scripted([tool_call("getA"), tool_call("getB")], "Done")})
+        set_openai_client(fake)
+        dev = Agent(name="Dev", description="Calls APIs.", instructions="Call.", tools=tools)
+        dev.init_oai()
+
+        started = time.monotonic()
+        gen = Session(User(), dev).get_completion("go")
+        outputs = [message.content for message in gen if message.msg_type == "function_output"]
+        self.assertLess(time.monotonic() - started, 0.55)
+        self.assertEqual(sorted(outputs), ['{"path":"/slow/a"}', '{"path":"/slow/b"}'])
+
+
+if __name__ == '__main__':
+    unittest.main()
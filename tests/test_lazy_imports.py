@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, '../agency-swarm')
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def run_python(code, cwd):
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT, "AS_PROJECT_ROOT": cwd}
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True,
+                          check=True).stdout.split()
+
+
+class LazyImportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_import_is_cheap(self):
+        heavy = run_python("import sys, agency_swarm, agency_swarm.util, agency_swarm.agency, agency_swarm.cli; "
+                           "print(*sorted({m.split('.')[0] for m in sys.modules} & "
+                           "{'openai', 'instructor', 'rich', 'deepdiff', 'dotenv', 'httpx'}))", self.tmp.name)
+        self.assertEqual(heavy, [])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "logs")))
+
+    def test_lazy_names(self):
+        names = run_python("from agency_swarm import Agency, BaseTool, set_usage_budget; "
+                           "from agency_swarm.util import create_agent_template, get_http_pool; "
+                           "print(Agency.__name__, BaseTool.__name__, set_usage_budget.__name__, "
+                           "create_agent_template.__name__, get_http_pool.__name__)", self.tmp.name)
+        self.assertEqual(names, ["Agency", "BaseTool", "set_usage_budget", "create_agent_template", "get_http_pool"])
+        with self.assertRaises(subprocess.CalledProcessError):
+            run_python("from agency_swarm import Missing", self.tmp.name)
+
+    def test_logging_is_set_up_by_the_first_record(self):
+        files = run_python("import os; from agency_swarm.util.log_config import get_logger, flush_logging; "
+                           "logger = get_logger(); print(os.path.exists('logs')); logger.debug('first'); "
+                           "flush_logging(); print(len(os.listdir('logs')))", self.tmp.name)
+        self.assertEqual(files, ["False", "1"])
+        with open(os.path.join(self.tmp.name, "logs", os.listdir(os.path.join(self.tmp.name, "logs"))[0])) as f:
+            self.assertIn('"message": "first"', f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import logging
+import queue
+import sys
+import unittest
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm.util.log_config import (JsonLinesFormatter, NonBlockingQueueHandler, VerboseSamplingFilter,
+                                          flush_logging, setup_logging, truncate)
+
+
+def make_record(message, **extra):
+    record = logging.LogRecord("agency_swarm", logging.INFO, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class LogConfigTest(unittest.TestCase):
+    def test_json_lines_with_structured_fields(self):
+        line = JsonLinesFormatter().format(make_record("hello", agent="CEO", thread_id="thread_1", run_id="run_1"))
+        entry = json.loads(line)
+        self.assertEqual(entry["message"], "hello")
+        self.assertEqual((entry["agent"], entry["thread_id"], entry["run_id"]), ("CEO", "thread_1", "run_1"))
+        self.assertNotIn("user_id", entry)
+
+    def test_truncation(self):
+        self.assertEqual(truncate("abc", 10), "abc")
+        self.assertEqual(truncate("a" * 20, 10), "a" * 10 + "... [10 chars truncated]")
+
+    def test_verbose_sampling(self):
+        self.assertTrue(VerboseSamplingFilter(rate=0).filter(make_record("poll")))
+        self.assertFalse(VerboseSamplingFilter(rate=0).filter(make_record("poll", verbose=True)))
+        self.assertTrue(VerboseSamplingFilter(rate=1).filter(make_record("poll", verbose=True)))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        handler.handle(make_record("first"))
+        handler.handle(make_record("second"))
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(handler.queue.get_nowait().getMessage(), "first")
+
+    def test_setup_logging_is_asynchronous(self):
+        logger = setup_logging()
+        self.assertEqual([type(handler) for handler in logger.handlers], [NonBlockingQueueHandler])
+        logger.debug("background write", extra={"agent": "CEO"})
+        flush_logging()
+
+
+if __name__ == '__main__':
+    unittest.main()
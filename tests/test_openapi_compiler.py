@@ -0,0 +1,101 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from pydantic import ValidationError
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm import Agent
+from agency_swarm.tools import BaseTool, OpenAPICompiler, ToolFactory
+from agency_swarm.util import set_openai_client
+from agency_swarm.util.fake_openai import FakeOpenAI
+
+
+class OpenAPICompilerTest(unittest.TestCase):
+    def setUp(self):
+        with open("./data/schemas/petstore-multi-store.json", "r") as f:
+            self.spec_text = f.read()
+
+    def test_compiles_every_operation_lazily(self):
+        tools = ToolFactory.from_openapi_schema(self.spec_text)
+        self.assertEqual(len(tools), 304)
+        self.assertTrue(all(issubclass(tool, BaseTool) for tool in tools))
+        self.assertFalse(any("__openapi_model__" in tool.__dict__ for tool in tools))
+
+        update_pet = next(tool for tool in tools if tool.__name__ == "updatePetStore3")
+        schema = update_pet.openai_schema
+        self.assertEqual(schema["parameters"]["required"], ["requestBody"])
+        self.assertEqual(schema["parameters"]["properties"]["requestBody"]["properties"]["category"]["properties"],
+                         {"id": {"type": "integer", "format": "int64", "example": 1},
+                          "name": {"type": "string", "example": "Dogs"}})
+        json.dumps([tool.openai_schema for tool in tools])
+
+        tool = update_pet(requestBody={"name": "doggie", "photoUrls": [], "category": {"id": 1}})
+        self.assertIsInstance(tool, update_pet)
+        self.assertEqual(tool.model_dump()["requestBody"]["category"]["id"], 1)
+        with self.assertRaises(ValidationError):
+            update_pet(requestBody={"photoUrls": []})  # name is required
+
+    def test_compiled_model_keeps_function_schema(self):
+        tool = ToolFactory.from_openapi_schema(self.spec_text)[0]
+        self.assertEqual(tool.compile_model().openai_schema, tool.openai_schema)
+
+    def test_malformed_schema_file(self):
+        set_openai_client(FakeOpenAI())
+        self.addCleanup(set_openai_client, None)
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "broken.json"), "w") as f:
+                f.write("{not json")
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output), self.assertRaises(ValueError):
+                Agent(name="Dev", description="Calls APIs.", schemas_folder=folder)
+        self.assertIn("Invalid OpenAPI schema: broken.json", output.getvalue())
+
+    def test_path_level_parameters_and_shared_models(self):
+        compiler = OpenAPICompiler(json.loads(self.spec_text))
+        tools = {tool.__name__: tool for tool in compiler.compile()}
+        get_pet = tools["getPetByIdStore1"]
+        self.assertEqual(get_pet.openai_schema["parameters"]["properties"]["parameters"]["required"], ["petId"])
+
+        first = tools["addPetStore1"].compile_model().model_fields["requestBody"].annotation
+        second = tools["updatePetStore9"].compile_model().model_fields["requestBody"].annotation
+        self.assertIs(first, second)  # one model for the Pet component
+
+    def test_recursive_refs(self):
+        spec = {"openapi": "3.0.0", "servers": [{"url": "https://example.com"}], "paths": {"/nodes": {"post": {
+            "operationId": "addNode", "description": "Adds a node.",
+            "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Node"}}}},
+        }}}, "components": {"schemas": {"Node": {"type": "object", "properties": {
+            "name": {"type": "string"}, "children": {"type": "array", "items": {"$ref": "#/components/schemas/Node"}}}}}}}
+        tool = ToolFactory.from_openapi_schema(spec)[0]
+        node = tool(requestBody={"name": "root", "children": [{"name": "leaf"}]})
+        self.assertEqual(node.model_dump()["requestBody"]["children"][0], {"name": "leaf"})
+
+    def test_models_are_interned_across_compilers(self):
+        first = OpenAPICompiler(self.spec_text).compile()[0].compile_model()
+        second = OpenAPICompiler(self.spec_text).compile()[0].compile_model()
+        self.assertIsNot(first, second)
+        self.assertIs(first.model_fields["requestBody"].annotation, second.model_fields["requestBody"].annotation)
+
+    def test_openai_schema_models_are_interned(self):
+        def function(name, location_properties):
+            return {"name": name, "description": f"{name} tool.", "parameters": {"type": "object", "properties": {
+                "location": {"type": "object", "title": "Location", "properties": location_properties}}}}
+
+        city = {"city": {"type": "string"}, "zip": {"type": "string"}}
+        first = ToolFactory.from_openai_schema(function("GetWeather", city), lambda self: None)
+        second = ToolFactory.from_openai_schema(function("GetTime", dict(reversed(city.items()))), lambda self: None)
+        third = ToolFactory.from_openai_schema(function("GetMap", {"lat": {"type": "number"}}), lambda self: None)
+
+        location = first.model_fields["location"].annotation
+        self.assertIs(second.model_fields["location"].annotation, location)
+        self.assertIsNot(third.model_fields["location"].annotation, location)
+        self.assertEqual(second(location={"city": "Paris"}).location.city, "Paris")
+
+
+if __name__ == '__main__':
+    unittest.main()
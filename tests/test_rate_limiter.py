@@ -0,0 +1,129 @@
+import sys
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm.util.instrumented_client import InstrumentedClient
+from agency_swarm.util.rate_limiter import RequestScheduler, RequestPriority, estimate_tokens
+
+
+class FakeCompletions:
+    _is_api_resource = True
+
+    def create(self, **kwargs):
+        return kwargs
+
+
+class FakeChat:
+    _is_api_resource = True
+    completions = FakeCompletions()
+
+
+class FakeRuns:
+    _is_api_resource = True
+
+    def create(self, **kwargs):
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=100), **kwargs)
+
+
+class FakeThreads:
+    _is_api_resource = True
+    runs = FakeRuns()
+
+
+class FakeBeta:
+    _is_api_resource = True
+    threads = FakeThreads()
+
+
+class FakeClient:
+    api_key = "test"
+    chat = FakeChat()
+    beta = FakeBeta()
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_unlimited_by_default(self):
+        scheduler = RequestScheduler()
+        start = time.monotonic()
+        for _ in range(100):
+            scheduler.acquire("gpt-4", tokens=1000)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_requests_per_minute(self):
+        scheduler = RequestScheduler()
+        scheduler.set_limits("gpt-4", requests_per_minute=600)  # 10 per second, burst of 600
+        scheduler._limiters["gpt-4"].requests.level = 0
+        start = time.monotonic()
+        for _ in range(3):
+            scheduler.acquire("gpt-4")
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+    def test_priority_order(self):
+        scheduler = RequestScheduler()
+        scheduler.set_limits(requests_per_minute=1200)  # one request every 50ms
+        scheduler._default.requests.level = 0
+        order = []
+
+        def worker(priority):
+            scheduler.acquire(None, priority=priority)
+            order.append(priority)
+
+        threads = [threading.Thread(target=worker, args=(RequestPriority.Background,)) for _ in range(3)]
+        threads.append(threading.Thread(target=worker, args=(RequestPriority.UserFacing,)))
+        for thread in threads:
+            thread.start()
+            time.sleep(0.005)
+        for thread in threads:
+            thread.join()
+
+        # the user-facing call arrives last but overtakes the queued background calls
+        self.assertEqual(order[0], RequestPriority.UserFacing)
+        self.assertEqual(order[1:], [RequestPriority.Background] * 3)
+
+    def test_client_calls_go_through_hooks(self):
+        calls = []
+
+        class Hook:
+            def before_call(self, call):
+                calls.append(call.path)
+                call.kwargs["model"] = "gpt-3.5-turbo"
+
+            def after_call(self, call, response=None, error=None):
+                calls.append(call.duration is not None)
+
+        client = InstrumentedClient(FakeClient(), hooks=[Hook()])
+        response = client.chat.completions.create(model="gpt-4", messages=[])
+
+        self.assertEqual(client.api_key, "test")
+        self.assertEqual(response["model"], "gpt-3.5-turbo")
+        self.assertEqual(calls, ["chat.completions.create", True])
+
+    def test_model_limits_apply_to_runs(self):
+        scheduler = RequestScheduler()
+        scheduler.set_limits("gpt-4", requests_per_minute=600, tokens_per_minute=6000)
+        scheduler._limiters["gpt-4"].requests.level = 0
+        client = InstrumentedClient(FakeClient(), hooks=[scheduler])
+
+        # runs.create has no model argument, the session passes the assistant's model
+        start = time.monotonic()
+        for _ in range(3):
+            client.beta.threads.runs.create(thread_id="thread", assistant_id="asst")
+        self.assertLess(time.monotonic() - start, 0.1)
+        start = time.monotonic()
+        with scheduler.model("gpt-4"):
+            for _ in range(3):
+                client.beta.threads.runs.create(thread_id="thread", assistant_id="asst")
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+        # and their usage is charged to the same model's token bucket
+        self.assertLess(scheduler._limiters["gpt-4"].tokens.level, 6000 - 200)
+
+    def test_estimate_tokens(self):
+        tokens = estimate_tokens({"messages": [{"role": "user", "content": "a" * 400}], "max_tokens": 100})
+        self.assertEqual(tokens, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import unittest
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm.tools import ResponsePolicy
+from agency_swarm.tools.ResponsePolicy import project_fields, select_path
+
+
+class Response:
+    def __init__(self, content: bytes, status_code=200, truncated=False):
+        self.content = content
+        self.status_code = status_code
+        self.truncated = truncated
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def json(self):
+        import json
+        return json.loads(self.content)
+
+
+class ResponsePolicyTest(unittest.TestCase):
+    data = {"store": {"name": "Main", "pets": [
+        {"id": 1, "name": "Rex", "owner": {"name": "Ann", "email": "ann@example.com"}},
+        {"id": 2, "name": "Tom", "owner": {"name": "Bob", "email": "bob@example.com"}},
+    ]}}
+
+    def test_select_path(self):
+        self.assertEqual(select_path(self.data, "$.store.name"), "Main")
+        self.assertEqual(select_path(self.data, "$['store'].pets[1].id"), 2)
+        self.assertEqual(select_path(self.data, "$.store.pets[-1].name"), "Tom")
+        self.assertEqual(select_path(self.data, "$.store.pets[*].owner.name"), ["Ann", "Bob"])
+        self.assertEqual(select_path(self.data, "$..email"), ["ann@example.com", "bob@example.com"])
+        self.assertIsNone(select_path(self.data, "$.store.missing"))
+        with self.assertRaises(ValueError):
+            select_path(self.data, "$.store[?(@.id)]")
+
+    def test_project_fields(self):
+        self.assertEqual(project_fields(self.data["store"]["pets"], ["name", "owner.name"]),
+                         [{"name": "Rex", "owner": {"name": "Ann"}}, {"name": "Tom", "owner": {"name": "Bob"}}])
+
+    def test_apply(self):
+        policy = ResponsePolicy(select={"getStore": "$.store.pets[*].id", "*": ["store.name"]})
+        response = Response('{"store": {"name": "Müller", "pets": [{"id": 1}, {"id": 2}]}}'.encode())
+        self.assertEqual(policy.apply("getStore", response), "[1,2]")
+        self.assertEqual(policy.apply("other", response), '{"store":{"name":"Müller"}}')
+        self.assertEqual(policy.apply("other", Response(b"not json", status_code=500)), "HTTP 500: not json")
+
+    def test_truncation_marker(self):
+        policy = ResponsePolicy(max_chars=20)
+        output = policy.apply("list", Response(b'{"a": "' + b"x" * 100 + b'", "b": 1}'))
+        self.assertTrue(output.startswith('{"a":"xxxxxxxxxxxxxx\n[truncated: showing 20 of 114 characters'))
+        self.assertIn("top-level keys: a, b", output)
+
+        output = ResponsePolicy(max_bytes=10).apply("list", Response(b'{"a": [1, ', truncated=True))
+        self.assertEqual(output, '{"a": [1, \n[truncated: the response exceeded 10 bytes and was not fully downloaded]')
+
+
+if __name__ == '__main__':
+    unittest.main()
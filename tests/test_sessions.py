@@ -0,0 +1,142 @@
+import json
+import sys
+import time
+import unittest
+
+from openai.types.chat import ChatCompletion
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm.sessions import SessionPool, SessionLedger
+from agency_swarm.threads import TaskDescription
+from agency_swarm.util import set_openai_client
+from agency_swarm.util.fake_openai import FakeOpenAI
+
+
+class StubThread:
+    def __init__(self, owner):
+        self.owner = owner
+
+
+class LedgerThread:
+    def __init__(self, description=""):
+        self.task_description = description
+        self.pending_history = []
+
+    def add_history(self, history):
+        self.pending_history.append(history)
+
+    def take_history(self):
+        history, self.pending_history = self.pending_history, []
+        return history
+
+    def restore_history(self, history):
+        self.pending_history[:0] = history
+
+
+class StubCompletions:
+    def __init__(self, *arguments):
+        self.arguments = list(arguments)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = {"role": "assistant", "content": None,
+                   "function_call": {"name": kwargs["function_call"]["name"], "arguments": self.arguments.pop(0)}}
+        return ChatCompletion.model_validate({
+            "id": "chatcmpl", "object": "chat.completion", "created": 0, "model": kwargs["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "logprobs": None, "message": message}],
+        })
+
+
+class StubClient:
+    def __init__(self, *arguments):
+        self.completions = StubCompletions(*arguments)
+        self.chat = self
+
+
+class StubAgent:
+    name = "CEO"
+
+    def __init__(self):
+        self.threads = []
+
+    def remove_threads(self, owner):
+        removed = [thread for thread in self.threads if thread.owner == owner]
+        self.threads = [thread for thread in self.threads if thread.owner != owner]
+        return removed
+
+
+class SessionPoolTest(unittest.TestCase):
+    def setUp(self):
+        set_openai_client(FakeOpenAI())  # the pooled sessions get a client, no credentials needed
+        self.agent = StubAgent()
+        self.pool = SessionPool(self.agent, [self.agent], max_sessions=2, idle_timeout=60)
+
+    def tearDown(self):
+        set_openai_client(None)
+
+    def test_sessions_are_isolated_per_user(self):
+        alice = self.pool._checkout("alice")
+        bob = self.pool._checkout("bob")
+        self.assertIsNot(alice.session, bob.session)
+        self.assertEqual(alice.session.owner, "alice")
+        self.assertEqual(bob.session.owner, "bob")
+        self.assertIs(self.pool._checkout("alice"), alice)
+
+    def test_lru_eviction_drops_threads(self):
+        for user_id in ["alice", "bob", "carol"]:
+            self.agent.threads.append(StubThread(user_id))
+            self.pool._checkin(self.pool._checkout(user_id))
+
+        self.assertEqual(len(self.pool), 2)
+        self.assertNotIn("alice", self.pool)
+        self.assertEqual([thread.owner for thread in self.agent.threads], ["bob", "carol"])
+
+    def test_sessions_in_use_are_not_evicted(self):
+        self.pool.idle_timeout = 0
+        entry = self.pool._checkout("alice")
+        time.sleep(0.01)
+        self.assertEqual(self.pool.evict_idle(), [])
+        self.pool._checkin(entry)
+        time.sleep(0.01)
+        self.assertEqual(self.pool.evict_idle(), ["alice"])
+
+
+class SessionLedgerTest(unittest.TestCase):
+    description = {"background": "b", "task_content": "c", "completion_conditions": "d",
+                   "existing_results": ["r"], "unknown_results": [], "status": "completed"}
+
+    def test_routing_and_description_in_one_call(self):
+        arguments = json.dumps({"descriptions": [{"session_id": 2, "description": self.description}],
+                                "routing": {"session_id": 2, "reason": "same task"}})
+        client = StubClient(arguments)
+        threads = [LedgerThread(), LedgerThread()]
+        threads[1].add_history("# Message 1: hi")
+
+        ledger = SessionLedger(client)
+        self.assertIs(ledger.route(threads, "CEO:hello"), threads[1])
+        self.assertEqual(len(client.completions.calls), 1)
+        self.assertEqual(threads[1].task_description.status, "completed")
+        self.assertEqual(threads[1].pending_history, [])
+
+    def test_invalid_response_is_retried_then_falls_back(self):
+        invalid = json.dumps({"routing": {"session_id": 7, "reason": "?"}})
+        client = StubClient(invalid, "not json")
+        threads = [LedgerThread()]
+        threads[0].add_history("# Message 1: hi")
+
+        self.assertIsNone(SessionLedger(client, max_retries=1).route(threads, "CEO:hello"))
+        self.assertEqual(len(client.completions.calls), 2)
+        self.assertEqual(threads[0].pending_history, ["# Message 1: hi"])
+
+    def test_legacy_description_is_parsed(self):
+        text = 'Sure: {"backgroud": "b", "existing results": "- one\\n- two", "status": "Completed"}'
+        description = TaskDescription.parse(text)
+        self.assertEqual(description.background, "b")
+        self.assertEqual(description.existing_results, ["one", "two"])
+        self.assertTrue(description.is_completed)
+        self.assertIsNone(TaskDescription.parse("no description"))
+
+
+if __name__ == '__main__':
+    unittest.main()
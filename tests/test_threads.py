@@ -0,0 +1,85 @@
+import json
+import sys
+import time
+import unittest
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm.threads.retention import ThreadRetentionPolicy, is_task_completed
+from agency_swarm.threads.routing_cache import RoutingCache
+
+
+class StubThread:
+    def __init__(self, last_used_at, status="uncompleted", lease_owner=None):
+        self.last_used_at = last_used_at
+        self.lease_owner = lease_owner
+        self.task_description = json.dumps({"status": status})
+
+
+class ThreadRetentionTest(unittest.TestCase):
+    def test_lru_beyond_max_threads(self):
+        threads = [StubThread(last_used_at=i) for i in range(5)]
+        policy = ThreadRetentionPolicy(max_threads=3)
+        self.assertEqual(policy.select_for_archival(threads, now=5), threads[:2])
+
+    def test_completed_and_idle_threads(self):
+        completed = StubThread(last_used_at=9, status="completed")
+        idle = StubThread(last_used_at=0)
+        fresh = StubThread(last_used_at=9)
+        policy = ThreadRetentionPolicy(max_threads=None, max_idle_seconds=5)
+        self.assertEqual(policy.select_for_archival([completed, idle, fresh], now=10), [completed, idle])
+
+    def test_leased_threads_are_kept(self):
+        leased = StubThread(last_used_at=0, status="completed", lease_owner="turn")
+        policy = ThreadRetentionPolicy(max_threads=0, max_idle_seconds=0)
+        self.assertEqual(policy.select_for_archival([leased], now=time.monotonic()), [])
+
+    def test_is_task_completed(self):
+        self.assertTrue(is_task_completed(StubThread(0, status="Completed")))
+        self.assertFalse(is_task_completed(StubThread(0, status="uncompleted")))
+        thread = StubThread(0)
+        thread.task_description = "not json"
+        self.assertFalse(is_task_completed(thread))
+
+
+class RoutingCacheTest(unittest.TestCase):
+    def test_exact_hit_after_normalization(self):
+        cache = RoutingCache()
+        cache.store("user", (1, 0), "Please summarize the report.", "thread_1")
+        self.assertEqual(cache.lookup("user", (1, 0), "please   summarize the report"), (True, "thread_1"))
+        self.assertEqual(cache.lookup("other_user", (1, 0), "please summarize the report"), (False, None))
+
+    def test_new_thread_decisions_are_cached(self):
+        cache = RoutingCache()
+        cache.store("user", (1, 0), "hello", None)
+        self.assertEqual(cache.lookup("user", (1, 0), "hello"), (True, None))
+
+    def test_version_change_invalidates(self):
+        cache = RoutingCache()
+        cache.store("user", (1, 0), "hello", "thread_1")
+        self.assertEqual(cache.lookup("user", (1, 1), "hello"), (False, None))
+        self.assertEqual(cache.lookup("user", (2, 0), "hello"), (False, None))
+
+    def test_near_duplicates(self):
+        cache = RoutingCache(similarity_threshold=0.8)
+        cache.store("user", (1, 0), "find flights from paris to berlin tomorrow morning", "thread_1")
+        hit = cache.lookup("user", (1, 0), "find flights from paris to berlin tomorrow morning please")
+        self.assertEqual(hit, (True, "thread_1"))
+        self.assertEqual(cache.lookup("user", (1, 0), "book a hotel in rome"), (False, None))
+
+    def test_embeddings(self):
+        vectors = {"weather in paris": [1.0, 0.0], "paris weather": [0.99, 0.05], "stock prices": [0.0, 1.0]}
+        cache = RoutingCache(embed=lambda text: vectors[text])
+        cache.store("user", (1, 0), "weather in Paris?", "thread_1")
+        self.assertEqual(cache.lookup("user", (1, 0), "Paris weather"), (True, "thread_1"))
+        self.assertEqual(cache.lookup("user", (1, 0), "stock prices"), (False, None))
+
+    def test_miss_embeds_once(self):
+        calls = []
+        cache = RoutingCache(embed=lambda text: calls.append(text) or [1.0, 0.0])
+        self.assertEqual(cache.lookup("user", (1, 0), "weather in Paris?"), (False, None))
+        cache.store("user", (1, 0), "weather in Paris?", "thread_1")
+        self.assertEqual(calls, ["weather in paris"])
+
+
+if __name__ == '__main__':
+    unittest.main()
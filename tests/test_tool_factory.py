@@ -103,7 +103,7 @@ class ToolFactoryTest(unittest.TestCase):
 
         print(output)
 
-        assert output['output']['transformed']['data'] == 'test complete.'
+        assert json.loads(output)['output']['transformed']['data'] == 'test complete.'
 
     def test_get_headers_openapi_schema(self):
         with open("./data/schemas/get-headers-params.json", "r") as f:
@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm import Agent
+from agency_swarm.sessions import Session
+from agency_swarm.tools import Retrieval, ToolFactory, ToolRetriever
+from agency_swarm.tools.ToolRetriever import tokenize
+from agency_swarm.user import User
+from agency_swarm.util import set_openai_client
+from agency_swarm.util.fake_openai import FakeOpenAI, scripted
+
+
+class ToolRetrieverTest(unittest.TestCase):
+    def setUp(self):
+        with open("./data/schemas/petstore-multi-store.json", "r") as f:
+            self.tools = ToolFactory.from_openapi_schema(f.read())
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("findPetsByStatusStore3"), ["find", "pets", "by", "status", "store3"])
+        self.assertEqual(tokenize("get_HTTPResponse code"), ["get", "http", "response", "code"])
+
+    def test_selects_relevant_tools(self):
+        retriever = ToolRetriever(top_k=3)
+        selected = [tool.__name__ for tool in retriever.select(self.tools, "Find the pets by status in store3")]
+        self.assertIn("findPetsByStatusStore3", selected)
+        self.assertEqual(len(selected), 3)
+        self.assertTrue(all(name.startswith("findPetsBy") for name in selected))
+
+    def test_always_on_and_small_agents(self):
+        retriever = ToolRetriever(top_k=2, always=("logoutUserStore1",))
+        selected = retriever.select([Retrieval] + self.tools, "place an order")
+        names = [tool.__name__ for tool in selected]
+        # built-in and always-on tools are kept, in their original order
+        self.assertEqual(names, ["Retrieval", "placeOrderStore1", "logoutUserStore1", "placeOrderStore2"])
+        self.assertIsNone(retriever.select(self.tools[:2], "place an order"))
+
+
+class RunToolsTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        with open("./data/schemas/petstore-multi-store.json", "r") as f:
+            self.tools = ToolFactory.from_openapi_schema(f.read())
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)  # Agent.init_oai writes settings.json to the working directory
+        self.poll_interval = Session.poll_interval
+        Session.poll_interval = 0.01
+
+    def tearDown(self):
+        set_openai_client(None)
+        Session.poll_interval = self.poll_interval
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_runs_get_the_selected_tools(self):
+        fake = FakeOpenAI(responders={"Shop": scripted("Done", "Done")})
+        set_openai_client(fake)
+        shop = Agent(name="Shop", description="Runs the stores.", instructions="Help.", tools=self.tools,
+                     tool_retriever=ToolRetriever(top_k=4))
+        shop.init_oai()
+
+        session = Session(User(), shop)
+        list(session.get_completion("Delete order 5 of store 2"))
+        run = list(fake._runs.values())[-1]
+        names = [tool["function"]["name"] for tool in run["tools"]]
+        self.assertEqual(len(names), 4)
+        self.assertIn("deleteOrderStore2", names)
+
+        shop.tool_retriever = None
+        list(session.get_completion("Delete order 6 of store 2"))
+        self.assertEqual(len(list(fake._runs.values())[-1]["tools"]), 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
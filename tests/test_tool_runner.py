@@ -0,0 +1,176 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+import openai
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm.tools.genesis import TestTool
+from agency_swarm.tools.genesis.util import ToolTestRunner, format_report, parse_arguments
+
+TOOLS_SOURCE = '''
+import os
+import sys
+import time
+
+from pydantic import Field
+from agency_swarm import BaseTool
+from helper import GREETING
+
+
+class Greet(BaseTool):
+    """Greets someone."""
+    name: str = Field(..., description="Who to greet.")
+
+    def run(self):
+        print("greeting", self.name)
+        return f"{GREETING}, {self.name}!"
+
+
+class Sleep(BaseTool):
+    """Sleeps."""
+    seconds: float = Field(..., description="How long.")
+
+    def run(self):
+        time.sleep(self.seconds)
+        return "awake"
+
+
+class Allocate(BaseTool):
+    """Allocates memory."""
+    megabytes: int = Field(..., description="How much.")
+
+    def run(self):
+        return str(len(bytearray(self.megabytes * 1024 * 1024)))
+
+
+class Crash(BaseTool):
+    """Kills its process."""
+
+    def run(self):
+        sys.stderr.write("fatal: native library aborted\\n")
+        sys.stderr.flush()
+        os._exit(3)
+
+
+class Silent(BaseTool):
+    """Returns nothing."""
+
+    def run(self):
+        return ""
+
+
+class ApiKey(BaseTool):
+    """Returns the API key of the process."""
+
+    def run(self):
+        return os.environ.get("OPENAI_API_KEY", "none")
+'''
+
+
+class ToolRunnerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.runner = ToolTestRunner(workers=2, timeout=5, memory_limit_mb=1024)
+        cls.runner.warm_up()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.runner.close()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tools.py")
+        self.write("tools.py", TOOLS_SOURCE)
+        self.write("helper.py", 'GREETING = "Hello"\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, source):
+        with open(os.path.join(self.tmp.name, name), "w") as f:
+            f.write(source)
+
+    def test_runs_and_reloads(self):
+        result = self.runner.run(self.path, "Greet", {"name": "Ada"})
+        self.assertEqual((result["status"], result["output"], result["stdout"]), ("ok", "Hello, Ada!", "greeting Ada\n"))
+
+        self.write("helper.py", 'GREETING = "Hi"\n')
+        self.assertEqual(self.runner.run(self.path, "Greet", {"name": "Ada"})["output"], "Hi, Ada!")
+        self.assertEqual(self.runner.run(self.path, "Missing")["status"], "not_found")
+        self.assertEqual(self.runner.run(self.path, "Greet", {})["status"], "invalid_arguments")
+        self.assertEqual(self.runner.run(self.path, "Silent")["status"], "no_output")
+
+    def test_timeout_and_memory_limit(self):
+        started = time.monotonic()
+        runner = ToolTestRunner(workers=1, timeout=1, memory_limit_mb=1024)
+        try:
+            self.assertEqual(runner.run(self.path, "Sleep", {"seconds": 30})["status"], "timeout")
+            self.assertLess(time.monotonic() - started, 10)
+            self.assertEqual(runner.run(self.path, "Allocate", {"megabytes": 4096})["status"], "error")
+            self.assertEqual(runner.run(self.path, "Sleep", {"seconds": 0})["output"], "awake")  # replaced worker
+            crashed = runner.run(self.path, "Crash")
+            self.assertEqual(crashed["status"], "crashed")
+            self.assertIn("exit code 3", crashed["error"])
+            self.assertIn("fatal: native library aborted", crashed["error"])
+        finally:
+            runner.close()
+
+    def test_workers_get_the_api_key(self):
+        previous = openai.api_key
+        openai.api_key = "sk-from-set-openai-key"
+        runner = ToolTestRunner(workers=1)
+        try:
+            self.assertEqual(runner.run(self.path, "ApiKey")["output"], "sk-from-set-openai-key")
+        finally:
+            runner.close()
+            openai.api_key = previous
+
+    def test_matrix_runs_in_parallel(self):
+        started = time.monotonic()
+        results = self.runner.run_matrix(self.path, "Sleep", [{"seconds": 1}, {"seconds": 1}])
+        self.assertLess(time.monotonic() - started, 1.9)
+        self.assertEqual([result["status"] for result in results], ["ok", "ok"])
+        report = format_report("Sleep", results + [self.runner.run(self.path, "Sleep", {"seconds": "x"})])
+        self.assertTrue(report.startswith("Sleep: 2/3 passed\n[1] ok"))
+        self.assertIn('[3] invalid_arguments', report)
+
+    def test_parse_arguments(self):
+        self.assertEqual(parse_arguments('{"name": "Ada"}'), {"name": "Ada"})
+        self.assertEqual(parse_arguments("{'name': 'Ada', 'formal': True}"), {"name": "Ada", "formal": True})
+        self.assertEqual(parse_arguments('[{"a": 1}, {"a": 2}]'), [{"a": 1}, {"a": 2}])
+        with self.assertRaises(ValueError):
+            parse_arguments("__import__('os').system('true')")
+        with self.assertRaises(ValueError):
+            parse_arguments("{[1]: 2}")  # TypeError: unhashable type
+        for arguments in ("{'data': b'x'}", "{'tags': {1, 2}}", "{'z': 1j}"):
+            with self.assertRaises(ValueError):
+                parse_arguments(arguments)
+
+    def test_worker_returned_after_unsendable_test(self):
+        runner = ToolTestRunner(workers=1)
+        try:
+            with self.assertRaises(TypeError):
+                runner.run(self.path, "Greet", {"name": {"Ada"}})
+            self.assertEqual(runner.run(self.path, "Greet", {"name": "Ada"})["output"], "Hello, Ada!")
+        finally:
+            runner.close()
+
+    def test_test_tool(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            tool = TestTool(chain_of_thought="", tool_name="Greet", arguments='{"name": "Ada"}')
+            self.assertEqual(tool.run(), "Successfully initialized and ran tool. Output: Hello, Ada!")
+            tool = TestTool(chain_of_thought="", tool_name="Greet", arguments='[{"name": "Ada"}, {"name": "Bo"}]')
+            self.assertTrue(tool.run().startswith("Greet: 2/2 passed"))
+            tool = TestTool(chain_of_thought="", tool_name="Greet", arguments="{[1]: 2}")
+            self.assertTrue(tool.run().startswith("Error initializing tool with arguments {[1]: 2}."))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, '../agency-swarm')
+from agency_swarm.util.instrumented_client import InstrumentedClient
+from agency_swarm.util.usage import UsageTracker, UsageBudget, BudgetExceededError, estimate_cost
+
+
+class FakeCompletions:
+    _is_api_resource = True
+
+    def create(self, **kwargs):
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50, total_tokens=150)
+        return SimpleNamespace(model=kwargs["model"], usage=usage)
+
+
+class FakeRuns:
+    _is_api_resource = True
+
+    def retrieve(self, thread_id, run_id):
+        return SimpleNamespace(id=run_id, thread_id=thread_id, model="gpt-4-1106-preview", status="completed",
+                               usage={"prompt_tokens": 1000, "completion_tokens": 200})
+
+
+class FakeThreads:
+    _is_api_resource = True
+    runs = FakeRuns()
+
+
+class FakeBeta:
+    _is_api_resource = True
+    threads = FakeThreads()
+
+
+class FakeChat:
+    _is_api_resource = True
+    completions = FakeCompletions()
+
+
+class FakeClient:
+    chat = FakeChat()
+    beta = FakeBeta()
+
+
+class UsageTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.tracker = UsageTracker()
+        self.client = InstrumentedClient(FakeClient(), hooks=[self.tracker])
+
+    def complete(self, model="gpt-4-1106-preview"):
+        return self.client.chat.completions.create(model=model, messages=[{"role": "user", "content": "hi"}])
+
+    def test_usage_is_aggregated_per_scope(self):
+        with self.tracker.context(agent="CEO", user="alice"):
+            self.complete()
+            with self.tracker.context(thread="thread_1"):
+                self.complete()
+        self.complete()
+
+        self.assertEqual(self.tracker.get_usage("agent", "CEO").total_tokens, 300)
+        self.assertEqual(self.tracker.get_usage("thread", "thread_1").calls, 1)
+        self.assertEqual(self.tracker.get_usage().total_tokens, 450)
+        self.assertAlmostEqual(self.tracker.get_usage("user", "alice").cost, 2 * estimate_cost("gpt-4-1106-preview", 100, 50))
+
+    def test_runs_are_counted_once(self):
+        with self.tracker.context(agent="CEO"):
+            for _ in range(3):
+                self.client.beta.threads.runs.retrieve(thread_id="thread_1", run_id="run_1")
+        self.assertEqual(self.tracker.get_usage("agent", "CEO").total_tokens, 1200)
+        self.assertEqual(self.tracker.get_usage("thread", "thread_1").calls, 1)
+
+    def test_reject_budget(self):
+        self.tracker.set_budget("user", UsageBudget(max_tokens=200))
+        with self.tracker.context(user="alice"):
+            self.complete()
+            self.complete()
+            with self.assertRaises(BudgetExceededError):
+                self.complete()
+        with self.tracker.context(user="bob"):
+            self.complete()
+
+    def test_downgrade_budget(self):
+        self.tracker.set_budget("agent", UsageBudget(max_cost=0.001, action="downgrade"), key="CEO")
+        with self.tracker.context(agent="CEO"):
+            self.assertEqual(self.complete().model, "gpt-4-1106-preview")
+            self.assertEqual(self.complete().model, "gpt-3.5-turbo-16k")
+
+
+if __name__ == '__main__':
+    unittest.main()